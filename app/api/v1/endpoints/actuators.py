@@ -1,6 +1,8 @@
 # app/api/v1/endpoints/actuators.py
-from typing import Annotated, List, Union
-from fastapi import APIRouter, Path, WebSocket, WebSocketDisconnect
+import asyncio
+from typing import Annotated, List, Optional, Union
+from fastapi import APIRouter, Header, Path, WebSocket, WebSocketDisconnect
+from pydantic import TypeAdapter
 
 from app.models.actuators import SolenoidValve, ProportionalValve, Pump
 from app.services.actuators.proportional import ProportionalService
@@ -9,6 +11,7 @@ from app.services.actuators.service import ActuatorService
 from app.services.actuators.solenoid import SolenoidService
 from app.utils.logger import logger
 from app.utils.config import settings
+from app.utils.response_cache import JSONResponseCache
 
 router = APIRouter()
 
@@ -16,21 +19,37 @@ solenoid_service = SolenoidService()
 proportional_service = ProportionalService()
 pump_service = PumpService()
 
+all_actuators_cache = JSONResponseCache(
+    TypeAdapter(List[Union[SolenoidValve, ProportionalValve, Pump]]),
+    version=lambda: (
+        solenoid_service.state_version,
+        proportional_service.state_version,
+        pump_service.state_version,
+    ),
+    render=lambda: (
+        solenoid_service.get_all()
+        + proportional_service.get_all()
+        + pump_service.get_all()
+    ),
+)
+
 
-@router.get("/", tags=["Actuators"])
-def get_all_actuators() -> List[Union[SolenoidValve, ProportionalValve, Pump]]:
+@router.get(
+    "/",
+    tags=["Actuators"],
+    response_model=List[Union[SolenoidValve, ProportionalValve, Pump]],
+)
+def get_all_actuators(if_none_match: Annotated[Optional[str], Header()] = None):
     """
     Retrieve a list of all actuators, including solenoid valves, proportional valves, and pumps.
 
+    The response is served from a cache until an actuator changes. It carries an
+    ETag, a request whose `If-None-Match` header matches it receives `304 Not Modified`.
+
     Returns:
         List[Union[SolenoidValve, ProportionalValve, Pump]]: A list containing all the actuators.
     """
-    actuators = (
-        solenoid_service.get_all()
-        + proportional_service.get_all()
-        + pump_service.get_all()
-    )
-    return actuators
+    return all_actuators_cache.response(if_none_match)
 
 
 def create_actuator_router(service: ActuatorService):
@@ -44,16 +63,23 @@ def create_actuator_router(service: ActuatorService):
         APIRouter: A FastAPI router configured for the actuator service.
     """
     r = APIRouter()
+    cache = JSONResponseCache(
+        TypeAdapter(List[service.item_type]),
+        version=lambda: service.state_version,
+        render=lambda: service.get_all(),
+    )
 
     @r.get("/", response_model=List[service.item_type])
-    def get_all():
+    def get_all(if_none_match: Annotated[Optional[str], Header()] = None):
         """
         Retrieve all actuators of a specific type.
 
+        The response is cached and supports `If-None-Match` like `GET /actuators/`.
+
         Returns:
             List[service.item_type]: A list of actuators of the specified type.
         """
-        return service.get_all()
+        return cache.response(if_none_match)
 
     @r.get("/{actuator_id}", response_model=service.item_type)
     def get_by_id(
@@ -83,6 +109,33 @@ def create_actuator_router(service: ActuatorService):
         """
         return await service.set_state(actuator)
 
+    @r.websocket("/state")
+    async def states_ws(websocket: WebSocket):
+        """
+        Establish a WebSocket connection for the state updates of all actuators.
+
+        Parameters
+        ----------
+        websocket : WebSocket
+            The WebSocket object to establish a connection with.
+
+        Notes
+        -----
+        Every message is a JSON list with the states of all actuators, indexed by
+        their ID. A single message is sent when all actuators are set at once.
+
+        Raises
+        ------
+        WebSocketDisconnect
+            If the WebSocket connection is disconnected.
+        """
+        await service.connect_all_websocket(websocket)
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            service.disconnect_all_websocket(websocket)
+
     @r.websocket("/state/{actuator_id}")
     async def state_ws(
         websocket: WebSocket,
@@ -202,6 +255,14 @@ router.include_router(
 )
 
 
+async def startup_event():
+    """
+    Attaches the running event loop to the proportional service when the application starts.
+    """
+
+    proportional_service.attach_event_loop(asyncio.get_running_loop())
+
+
 def shutdown_event():
     """
     Shuts down the proportional service and closes the GPIO device when the application is shutting down.
@@ -215,4 +276,5 @@ def shutdown_event():
     logger.info("GPIO device closed")
 
 
+router.on_startup = [startup_event]
 router.on_shutdown = [shutdown_event]
@@ -1,5 +1,9 @@
 from fastapi import APIRouter
+from app.models.info import InfluxWriterStats, ProportionalCommandStats
 from app.utils.config import settings
+from app.utils.influx_client import influx_connector
+
+from .actuators import proportional_service
 
 
 router = APIRouter()
@@ -36,3 +40,39 @@ def get_version():
 
     info = settings.VERSION
     return info
+
+
+@router.get("/influx", response_model=InfluxWriterStats)
+def get_influx_stats():
+    """
+    **Summary**
+
+    Retrieves the state of the background InfluxDB writer.
+
+    **Returns**
+
+    InfluxWriterStats
+        The current depth and capacity of the write queue together with the
+        number of written, failed and dropped points.
+    """
+
+    return influx_connector.get_stats()
+
+
+@router.get("/proportional", response_model=ProportionalCommandStats)
+def get_proportional_stats():
+    """
+    **Summary**
+
+    Retrieves the latency of the proportional valve commands.
+
+    **Returns**
+
+    ProportionalCommandStats
+        The number of commands that changed a valve position together with the
+        latency of the last one and the highest latency, measured from the
+        command until it was handed to the CAN bus. The latency is null if the
+        valves are not driven over CAN.
+    """
+
+    return proportional_service.get_command_stats()
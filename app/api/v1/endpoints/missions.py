@@ -1,13 +1,75 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
 from typing import List, Optional
+from pydantic import TypeAdapter
+from pydantic import ValidationError as PydanticValidationError
 from app.models.missions import (
     ClassifiedFlowControlMission,
     FlowControlMission,
 )
 from app.services.missions.flow import FlowMissionService
+from app.utils.trajectory_codec import decode_missions
 
 router = APIRouter(tags=["Missions"])
 
+OCTET_STREAM_MEDIA_TYPE = "application/octet-stream"
+
+mission_list_adapter = TypeAdapter(List[FlowControlMission])
+
+mission_queue_openapi = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "array",
+                    "items": {"$ref": "#/components/schemas/FlowControlMission"},
+                }
+            },
+            OCTET_STREAM_MEDIA_TYPE: {
+                "schema": {"type": "string", "format": "binary"}
+            },
+        },
+    }
+}
+
+
+def parse_mission_queue(body: bytes, content_type: str) -> List[FlowControlMission]:
+    """
+    Parse a list of flow control missions from a request body.
+
+    Parameters
+    ----------
+    body : bytes
+        The raw request body.
+    content_type : str
+        The media type of the body. `application/octet-stream` expects the
+        binary trajectory format of `app.utils.trajectory_codec`, anything
+        else a JSON list of `FlowControlMission`.
+
+    Returns
+    -------
+    List[FlowControlMission]
+        The validated missions.
+
+    Raises
+    ------
+    RequestValidationError
+        If the body does not match the expected format.
+    """
+    try:
+        if content_type.split(";")[0].strip() == OCTET_STREAM_MEDIA_TYPE:
+            return decode_missions(body)
+        return mission_list_adapter.validate_json(body)
+    except PydanticValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+        ) from e
+    except ValueError as e:
+        raise RequestValidationError(
+            [{"type": "value_error", "loc": ("body",), "msg": str(e), "input": None}]
+        ) from e
+
 
 class FlowMissionRouter(APIRouter):
     """Router for flow control missions."""
@@ -16,12 +78,22 @@ class FlowMissionRouter(APIRouter):
         super().__init__(**kwargs)
         self.service = service
         self._setup_routes()
+        self.on_startup.append(self.service.start)
+        self.on_shutdown.append(self.service.close)
 
     def _setup_routes(self):
-        @self.post("/queue")
-        async def add_to_queue(mission: List[FlowControlMission]):
-            """Add a new mission to the queue."""
-            self.service.add_to_queue(mission)
+        @self.post("/queue", openapi_extra=mission_queue_openapi)
+        async def add_to_queue(request: Request):
+            """
+            Add new missions to the queue.
+
+            The body is either a JSON list of missions or, with the content type
+            `application/octet-stream`, missions in the binary trajectory format.
+            """
+            missions = parse_mission_queue(
+                await request.body(), request.headers.get("content-type", "")
+            )
+            self.service.add_to_queue(missions)
             return True
 
         @self.get("/current", response_model=Optional[FlowControlMission])
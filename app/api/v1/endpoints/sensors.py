@@ -1,28 +1,140 @@
-from typing import Annotated, List, Union
-from fastapi import APIRouter, Path, WebSocket, WebSocketDisconnect
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, List, Optional, Union
+from fastapi import (
+    APIRouter,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter
+from pydantic import ValidationError as PydanticValidationError
 
-from app.models.sensors import Flowmeter, SensorReading, Setpoint
+from app.models.sensors import (
+    Flowmeter,
+    SensorBatchReading,
+    SensorReading,
+    SensorReadingAck,
+    SensorReadingColumns,
+    SensorReadingSeries,
+    Setpoint,
+)
 from app.services.sensors.service import SensorService
 from app.services.sensors.flowmeter import FlowmeterService
+from app.utils.response_cache import JSONResponseCache
 
 router = APIRouter()
 
 flowmeter_service = FlowmeterService()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+reading_batch_adapter = TypeAdapter(
+    Union[SensorReadingColumns, List[SensorBatchReading]]
+)
+
+reading_batch_openapi = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "anyOf": [
+                        {
+                            "type": "array",
+                            "items": SensorBatchReading.model_json_schema(),
+                        },
+                        SensorReadingColumns.model_json_schema(),
+                    ]
+                }
+            },
+            NDJSON_MEDIA_TYPE: {"schema": SensorBatchReading.model_json_schema()},
+        },
+    }
+}
+
+
+def parse_reading_batch(body: bytes, content_type: str) -> SensorReadingColumns:
+    """
+    Parse a batch of sensor readings from a request body.
+
+    Parameters
+    ----------
+    body : bytes
+        The raw request body.
+    content_type : str
+        The media type of the body. `application/x-ndjson` expects one
+        `SensorBatchReading` per line, anything else a JSON list of
+        `SensorBatchReading` or a `SensorReadingColumns` object.
+
+    Returns
+    -------
+    SensorReadingColumns
+        The readings of the batch in columnar form.
+
+    Raises
+    ------
+    RequestValidationError
+        If the body does not match the expected format.
+    """
+    try:
+        if content_type.split(";")[0].strip() == NDJSON_MEDIA_TYPE:
+            readings = []
+            for line_number, line in enumerate(body.splitlines()):
+                if not line.strip():
+                    continue
+                try:
+                    readings.append(SensorBatchReading.model_validate_json(line))
+                except PydanticValidationError as e:
+                    raise RequestValidationError(
+                        [
+                            {**error, "loc": ("body", line_number, *error["loc"])}
+                            for error in e.errors()
+                        ]
+                    ) from e
+            return SensorReadingColumns.from_readings(readings)
+
+        batch = reading_batch_adapter.validate_json(body)
+    except PydanticValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+        ) from e
+
+    if isinstance(batch, SensorReadingColumns):
+        return batch
+    return SensorReadingColumns.from_readings(batch)
+
+
+all_sensors_cache = JSONResponseCache(
+    TypeAdapter(List[Union[Flowmeter]]),
+    version=lambda: (
+        flowmeter_service.state_version,
+        # Add the versions of other sensor services here, if you have more.
+    ),
+    render=lambda: (
+        flowmeter_service.get_all()
+        # Add other sensor services here, if you have more.
+    ),
+)
+
 
 @router.get("/", tags=["Sensors"], response_model=List[Union[Flowmeter]])
-def get_all_sensors() -> List[Union[Flowmeter]]:
+def get_all_sensors(if_none_match: Annotated[Optional[str], Header()] = None):
     """
     Retrieve a list of all sensors, including flowmeters.
 
+    The response is served from a cache until a sensor changes. It carries an
+    ETag, a request whose `If-None-Match` header matches it receives `304 Not Modified`.
+
     Returns:
         List[Union[Flowmeter]]: A list containing all the sensors.
     """
-    sensors = (
-        flowmeter_service.get_all()
-        # Add other sensor services here, if you have more.
-    )
-    return sensors
+    return all_sensors_cache.response(if_none_match)
 
 
 class SensorRouter(APIRouter):
@@ -40,6 +152,11 @@ class SensorRouter(APIRouter):
         """
         super().__init__(**kwargs)
         self.service = service
+        self.cache = JSONResponseCache(
+            TypeAdapter(List[service.item_type]),
+            version=lambda: service.state_version,
+            render=lambda: service.get_all(),
+        )
         self._setup_routes()
 
     def _setup_routes(self):
@@ -48,14 +165,16 @@ class SensorRouter(APIRouter):
         """
 
         @self.get("/", response_model=List[self.service.item_type])
-        async def get_all():
+        async def get_all(if_none_match: Annotated[Optional[str], Header()] = None):
             """
             Retrieve all sensors of a specific type.
 
+            The response is cached and supports `If-None-Match` like `GET /sensors/`.
+
             Returns:
                 List[self.service.item_type]: A list of sensors of the specified type.
             """
-            return self.service.get_all()
+            return self.cache.response(if_none_match)
 
         @self.get("/{sensor_id}", response_model=self.service.item_type)
         async def get_by_id(
@@ -72,6 +191,53 @@ class SensorRouter(APIRouter):
             """
             return self.service.get_by_id(sensor_id)
 
+        @self.get("/{sensor_id}/recent", response_model=SensorReadingSeries)
+        async def get_recent(
+            sensor_id: Annotated[int, Path(..., ge=0, lt=self.service.sensor.count)],
+            since_ns: Optional[int] = None,
+            last_n: Annotated[Optional[int], Query(ge=0)] = None,
+        ):
+            """
+            Retrieve the most recent readings of a sensor kept in memory.
+
+            Args:
+                sensor_id (int): The ID of the sensor.
+                since_ns (int, optional): Only return readings at or after this
+                    timestamp in nanoseconds since Epoch.
+                last_n (int, optional): Only return the newest `last_n` readings.
+
+            Returns:
+                SensorReadingSeries: The selected readings in time order, at most
+                `SENSOR_HISTORY_CAPACITY`.
+            """
+            return self.service.get_recent_readings(sensor_id, since_ns, last_n)
+
+        @self.get("/{sensor_id}/history", response_model=SensorReadingSeries)
+        async def get_history(
+            sensor_id: Annotated[int, Path(..., ge=0, lt=self.service.sensor.count)],
+            start: datetime,
+            stop: Optional[datetime] = None,
+            every: timedelta = timedelta(minutes=1),
+        ):
+            """
+            Retrieve the readings of a sensor downsampled to the mean per window.
+
+            Args:
+                sensor_id (int): The ID of the sensor.
+                start (datetime): Start of the range, UTC if no timezone is given.
+                stop (datetime, optional): End of the range. Defaults to now.
+                every (timedelta, optional): Length of the windows, as seconds or
+                    ISO 8601 duration. Defaults to one minute.
+
+            Returns:
+                SensorReadingSeries: The mean reading of every window with readings,
+                timestamped with the start of the window. The range is extended to
+                whole windows.
+            """
+            return await self.service.get_history(
+                sensor_id, start, stop or datetime.now(timezone.utc), every
+            )
+
         @self.post("/{sensor_id}/reading", response_model=self.service.item_type)
         async def post_reading(
             sensor_id: Annotated[int, Path(..., ge=0, lt=self.service.sensor.count)],
@@ -89,12 +255,79 @@ class SensorRouter(APIRouter):
             """
             return await self.service.post_reading(sensor_id, reading)
 
+        @self.post(
+            "/readings",
+            response_model=List[self.service.item_type],
+            openapi_extra=reading_batch_openapi,
+        )
+        async def post_readings(request: Request):
+            """
+            Post a batch of readings for one or more sensors.
+
+            The body is either a JSON list of readings, a columnar JSON object with
+            the keys `sensor_id`, `timestamp_ns` and `value`, or newline delimited
+            JSON (`application/x-ndjson`) with one reading per line.
+
+            Returns:
+                List[self.service.item_type]: The updated sensor objects.
+            """
+            readings = parse_reading_batch(
+                await request.body(), request.headers.get("content-type", "")
+            )
+            return await self.service.post_readings(readings)
+
+        @self.websocket("/ws/ingest")
+        async def websocket_ingest_endpoint(websocket: WebSocket, ack: bool = True):
+            """
+            Receive a continuous stream of reading batches from a producer.
+
+            Every message is a batch in one of the JSON formats accepted by
+            `POST /readings` and is processed like a request to that endpoint.
+            Unless `ack` is false, each batch is answered with a
+            `SensorReadingAck` holding its sequence number on the connection and
+            the number of accepted readings, or the validation errors.
+            """
+            await websocket.accept()
+            seq = 0
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+
+                seq += 1
+                body = message.get("bytes") or (message.get("text") or "").encode()
+                try:
+                    readings = parse_reading_batch(body, "application/json")
+                    await self.service.post_readings(readings)
+                    reply = SensorReadingAck(seq=seq, count=len(readings.value))
+                except RequestValidationError as e:
+                    reply = SensorReadingAck(
+                        seq=seq, count=0, errors=jsonable_encoder(e.errors())
+                    )
+                except HTTPException as e:
+                    reply = SensorReadingAck(seq=seq, count=0, errors=e.detail)
+
+                if ack:
+                    await websocket.send_text(reply.model_dump_json())
+
         @self.websocket("/ws/{sensor_id}")
         async def websocket_endpoint(
             websocket: WebSocket,
             sensor_id: Annotated[int, Path(..., ge=0, lt=self.service.sensor.count)],
+            since_ns: Optional[int] = None,
+            last_n: Annotated[Optional[int], Query(ge=0)] = None,
         ):
-            await self.service.connect_reading_ws(sensor_id, websocket)
+            """
+            Stream the readings of a sensor.
+
+            The first message is the current reading. With `since_ns` or
+            `last_n`, it is replaced by a binary frame with the buffered recent
+            readings, a uint32 count followed by the int64 timestamps and the
+            float64 values, little-endian. Live readings follow as JSON.
+            """
+            await self.service.connect_reading_ws(
+                sensor_id, websocket, since_ns=since_ns, last_n=last_n
+            )
             try:
                 # Stay connected to the websocket
                 while True:
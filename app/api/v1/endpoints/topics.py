@@ -0,0 +1,55 @@
+from typing import List
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from app.utils.config import settings
+from app.utils.topic_hub import TopicHub
+
+from .actuators import pump_service, proportional_service, solenoid_service
+from .sensors import flowmeter_service
+
+router = APIRouter()
+
+topic_hub = TopicHub()
+
+for name, service in (
+    ("solenoid", solenoid_service),
+    ("proportional", proportional_service),
+    ("pump", pump_service),
+):
+    topic_hub.register(f"actuators/{name}/state", service.websocket_manager)
+    topic_hub.register(
+        f"actuators/{name}/state", service.all_websocket_manager, indexed=False
+    )
+if settings.PROPORTIONAL_MODE == "CAN":
+    topic_hub.register(
+        "actuators/proportional/current_position",
+        proportional_service.actuator_repo.current_position_websocket,
+    )
+topic_hub.register("sensors/flowmeters/reading", flowmeter_service.reading_ws)
+topic_hub.register("sensors/flowmeters/setpoint", flowmeter_service.setpoint_ws)
+
+
+@router.get("/", response_model=List[str])
+def get_topics():
+    """
+    Retrieve the names of all topics of the topic WebSocket.
+    """
+    return topic_hub.get_topics()
+
+
+@router.websocket("/ws")
+async def topics_ws(websocket: WebSocket):
+    """
+    Stream any mix of actuator, sensor and mission topics over one WebSocket.
+
+    Clients send `{"action": "subscribe", "topics": [...]}` or
+    `{"action": "unsubscribe", "topics": [...]}` and receive every message of
+    their topics as `{"topic": ..., "data": ...}`, starting with the current
+    value of each topic on subscription.
+    """
+    await topic_hub.connect(websocket)
+    try:
+        while True:
+            topic_hub.handle(websocket, await websocket.receive_text())
+    except WebSocketDisconnect:
+        topic_hub.disconnect(websocket)
@@ -1,7 +1,10 @@
 from fastapi import APIRouter
 
 from app.repositories.missions.flow import FlowMissionRepository
+from app.repositories.missions.journal import MissionJournal
+from app.services.missions.classifier import MissionClassifier
 from app.services.missions.flow import FlowMissionService
+from app.utils.config import settings
 
 from .endpoints.actuators import router as actuators
 from .endpoints.actuators import solenoid_service
@@ -9,22 +12,44 @@ from .endpoints.sensors import router as sensors
 from .endpoints.sensors import flowmeter_service
 from .endpoints.info import router as info
 from .endpoints.missions import FlowMissionRouter
+from .endpoints.topics import router as topics
+from .endpoints.topics import topic_hub
+
+flow_mission_repo = FlowMissionRepository(
+    actuator_service=solenoid_service,
+    sensor_service=flowmeter_service,
+    flow_sensor_id=0,
+    flow_sensor_ids=(
+        [int(i) for i in settings.MISSION_FLOW_SENSOR_IDS.split(",")]
+        if settings.MISSION_FLOW_SENSOR_IDS
+        else None
+    ),
+    journal=(
+        MissionJournal(settings.MISSION_JOURNAL_PATH)
+        if settings.MISSION_JOURNAL_PATH
+        else None
+    ),
+    classifier=(
+        MissionClassifier(settings.MISSION_CLASSIFIER_PATH)
+        if settings.MISSION_CLASSIFIER_PATH
+        else None
+    ),
+)
+topic_hub.register(
+    "missions/flow/completed", flow_mission_repo.completed_mission_ws, indexed=False
+)
+topic_hub.register(
+    "missions/flow/classified", flow_mission_repo.classified_mission_ws, indexed=False
+)
 
 v1_router = APIRouter()
 
 v1_router.include_router(actuators, prefix="/actuators")
 v1_router.include_router(sensors, prefix="/sensors")
 v1_router.include_router(info, prefix="/info", tags=["Backend Info"])
+v1_router.include_router(topics, prefix="/topics", tags=["Topics"])
 v1_router.include_router(
-    FlowMissionRouter(
-        service=FlowMissionService(
-            mission_repo=FlowMissionRepository(
-                actuator_service=solenoid_service,
-                sensor_service=flowmeter_service,
-                flow_sensor_id=0,
-            )
-        )
-    ),
+    FlowMissionRouter(service=FlowMissionService(mission_repo=flow_mission_repo)),
     prefix="/missions/flow",
     tags=["Flow Missions"],
 )
@@ -11,6 +11,7 @@ from fastapi.openapi.docs import get_swagger_ui_html
 import uvicorn
 from .api.v1.router import v1_router
 from .utils.config import settings
+from .utils.influx_client import influx_connector
 
 app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION, docs_url=None)
 
@@ -71,5 +72,13 @@ async def generate_openapi():
     openapi_output_path.write_text(json.dumps(openapi, indent=2), encoding="utf-8")
 
 
+@app.on_event("shutdown")
+def close_influx_connector():
+    """
+    Writes the remaining queued points to InfluxDB and stops the background writer.
+    """
+    influx_connector.close()
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
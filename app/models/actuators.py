@@ -1,3 +1,4 @@
+from asyncio import AbstractEventLoop
 from typing import Generic, List, Literal, TypeVar
 from enum import Enum
 from fastapi import WebSocket
@@ -78,6 +79,23 @@ class ActuatorRepository(Generic[T]):
         actuator.repositories : Repositories that implement the actual disconnection logic.
         """
 
+    def attach_event_loop(self, loop: AbstractEventLoop):
+        """
+        Attach the running event loop of the application.
+
+        This method is a placeholder for repositories that receive updates on
+        other threads and need to hand them to the event loop.
+
+        Parameters
+        ----------
+        loop : AbstractEventLoop
+            The running event loop of the application.
+
+        Returns
+        -------
+        None
+        """
+
     async def connect_current_position_websocket(
         self, ws_id: int, websocket: WebSocket
     ):
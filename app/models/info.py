@@ -0,0 +1,74 @@
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class CircuitState(str, Enum):
+    """Enumeration of the states of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class InfluxWriterStats(BaseModel):
+    """Model describing the state of the background InfluxDB writer."""
+
+    queue_depth: int = Field(..., description="Number of points waiting to be written")
+    queue_size: int = Field(..., description="Capacity of the write queue in points")
+    written_points: int = Field(
+        ..., description="Number of points successfully written to InfluxDB"
+    )
+    failed_points: int = Field(
+        ..., description="Number of points lost to failed write requests"
+    )
+    dropped_points: int = Field(
+        ...,
+        description="Number of points discarded because the write queue was full",
+    )
+    spooled_points: int = Field(
+        ...,
+        description="Number of points written to the disk spool after a failed write",
+    )
+    replayed_points: int = Field(
+        ..., description="Number of spooled points written to InfluxDB"
+    )
+    spool_dropped_points: int = Field(
+        ..., description="Number of spooled points discarded because the spool was full"
+    )
+    spool_bytes: int = Field(..., description="Size of the disk spool in bytes")
+    spool_lag_s: Optional[float] = Field(
+        ..., description="Age of the oldest spooled point in seconds, null if empty"
+    )
+    held_points: int = Field(
+        ...,
+        description="Points of failed writes held in memory for a retry, if no spool is configured",
+    )
+    breaker_state: CircuitState = Field(
+        ...,
+        description="Whether writes are attempted (closed), skipped (open) or probed",
+    )
+    consecutive_failures: int = Field(
+        ..., description="Number of failed write requests since the last success"
+    )
+
+
+class ProportionalCommandStats(BaseModel):
+    """Model describing the latency of proportional valve commands."""
+
+    mode: str = Field(..., description="How the proportional valves are driven")
+    commands: int = Field(
+        ..., description="Number of commands that changed a valve position"
+    )
+    last_command_latency_ns: Optional[int] = Field(
+        ...,
+        description="Time from the last command until it was handed to the bus, null if not measured",
+    )
+    max_command_latency_ns: Optional[int] = Field(
+        ..., description="Highest measured command latency, null if not measured"
+    )
+    rpdo_period_s: Optional[float] = Field(
+        ...,
+        description="Period of the cyclic command transmission in periodic mode, null otherwise. Commands to a single valve wait up to one period to be sent and are not included in the latency",
+    )
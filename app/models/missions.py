@@ -1,9 +1,13 @@
+import operator
 from abc import ABC, abstractmethod
+from array import array
 from datetime import datetime, time
 from enum import Enum
-from typing import List, NamedTuple, Optional
+from itertools import islice
+from typing import Any, Iterator, List, NamedTuple, Optional, Sequence, overload
 from fastapi import WebSocket
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, GetCoreSchemaHandler, model_validator
+from pydantic_core import core_schema
 
 
 class TrajectoryPoint(NamedTuple):
@@ -18,6 +22,151 @@ class TrajectoryPoint(NamedTuple):
     flow_rate: float
 
 
+class Trajectory(Sequence[TrajectoryPoint]):
+    """
+    A flow trajectory stored as two contiguous arrays of times and flow rates.
+
+    Behaves like a read-only sequence of `TrajectoryPoint`, which are only
+    created while iterating. It validates like a list of `TrajectoryPoint`,
+    with a fast path for `[time, flow_rate]` pairs of numbers, and serializes
+    as such pairs, so the JSON schema of a mission is unchanged.
+
+    Parameters
+    ----------
+    times : array
+        Times in seconds since the start of the mission, as `array("d")`.
+    flow_rates : array
+        The desired flow rate until each time is reached, as `array("d")`.
+
+    Methods
+    -------
+    from_points(points) -> Trajectory
+        Creates a trajectory from `[time, flow_rate]` pairs.
+    validate()
+        Checks that the trajectory can be executed.
+    """
+
+    __slots__ = ("times", "flow_rates")
+
+    def __init__(self, times: array, flow_rates: array):
+        self.times = times
+        self.flow_rates = flow_rates
+
+    @classmethod
+    def from_points(cls, points: Sequence[Sequence[float]]) -> "Trajectory":
+        """
+        Create a trajectory from `[time, flow_rate]` pairs.
+
+        Raises
+        ------
+        ValueError
+            If a point does not consist of exactly two numbers.
+        """
+        if isinstance(points, cls):
+            return points
+        try:
+            if not points:
+                return cls(array("d"), array("d"))
+            if set(map(len, points)) != {2}:
+                raise ValueError(
+                    "Trajectory points must consist of a time and a flow rate"
+                )
+            times, flow_rates = zip(*points)
+            return cls(array("d", times), array("d", flow_rates))
+        except TypeError as e:
+            raise ValueError(
+                "Flow trajectory must be a list of [time, flow rate] pairs of numbers"
+            ) from e
+
+    def validate(self) -> "Trajectory":
+        """
+        Check that the trajectory is not empty, has no negative values and
+        strictly ascending times.
+
+        Raises
+        ------
+        ValueError
+            If a condition is violated, naming the index of the first offending point.
+        """
+        times, flow_rates = self.times, self.flow_rates
+        if not times:
+            raise ValueError("Flow trajectory must not be empty")
+
+        # Check the whole arrays first and only search for the index on failure
+        if min(times) < 0:
+            i = next(i for i, value in enumerate(times) if value < 0)
+            raise ValueError(f"Time must be non-negative at index {i}: {times[i]}")
+        if min(flow_rates) < 0:
+            i = next(i for i, value in enumerate(flow_rates) if value < 0)
+            raise ValueError(
+                f"Flow rate must be non-negative at index {i}: {flow_rates[i]}"
+            )
+        if not all(map(operator.lt, times, islice(times, 1, None))):
+            raise ValueError("Time values must be in strictly ascending order.")
+
+        return self
+
+    @overload
+    def __getitem__(self, index: int) -> TrajectoryPoint: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "Trajectory": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Trajectory(self.times[index], self.flow_rates[index])
+        return TrajectoryPoint(self.times[index], self.flow_rates[index])
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __iter__(self) -> Iterator[TrajectoryPoint]:
+        return map(TrajectoryPoint, self.times, self.flow_rates)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Trajectory):
+            return self.times == other.times and self.flow_rates == other.flow_rates
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Trajectory({list(zip(self.times, self.flow_rates))!r})"
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        # Pairs of numbers are converted by `from_points` without building a
+        # TrajectoryPoint per point. Anything else, e.g. points as objects or
+        # numeric strings, is validated as the list of TrajectoryPoint it is
+        # documented as, which also locates errors at the offending point.
+        def validate(value: Any, points_handler) -> Trajectory:
+            try:
+                trajectory = cls.from_points(value)
+            except ValueError:
+                trajectory = cls.from_points(points_handler(value))
+            return trajectory.validate()
+
+        return core_schema.no_info_wrap_validator_function(
+            validate,
+            handler.generate_schema(List[TrajectoryPoint]),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda trajectory: list(zip(trajectory.times, trajectory.flow_rates))
+            ),
+        )
+
+
+class InterpolationMode(str, Enum):
+    """Enumeration of the ways setpoints are generated between trajectory points"""
+
+    STEP = "step"
+    LINEAR = "linear"
+    CUBIC = "cubic"
+
+
 class EndUseType(str, Enum):
     """Enumeration of possible end use types for simulations"""
 
@@ -80,9 +229,9 @@ class FlowControlMission(BaseModel):
         ----------
         valve_id : int
             The ID of the valve to control.
-        flow_trajectory : list of TrajectoryPoint
-            A list of TrajectoryPoint instances, each specifying a time and the desired flow rate
-            until that time is reached.
+        flow_trajectory : Trajectory
+            A sequence of TrajectoryPoint instances, each specifying a time and the desired flow rate
+            until that time is reached. Stored as two arrays of times and flow rates.
 
         duration_scaling_factor : Optional[int]
             The scaling factor of the event simulation. For example, a simulation with a factor of 2 and a duration of 45 s represents an original event of 90 s. This parameter helps to simulate events with different durations without changing the original trajectory.
@@ -93,11 +242,21 @@ class FlowControlMission(BaseModel):
         actual_start_time : Optional[time]
             The time of day when the simulated event starts (HH:MM:SS).
 
+        interpolation : InterpolationMode
+            How setpoints are generated between the trajectory points. `step` holds each flow rate
+            until its time is reached. `linear` and `cubic` treat the points as knots, hold the first
+            flow rate until the first time and interpolate in between, the latter with a monotone
+            cubic that never overshoots the knots.
+
+        sample_rate_hz : Optional[float]
+            The rate at which interpolated setpoints are applied. Required unless the interpolation is `step`.
+
         Raises
         ------
         ValueError
             If the flow trajectory is empty, contains negative time or flow rate values,
-            or if the time values are not in strictly ascending order.
+            if the time values are not in strictly ascending order,
+            or if an interpolation other than `step` has no sample rate.
 
         Examples
         --------
@@ -120,7 +279,7 @@ class FlowControlMission(BaseModel):
     valve_id: int = Field(
         ..., description="ID of the valve to steer", ge=-1, examples=[1, 2, 3]
     )
-    flow_trajectory: list[TrajectoryPoint] = Field(
+    flow_trajectory: Trajectory = Field(
         ...,
         description="Definition of the Flow Trajectory. A list of TrajectoryPoint instances, where each point defines the flow rate until a specific time",
         examples=[[(10, 22.2), (20, 11.1)]],
@@ -140,30 +299,24 @@ class FlowControlMission(BaseModel):
         description="The time of day when the simulated event starts (HH:MM:SS)",
         examples=[time(11, 11, 11), time(16, 2, 42)],
     )
+    interpolation: InterpolationMode = Field(
+        InterpolationMode.STEP,
+        description="How setpoints are generated between the trajectory points",
+    )
+    sample_rate_hz: Optional[float] = Field(
+        None,
+        description="Rate at which interpolated setpoints are applied, required unless the interpolation is step",
+        gt=0,
+        examples=[10],
+    )
 
-    @field_validator("flow_trajectory")
-    @classmethod
-    def _validate_trajectory(cls, trajectory):
-        if not trajectory:
-            raise ValueError("Flow trajectory must not be empty")
-
-        # Validate each trajectory point
-        for i, (time, flow_rate) in enumerate(trajectory):
-            if time < 0:
-                raise ValueError(f"Time must be non-negative at index {i}: {time}")
-            if flow_rate < 0:
-                raise ValueError(
-                    f"Flow rate must be non-negative at index {i}: {flow_rate}"
-                )
-
-        # Ensure that time values are in ascending order
-        previous_time = -1
-        for time, _ in trajectory:
-            if time <= previous_time:
-                raise ValueError("Time values must be in strictly ascending order.")
-            previous_time = time
-
-        return trajectory
+    @model_validator(mode="after")
+    def _validate_sample_rate(self):
+        if self.interpolation != InterpolationMode.STEP and self.sample_rate_hz is None:
+            raise ValueError(
+                f"A sample rate is required for {self.interpolation.value} interpolation"
+            )
+        return self
 
 
 class CompletedFlowControlMission(BaseModel):
@@ -178,6 +331,15 @@ class CompletedFlowControlMission(BaseModel):
         The timestamp the mission started with nanosecond precision.
     end_ns : int
         The timestamp the mission was completed with nanosecond precision.
+    start_timing_error_s : Optional[float]
+        How late the first setpoint was applied after the mission started, in seconds.
+    end_timing_error_s : Optional[float]
+        How late the trajectory ended compared to its last point, in seconds.
+        None if the mission was cancelled.
+    max_timing_error_s : Optional[float]
+        The largest lateness of any trajectory point, in seconds.
+    features : Optional[FlowClassifierFeatures]
+        The features of the flow measured while the mission ran.
     """
 
     flow_control_mission: FlowControlMission = Field(
@@ -192,6 +354,22 @@ class CompletedFlowControlMission(BaseModel):
         ...,
         description="The timestamp the mission was completed",
     )
+    start_timing_error_s: Optional[float] = Field(
+        None,
+        description="Delay in seconds between the start of the mission and the first setpoint",
+    )
+    end_timing_error_s: Optional[float] = Field(
+        None,
+        description="Delay in seconds between the scheduled and the actual end of the trajectory",
+    )
+    max_timing_error_s: Optional[float] = Field(
+        None,
+        description="Largest delay in seconds of any trajectory point compared to its schedule",
+    )
+    features: Optional[FlowClassifierFeatures] = Field(
+        None,
+        description="Features of the flow measured by the flowmeter while the mission ran",
+    )
 
 
 class ClassifiedFlowControlMission(CompletedFlowControlMission):
@@ -240,6 +418,18 @@ class MissionRepository(ABC):
     Defines the interface for managing mission queue operations.
     """
 
+    @abstractmethod
+    def start(self) -> None:
+        """
+        Restore persisted missions and start executing the queue.
+        Called once the event loop is running.
+        """
+
+    def close(self) -> None:
+        """
+        Release background resources when the application shuts down.
+        """
+
     @abstractmethod
     def add_to_queue(self, missions: List[FlowControlMission]) -> None:
         """
@@ -1,7 +1,10 @@
 import time
-from typing import Generic, List, Literal, Optional, TypeVar
+from typing import TYPE_CHECKING, Any, Dict, Generic, List, Literal, Optional, TypeVar
 from enum import Enum
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, NonNegativeInt, model_validator
+
+if TYPE_CHECKING:
+    from app.utils.ring_buffer import ReadingRingBuffer
 
 
 class SensorEnum(str, Enum):
@@ -21,6 +24,62 @@ class SensorReading(BaseModel):
     )
 
 
+class SensorBatchReading(SensorReading):
+    """Model for a sensor reading addressed to a specific sensor."""
+
+    sensor_id: int = Field(..., ge=0, examples=[0, 1, 2])
+
+
+class SensorReadingSeries(BaseModel):
+    """Columnar model for a series of readings of one sensor."""
+
+    timestamp_ns: List[int] = Field(
+        ...,
+        description="Timestamps of the readings in nanoseconds since Epoch",
+        examples=[[1730906908814683100, 1730906908914683100]],
+    )
+    value: List[float] = Field(..., examples=[[4.2, 4.3]])
+
+    @model_validator(mode="after")
+    def _validate_lengths(self):
+        if len(self.timestamp_ns) != len(self.value):
+            raise ValueError("All columns must have the same length")
+        return self
+
+
+class SensorReadingColumns(SensorReadingSeries):
+    """Columnar model for readings of one or more sensors."""
+
+    sensor_id: List[NonNegativeInt] = Field(..., examples=[[0, 1]])
+
+    @model_validator(mode="after")
+    def _validate_lengths(self):
+        if not len(self.sensor_id) == len(self.timestamp_ns) == len(self.value):
+            raise ValueError("All columns must have the same length")
+        return self
+
+    @classmethod
+    def from_readings(
+        cls, readings: List[SensorBatchReading]
+    ) -> "SensorReadingColumns":
+        """Build the columnar representation of a list of readings."""
+        return cls.model_construct(
+            sensor_id=[reading.sensor_id for reading in readings],
+            timestamp_ns=[reading.timestamp_ns for reading in readings],
+            value=[reading.value for reading in readings],
+        )
+
+
+class SensorReadingAck(BaseModel):
+    """Acknowledgement of a batch of readings received on the ingest WebSocket."""
+
+    seq: int = Field(..., description="Sequence number of the batch on the connection")
+    count: int = Field(..., description="Number of readings accepted from the batch")
+    errors: Optional[List[Dict[str, Any]]] = Field(
+        None, description="Validation errors if the batch was rejected"
+    )
+
+
 class Setpoint(BaseModel):
     setpoint: Optional[float] = None
 
@@ -65,3 +124,7 @@ class SensorRepository(Generic[T]):
     def post_setpoint(self, sensor_id: int, setpoint: Optional[float]) -> T:
         """Update the setpoint of a parameter"""
         raise NotImplementedError
+
+    def get_recent_readings(self, sensor_id: int) -> "ReadingRingBuffer":
+        """Retrieve the buffer of the most recent readings of a Sensor."""
+        raise NotImplementedError
@@ -0,0 +1,20 @@
+from enum import Enum
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class TopicAction(str, Enum):
+    """Enumeration of the control messages of the topic WebSocket."""
+
+    SUBSCRIBE = "subscribe"
+    UNSUBSCRIBE = "unsubscribe"
+
+
+class TopicControlMessage(BaseModel):
+    """Model describing a message sent by a client of the topic WebSocket."""
+
+    action: TopicAction = Field(
+        ..., description="Whether to subscribe to or unsubscribe from the topics"
+    )
+    topics: List[str] = Field(..., description="Names of the topics")
@@ -1,73 +1,102 @@
 # pylint: disable=E1136
 
-import asyncio
 import os
 import time
 import canopen
+from asyncio import AbstractEventLoop
+from functools import partial
 from canopen.pdo.base import PdoMap
-from typing import List
+from typing import Dict, List, Tuple, Union
 
 from fastapi import WebSocket
 
 from app.models.actuators import ActuatorRepository, ProportionalValve
+from app.models.info import ProportionalCommandStats
 from app.utils.logger import logger
 from app.utils.config import settings
+from app.utils.loop_bridge import LoopBridge
 from app.utils.websocket_manager import WebSocketManager
 from app.utils.influx_client import influx_connector
 
 
 class ProportionalActuator(ActuatorRepository):
     """
-    Represents a proportional actuator controlling a proportional valve in a CANopen network.
+    Represents proportional actuators controlling proportional valves in a CANopen network.
 
     This class manages the connection to a CANopen network, initializes the
-    actuator's state, retrieves its current position, and allows for control
-    of the valve's position via command messages.
+    actuators' states, retrieves their current positions, and allows for control
+    of the valves' positions via command messages. All valves share a single
+    network connection and notifier thread.
 
     Parameters
     ----------
     None: The constructor does not take any parameters, but connects to
-    a predefined CAN network and initializes the actuator.
+    a predefined CAN network and initializes the actuators listed in
+    `settings.PROPORTIONAL_CAN_NODE_IDS`.
 
     Attributes
     ----------
     count : int
-        The current count of actuators. Defaults to 1.
+        The number of actuators, one per configured node ID.
     network : canopen.Network
-        The CANopen network instance.
-    node : canopen.Node
-        The node representing the actuator in the network.
-    position : float
-        The current position of the valve, expressed in percentage.
-    position_command : canopen.PDO
-        The command object used to send position commands to the valve.
+        The CANopen network instance shared by all nodes.
+    nodes : List[canopen.RemoteNode]
+        The nodes representing the actuators in the network, indexed by actuator ID.
+    current_positions : List[float]
+        The current position of each valve, expressed in percentage.
+    position_commands : List[canopen.pdo.PdoVariable]
+        The command objects used to send position commands to the valves.
+    position_bridge : LoopBridge
+        Hands position samples from the CAN notifier thread to the event loop.
+    rpdo_mode : str
+        `event` sends a command as soon as it changes and repeats it every
+        `PROPORTIONAL_RPDO_HEARTBEAT_S` seconds, `periodic` sends it every
+        `PROPORTIONAL_RPDO_PERIOD_S` seconds.
+    last_command_latency_ns : int, optional
+        Time from the last transmitted command until it was handed to the CAN
+        bus. In `periodic` mode, commands to a single valve are sent by the
+        next periodic transmission, up to one period later. Their latency is
+        not measured, the period is reported as `rpdo_period_s` instead.
+    max_command_latency_ns : int, optional
+        Highest command latency measured since the start.
+    rpdo_period_s : float
+        The period of the RPDO transmission, the heartbeat in `event` mode.
+    command_count : int
+        Number of commands that changed at least one valve position.
 
     Methods
     -------
     get_all() -> List[ProportionalValve]:
         Retrieves a list of all connected ProportionalValve instances.
 
-    get_by_id(actuator_id: int = 1) -> ProportionalValve:
+    get_by_id(actuator_id: int = 0) -> ProportionalValve:
         Retrieves the ProportionalValve instance by its ID.
 
     set_state(request: ProportionalValve):
-        Sets the state of the valve based on the provided ProportionalValve request.
+        Sets the state of one valve, or of all valves if the ID is -1.
+
+    get_command_stats() -> ProportionalCommandStats:
+        Retrieves the number of commands, their measured latency and the
+        periodic transmission period.
 
     disconnect():
-        Disconnects the actuator from the CANopen network and sets the node to PRE-OPERATIONAL state.
+        Disconnects the actuators from the CANopen network and sets the nodes to PRE-OPERATIONAL state.
+
+    attach_event_loop(loop: AbstractEventLoop):
+        Sets the event loop on which received positions are broadcast and stored.
 
     Examples
     --------
     >>> actuator = ProportionalActuator()
-    >>> actuator.set_state(ProportionalValve(id=1, position=50.0))
-    >>> current_position = actuator.get_by_id()
-    >>> print(current_position.position)
+    >>> actuator.set_state(ProportionalValve(id=0, state=50.0))
+    >>> valve = actuator.get_by_id(0)
+    >>> print(valve.state)
     50.0
 
     Notes
     -----
     - Before using this class, ensure that the proper EDS file is available in the specified directory.
-    - This class currently supports initializing only one Bürkert MotorValve 3280.
+    - Every configured node must be a Bürkert MotorValve 3280 using the default PDO mapping.
 
     Warnings
     --------
@@ -81,11 +110,19 @@ class ProportionalActuator(ActuatorRepository):
     """
 
     def __init__(self):
-        self.count = 1  # Only the default setting for one Bürkert MotorValve 3280 is supported at the moment
+        node_ids = [
+            int(node_id) for node_id in settings.PROPORTIONAL_CAN_NODE_IDS.split(",")
+        ]
+        self.count = len(node_ids)
         self.item_type = ProportionalValve
 
-        self.current_position_websocket = WebSocketManager(count=self.count)
+        self.current_position_websocket = WebSocketManager(
+            count=self.count, conflate=True, max_rate_hz=settings.WEBSOCKET_MAX_RATE_HZ
+        )
         self.influx = influx_connector
+        self.position_bridge: LoopBridge[Tuple[int, float, int]] = LoopBridge(
+            self._on_positions
+        )
 
         current_file_directory = os.path.dirname(os.path.abspath(__file__))
         eds_file = os.path.join(
@@ -102,47 +139,110 @@ class ProportionalActuator(ActuatorRepository):
             bitrate=500000,
         )
 
-        # Add the node to the network
-        self.node = self.network.add_node(5, eds_file)
-        logger.debug(f"Initialized Node: {self.node.id}")
-        logger.debug(
-            f"Node {self.node.id} description: {self.node.sdo['Buerkert Device Description Object']['Device Name'].raw}"
+        self.nodes: List[canopen.RemoteNode] = []
+        self.current_positions: List[float] = []
+        self.position_commands = []
+        for index, node_id in enumerate(node_ids):
+            # Add the node to the network
+            node = self.network.add_node(node_id, eds_file)
+            logger.debug(f"Initialized Node: {node.id}")
+            logger.debug(
+                f"Node {node.id} description: {node.sdo['Buerkert Device Description Object']['Device Name'].raw}"
+            )
+
+            # get the initial position of the Valve
+            current_position: float = node.sdo["POS_Display.POS_Display"].phys
+
+            # Read the PDO object dictionaries
+            node.rpdo.read(from_od=True)
+            node.tpdo.read(from_od=True)
+
+            # Add callback for position TDPO, routed by the actuator ID
+            node.tpdo[2].add_callback(partial(self._on_position_received, index))
+
+            # Initialize the position command for RPDO transmission
+            position_command = node.rpdo[1]["CMDdigital.CMDdigital"]
+            # Clip to ensure within range
+            position_command.phys = max(0, min(100, current_position))
+
+            self.nodes.append(node)
+            self.current_positions.append(current_position)
+            self.position_commands.append(position_command)
+
+        # In event mode commands are sent on change, the periodic
+        # transmission only serves as a keep-alive for the valves
+        self.rpdo_mode = settings.PROPORTIONAL_RPDO_MODE
+        rpdo_period = (
+            settings.PROPORTIONAL_RPDO_HEARTBEAT_S
+            if self.rpdo_mode == "event"
+            else settings.PROPORTIONAL_RPDO_PERIOD_S
         )
+        self.rpdo_period_s = rpdo_period
+        self.last_command_latency_ns: Union[int, None] = None
+        self.max_command_latency_ns: Union[int, None] = None
+        self.command_count = 0
 
-        # get the initial position of the Valve
-        self.current_position: float = self.node.sdo["POS_Display.POS_Display"].phys
-
-        # Read the PDO object dictionaries
-        self.node.rpdo.read(from_od=True)
-        self.node.tpdo.read(from_od=True)
-
-        # Add callback for position TDPO
-        self.node.tpdo[2].add_callback(self._on_position_received)
-
-        # Initialize the position command for RPDO transmission
-        self.position_command = self.node.rpdo[1]["CMDdigital.CMDdigital"]
-        # Clip to ensure within range
-        self.position_command.phys = max(0, min(100, self.current_position))
-
-        # Activate the node
-        self.node.nmt.state = "OPERATIONAL"
-        logger.debug(f"Node {self.node.id} set OPERATIONAL")
-        self.node.rpdo[1].start(0.1)
+        # Activate the nodes
+        for node in self.nodes:
+            node.nmt.state = "OPERATIONAL"
+            logger.debug(f"Node {node.id} set OPERATIONAL")
+            node.rpdo[1].start(rpdo_period)
 
     def get_all(self) -> List[ProportionalValve]:
-        return [self.get_by_id()]
+        return [self.get_by_id(actuator_id) for actuator_id in range(self.count)]
+
+    def get_command_stats(self) -> ProportionalCommandStats:
+        return ProportionalCommandStats(
+            mode=f"CAN ({self.rpdo_mode} RPDO)",
+            commands=self.command_count,
+            last_command_latency_ns=self.last_command_latency_ns,
+            max_command_latency_ns=self.max_command_latency_ns,
+            rpdo_period_s=self.rpdo_period_s if self.rpdo_mode == "periodic" else None,
+        )
 
     def get_by_id(self, actuator_id: int = 0) -> ProportionalValve:
         return ProportionalValve(
             id=actuator_id,
-            state=float(self.position_command.phys),
-            current_position=self.current_position,
+            state=float(self.position_commands[actuator_id].phys),
+            current_position=self.current_positions[actuator_id],
         )
 
     def set_state(self, actuator: ProportionalValve):
-        # Assuming you set command using TPDO and RPDO data
-        self.position_command.phys = actuator.state
-        logger.debug(f"Proportional {actuator.id} set to {actuator.state}")
+        start_ns = time.perf_counter_ns()
+        actuator_ids = range(self.count) if actuator.id == -1 else [actuator.id]
+
+        # Update every command first, then put all RPDOs on the bus back to back.
+        # Setting the value also updates the data of the periodic transmission.
+        changed_ids = []
+        for actuator_id in actuator_ids:
+            position_command = self.position_commands[actuator_id]
+            if position_command.phys != actuator.state:
+                position_command.phys = actuator.state
+                changed_ids.append(actuator_id)
+
+        if not changed_ids:
+            return actuator
+        self.command_count += 1
+
+        # In periodic mode a single command waits for the next transmission,
+        # so only commands handed to the bus right away have a latency
+        if self.rpdo_mode == "periodic" and actuator.id != -1:
+            logger.debug(
+                f"Proportional {actuator.id} set to {actuator.state}, "
+                f"sent within {self.rpdo_period_s} s"
+            )
+            return actuator
+
+        for actuator_id in changed_ids:
+            self.nodes[actuator_id].rpdo[1].transmit()
+        self.last_command_latency_ns = time.perf_counter_ns() - start_ns
+        self.max_command_latency_ns = max(
+            self.max_command_latency_ns or 0, self.last_command_latency_ns
+        )
+        logger.debug(
+            f"Proportional {actuator.id} set to {actuator.state}, "
+            f"command latency {self.last_command_latency_ns / 1e3:.0f} µs"
+        )
 
         return actuator
 
@@ -156,33 +256,48 @@ class ProportionalActuator(ActuatorRepository):
 
     def disconnect(self):
         """
-        Disconnects the actuator from the CANopen network and
-        sets the node to PRE-OPERATIONAL state.
+        Disconnects the actuators from the CANopen network and
+        sets the nodes to PRE-OPERATIONAL state.
 
-        This method sets the actuator's node state to PRE-OPERATIONAL
-        and disconnects it from the CANopen network, ensuring that
-        all communication is halted and resources are released.
+        This method sets every node to PRE-OPERATIONAL and disconnects
+        from the CANopen network, ensuring that all communication is
+        halted and resources are released.
 
         Notes
         -----
-        Once disconnected, the node cannot send or receive messages
-        until it is re-initialized and reconnected to the network.
+        Once disconnected, the nodes cannot send or receive messages
+        until they are re-initialized and reconnected to the network.
         """
 
-        self.node.nmt.state = "PRE-OPERATIONAL"  # Deactivate the node
-        logger.info(f"Node {self.node.id} set PRE-OPERATIONAL")
+        for node in self.nodes:
+            node.rpdo[1].stop()
+            node.nmt.state = "PRE-OPERATIONAL"  # Deactivate the node
+            logger.info(f"Node {node.id} set PRE-OPERATIONAL")
         self.network.disconnect()
         logger.info("Disconnected from CANopen Network")
 
-    def _on_position_received(self, msg: PdoMap):
-        new_position = float(msg["POS_Display.POS_Display"].phys)
-        self.current_position = new_position
-        logger.debug(f"Valve position received: {self.current_position}")
-        asyncio.run(
-            self.current_position_websocket.broadcast(0, str(self.current_position))
-        )
-        self.influx.write_current_proportional_position(
-            proportional_id=0,
-            current_position=self.current_position,
-            timestamp_ns=time.time_ns(),
+    def attach_event_loop(self, loop: AbstractEventLoop):
+        self.position_bridge.attach(loop)
+
+    def _on_position_received(self, actuator_id: int, msg: PdoMap):
+        # Runs on the CAN notifier thread, keep it short and non-blocking
+        current_position = float(msg["POS_Display.POS_Display"].phys)
+        self.current_positions[actuator_id] = current_position
+        self.position_bridge.push((actuator_id, current_position, time.time_ns()))
+
+    def _on_positions(self, positions: List[Tuple[int, float, int]]):
+        """
+        Broadcasts the newest position of each valve and stores every sample in InfluxDB.
+
+        Runs on the event loop with all samples received since the last call.
+        """
+        newest_positions: Dict[int, float] = {}
+        for actuator_id, current_position, _ in positions:
+            newest_positions[actuator_id] = current_position
+
+        logger.debug(
+            f"Valve positions received: {newest_positions} ({len(positions)} samples)"
         )
+        for actuator_id, current_position in newest_positions.items():
+            self.current_position_websocket.publish(actuator_id, str(current_position))
+        self.influx.write_current_proportional_positions(positions)
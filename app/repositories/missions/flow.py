@@ -1,7 +1,10 @@
-from collections import deque
+from array import array
+from collections import defaultdict, deque
 from datetime import datetime
-from typing import List, Optional, Deque
+from typing import DefaultDict, Dict, List, Optional, Deque, Tuple
 import asyncio
+import contextlib
+import itertools
 
 from app.models.missions import (
     ClassifiedFlowControlMission,
@@ -10,9 +13,13 @@ from app.models.missions import (
     FlowControlMission,
 )
 from app.models.actuators import SolenoidValve
+from app.repositories.missions.journal import MissionJournal
 from app.services.actuators.solenoid import SolenoidService
+from app.services.missions.classifier import MissionClassifier
 from app.services.sensors.flowmeter import FlowmeterService
 from app.utils.config import settings
+from app.utils.flow_features import FlowFeatureAccumulator
+from app.utils.interpolation import interpolate
 from app.utils.logger import logger
 from app.utils.websocket_manager import WebSocketManager
 from app.utils.influx_client import influx_connector
@@ -21,7 +28,13 @@ from app.utils.influx_client import influx_connector
 class FlowMissionRepository(MissionRepository):
     """
     Implementation of MissionRepository for flow control missions.
-    Manages a queue of missions and handles their execution.
+    Manages a queue of missions per valve and handles their execution.
+
+    Every valve has its own lane with a queue and a task, so missions on
+    independent valves run concurrently. Before a mission starts, its lane
+    acquires the locks of every resource the mission uses: its valve and the
+    flowmeter controlling it. Missions sharing a flowmeter therefore still run
+    one after another. A mission for valve -1 uses every valve.
     """
 
     def __init__(
@@ -29,6 +42,9 @@ class FlowMissionRepository(MissionRepository):
         actuator_service: SolenoidService,
         sensor_service: FlowmeterService,
         flow_sensor_id: int,
+        flow_sensor_ids: Optional[List[int]] = None,
+        journal: Optional[MissionJournal] = None,
+        classifier: Optional[MissionClassifier] = None,
     ) -> None:
         """
         Initialize the FlowMissionRepository.
@@ -37,31 +53,63 @@ class FlowMissionRepository(MissionRepository):
             actuator_service: Service to control valves
             sensor_service: Service to control flow sensors
             flow_sensor_id: ID of the flow sensor to control
+            flow_sensor_ids: ID of the flow sensor controlling each valve, indexed
+                by valve ID. Valves without an entry use `flow_sensor_id`.
+            journal: Journal persisting the queue across restarts, if any
+            classifier: Classifier posting the last mission for every completed mission, if any
         """
         self.active = True
-        self.mission_queue: Deque[FlowControlMission] = deque()
-        self.current_mission: Optional[FlowControlMission] = None
-        self.mission_task: Optional[asyncio.Task] = None
+        self.lanes: Dict[int, Deque[Tuple[int, FlowControlMission]]] = {}
+        self.lane_tasks: Dict[int, asyncio.Task] = {}
+        self.current_missions: Dict[int, FlowControlMission] = {}
+        self.resource_locks: DefaultDict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
         self.solenoid_service = actuator_service
         self.flowmeter_service = sensor_service
         self.flow_sensor_id = flow_sensor_id
+        self.flow_sensor_ids = flow_sensor_ids or []
         self.last_mission: Optional[ClassifiedFlowControlMission] = None
+        self.point_lateness = array("d")
         self.completed_mission_ws = WebSocketManager()
         self.classified_mission_ws = WebSocketManager()
+        self.journal = journal
+        self.classifier = classifier
+        self._sequence = itertools.count(journal.next_id() if journal else 0)
+
+    def start(self) -> None:
+        if self.classifier is not None:
+            self.classifier.start(self.post_last_mission)
+        if self.journal is not None:
+            for sequence, mission in self.journal.replay():
+                self.lanes.setdefault(mission.valve_id, deque()).append(
+                    (sequence, mission)
+                )
+        for valve_id in self.lanes:
+            self._start_lane(valve_id)
+
+    def close(self) -> None:
+        if self.classifier is not None:
+            self.classifier.close()
+        if self.journal is not None:
+            self.journal.close()
 
     def add_to_queue(self, missions: List[FlowControlMission]) -> None:
-        for mission in missions:
-            logger.debug("Adding mission to queue")
-            self.mission_queue.append(mission)
-        if self.mission_task is None:
-            logger.debug("Starting to execute mission queue")
-            self.mission_task = asyncio.create_task(self._execute_next_mission())
+        entries = [(next(self._sequence), mission) for mission in missions]
+        if self.journal is not None:
+            self.journal.enqueue(entries)
+        for sequence, mission in entries:
+            logger.debug(f"Adding mission for valve {mission.valve_id} to queue")
+            lane = self.lanes.setdefault(mission.valve_id, deque())
+            lane.append((sequence, mission))
+            self._start_lane(mission.valve_id)
 
     def get_current_mission(self) -> Optional[FlowControlMission]:
-        return self.current_mission
+        # The mission running the longest
+        return next(iter(self.current_missions.values()), None)
 
     def get_next_mission(self) -> Optional[FlowControlMission]:
-        return self.mission_queue[0] if self.mission_queue else None
+        # The mission waiting the longest
+        heads = [lane[0] for lane in self.lanes.values() if lane]
+        return min(heads, key=lambda head: head[0])[1] if heads else None
 
     def get_last_mission(self) -> Optional[ClassifiedFlowControlMission]:
         return self.last_mission
@@ -71,7 +119,7 @@ class FlowMissionRepository(MissionRepository):
         await self.classified_mission_ws.broadcast(0, mission.model_dump_json())
 
     def get_queue_length(self) -> int:
-        return len(self.mission_queue)
+        return sum(len(lane) for lane in self.lanes.values())
 
     def get_active(self):
         return self.active
@@ -80,11 +128,14 @@ class FlowMissionRepository(MissionRepository):
         logger.debug(f"Setting Mission Repo active to {active}")
         self.active = active
 
-        if not active and self.mission_task:
-            self.mission_task.cancel()
-        elif active and self.mission_task is None:  # Only if no task is running
-            logger.debug("Starting new mission task")
-            self.mission_task = asyncio.create_task(self._execute_next_mission())
+        if not active:
+            # A cancelled task still holds its resources while it cleans up
+            for task in self.lane_tasks.values():
+                task.cancel()
+            self.lane_tasks.clear()
+        else:
+            for valve_id in self.lanes:
+                self._start_lane(valve_id)
 
         return self.active
 
@@ -96,64 +147,120 @@ class FlowMissionRepository(MissionRepository):
 
     async def connect_classified_mission_websocket(self, websocket):
         await self.classified_mission_ws.connect(0, websocket)
-        if self.last_mission:
-            await websocket.send_text(
-                self.last_mission.model_dump_json()
-            )
 
     def disconnect_classified_mission_websocket(self, websocket):
         self.classified_mission_ws.disconnect(0, websocket)
 
-    async def _execute_next_mission(self) -> None:
-        if not self.active or not self.mission_queue:
-            self.current_mission = None
-            self.mission_task = None
-            return
+    def _start_lane(self, valve_id: int) -> None:
+        # Only if active, the lane has missions and no task is running
+        if self.active and self.lanes.get(valve_id) and valve_id not in self.lane_tasks:
+            logger.debug(f"Starting mission task for valve {valve_id}")
+            self.lane_tasks[valve_id] = asyncio.create_task(self._run_lane(valve_id))
+
+    def _get_flow_sensor_id(self, valve_id: int) -> int:
+        if 0 <= valve_id < len(self.flow_sensor_ids):
+            return self.flow_sensor_ids[valve_id]
+        return self.flow_sensor_id
+
+    def _get_resources(self, valve_id: int) -> List[str]:
+        """
+        Returns the keys of the resource locks a mission for the valve needs,
+        sorted so that lanes always acquire them in the same order.
+        """
+        if valve_id == -1:
+            valve_ids = range(self.solenoid_service.actuator_repo.count)
+            flow_sensor_ids = {self._get_flow_sensor_id(i) for i in valve_ids}
+            flow_sensor_ids.add(self.flow_sensor_id)
+        else:
+            valve_ids = [valve_id]
+            flow_sensor_ids = {self._get_flow_sensor_id(valve_id)}
+
+        resources = [f"valve:{i}" for i in valve_ids]
+        resources += [f"flowmeter:{i}" for i in flow_sensor_ids]
+        return sorted(resources)
+
+    async def _run_lane(self, valve_id: int) -> None:
+        lane = self.lanes[valve_id]
         try:
-            while self.mission_queue and self.active:
-                self.current_mission = self.mission_queue.popleft()
-                await self._execute_mission(self.current_mission)
-                await asyncio.sleep(settings.MISSION_WAIT_SECONDS)
+            while lane and self.active:
+                async with contextlib.AsyncExitStack() as stack:
+                    for resource in self._get_resources(valve_id):
+                        await stack.enter_async_context(self.resource_locks[resource])
+
+                    # The mission stays queued until its resources are free
+                    if not lane or not self.active:
+                        break
+                    sequence, mission = lane.popleft()
+                    self.current_missions[sequence] = mission
+                    if self.journal is not None:
+                        self.journal.start(sequence)
+                    try:
+                        await self._execute_mission(mission)
+                    finally:
+                        del self.current_missions[sequence]
+                        if self.journal is not None:
+                            self.journal.complete(sequence)
+                    # Keep the resources while the lane waits for the next mission
+                    await asyncio.sleep(settings.MISSION_WAIT_SECONDS)
         except asyncio.CancelledError:
-            logger.info("Mission task cancelled")
-            self.current_mission = None
+            logger.info(f"Mission task for valve {valve_id} cancelled")
         except Exception as e:
-            logger.error("Error executing mission: %s", e)
-            self.current_mission = None
+            logger.error(f"Error executing mission: {e}")
         finally:
-            self.mission_task = None
-            self.current_mission = None
+            if self.lane_tasks.get(valve_id) is asyncio.current_task():
+                del self.lane_tasks[valve_id]
 
     async def _execute_mission(self, mission: FlowControlMission) -> None:
         """
         Execute a single flow control mission.
 
+        Every setpoint is applied at an absolute deadline on the monotonic
+        clock of the event loop, measured from the moment the mission starts.
+        Time spent opening the valve or posting a setpoint therefore delays
+        only the point it belongs to, and does not accumulate over the
+        mission. The lateness of each point is kept in `point_lateness`.
+        Interpolated setpoints are generated while the mission runs.
+
         Args:
             mission: The mission to execute
         """
-        logger.debug("Executing mission: %s", mission.model_dump_json(indent=2))
+        logger.debug(f"Executing mission: {mission.model_dump_json(indent=2)}")
+        flow_sensor_id = self._get_flow_sensor_id(mission.valve_id)
+        loop = asyncio.get_running_loop()
+        origin = loop.time()
+        start_ts = datetime.now()
+        point_lateness = array("d")
+        end_timing_error: Optional[float] = None
+
+        # Collect the classifier features from the readings of the flowmeter
+        accumulator = FlowFeatureAccumulator(mission.actual_start_time or start_ts)
+        self.flowmeter_service.add_reading_listener(flow_sensor_id, accumulator.add)
+
         # Open the valve
         valve = SolenoidValve(id=mission.valve_id, state=True)
         await self.solenoid_service.set_state(valve)
 
-        # Execute each trajectory point
-        start_ts = datetime.now()
         try:
-            previous_time = 0
-            for point in mission.flow_trajectory:
+            # The first point applies from the start of the mission, each
+            # following point from the time the previous one ends
+            deadline = origin
+            setpoints = interpolate(
+                mission.flow_trajectory, mission.interpolation, mission.sample_rate_hz
+            )
+            for point in setpoints:
+                await self._sleep_until(deadline)
+                point_lateness.append(loop.time() - deadline)
                 # Set new flow setpoint
                 await self.flowmeter_service.post_setpoint(
-                    self.flow_sensor_id, point.flow_rate
+                    flow_sensor_id, point.flow_rate
                 )
-                # Calculate wait time from previous point
-                wait_time = point.time - previous_time
-                if wait_time > 0:
-                    await asyncio.sleep(wait_time)
+                deadline = origin + point.time
 
-                previous_time = point.time
+            await self._sleep_until(deadline)
+            end_timing_error = loop.time() - deadline
 
             # Reset flow setpoint
-            await self.flowmeter_service.post_setpoint(self.flow_sensor_id, None)
+            await self.flowmeter_service.post_setpoint(flow_sensor_id, None)
 
             # Close the valve
             valve.state = False
@@ -162,17 +269,43 @@ class FlowMissionRepository(MissionRepository):
         except asyncio.CancelledError:
             logger.info("Current mission cancelled")
             # Optionally, reset or clean up
-            await self.flowmeter_service.post_setpoint(self.flow_sensor_id, None)
+            await self.flowmeter_service.post_setpoint(flow_sensor_id, None)
             valve.state = False
             await self.solenoid_service.set_state(valve)
 
         finally:
             end_ts = datetime.now()
+            self.flowmeter_service.remove_reading_listener(
+                flow_sensor_id, accumulator.add
+            )
+            self.point_lateness = point_lateness
             self.last_mission = CompletedFlowControlMission(
-                flow_control_mission=mission, start_ts=start_ts, end_ts=end_ts
+                flow_control_mission=mission,
+                start_ts=start_ts,
+                end_ts=end_ts,
+                start_timing_error_s=point_lateness[0] if point_lateness else None,
+                end_timing_error_s=end_timing_error,
+                max_timing_error_s=max(point_lateness) if point_lateness else None,
+                features=accumulator.features(),
+            )
+            logger.debug(
+                "Mission timing error: "
+                f"start {self.last_mission.start_timing_error_s} s, "
+                f"end {self.last_mission.end_timing_error_s} s, "
+                f"max {self.last_mission.max_timing_error_s} s"
             )
             await self.completed_mission_ws.broadcast(
-                0, self.last_mission.model_dump_json()
+                0, self.last_mission.model_dump_json(), retain=False
             )
             influx_connector.write_completed_flow_control_mission(self.last_mission)
-            self.current_mission = None
+            if self.classifier is not None:
+                self.classifier.submit(self.last_mission)
+
+    @staticmethod
+    async def _sleep_until(deadline: float) -> None:
+        """
+        Sleep until the event loop's monotonic clock reaches `deadline`.
+        """
+        delay = deadline - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
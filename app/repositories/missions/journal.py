@@ -0,0 +1,240 @@
+"""
+Mission Journal Module.
+
+This module defines the MissionJournal class which persists the flow mission
+queue in an append-only SQLite journal, so queued missions survive a restart
+of the backend.
+"""
+
+import sqlite3
+import time
+from array import array
+from datetime import time as time_of_day
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.models.missions import (
+    EndUseType,
+    FlowControlMission,
+    InterpolationMode,
+    Trajectory,
+)
+from app.utils.logger import logger
+
+# Completed missions are compacted after this many `complete` events
+COMPACT_INTERVAL = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS missions (
+    id INTEGER PRIMARY KEY,
+    valve_id INTEGER NOT NULL,
+    times BLOB NOT NULL,
+    flow_rates BLOB NOT NULL,
+    actual_end_use TEXT,
+    duration_scaling_factor INTEGER,
+    actual_start_time TEXT,
+    interpolation TEXT NOT NULL,
+    sample_rate_hz REAL
+);
+CREATE TABLE IF NOT EXISTS events (
+    mission_id INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    timestamp_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_mission ON events (mission_id, event);
+"""
+
+
+class MissionJournal:
+    """
+    Append-only journal of the flow mission queue backed by SQLite in WAL mode.
+
+    Every queued mission is stored once together with the events `enqueue`,
+    `start` and `complete`. Missions without a `complete` event, including
+    missions interrupted by a crash, are queued again by `replay`. Completed
+    missions are deleted when the journal is opened and after every
+    `COMPACT_INTERVAL` completions.
+
+    Parameters
+    ----------
+    path : str
+        The path of the SQLite database file.
+
+    Methods
+    -------
+    enqueue(missions)
+        Records missions added to the queue.
+    start(mission_id)
+        Records the start of a mission.
+    complete(mission_id)
+        Records the completion or cancellation of a mission.
+    replay() -> List[Tuple[int, FlowControlMission]]
+        Returns the missions still to be executed in queue order.
+    next_id() -> int
+        Returns the first free mission ID.
+    close()
+        Closes the database connection.
+
+    Notes
+    -----
+    The times and flow rates of a trajectory are stored as two blobs of native
+    float64 values, so the journal is only meant to be read on the machine
+    that wrote it. Replayed missions were validated when they were queued, so
+    they are rebuilt with `model_construct`, without validation.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # The journal is only used from the event loop thread
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._completed = 0
+        self._compact()
+
+    def enqueue(self, missions: Iterable[Tuple[int, FlowControlMission]]) -> None:
+        """
+        Record missions added to the queue in a single transaction.
+
+        Parameters
+        ----------
+        missions : Iterable[Tuple[int, FlowControlMission]]
+            The missions and the IDs they are queued with.
+        """
+        timestamp_ns = time.time_ns()
+        rows = [
+            (
+                mission_id,
+                mission.valve_id,
+                mission.flow_trajectory.times.tobytes(),
+                mission.flow_trajectory.flow_rates.tobytes(),
+                mission.actual_end_use.value if mission.actual_end_use else None,
+                mission.duration_scaling_factor,
+                (
+                    mission.actual_start_time.isoformat()
+                    if mission.actual_start_time
+                    else None
+                ),
+                mission.interpolation.value,
+                mission.sample_rate_hz,
+            )
+            for mission_id, mission in missions
+        ]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO missions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.connection.executemany(
+                "INSERT INTO events VALUES (?, 'enqueue', ?)",
+                [(row[0], timestamp_ns) for row in rows],
+            )
+
+    def start(self, mission_id: int) -> None:
+        """
+        Record the start of a mission.
+        """
+        self._append(mission_id, "start")
+
+    def complete(self, mission_id: int) -> None:
+        """
+        Record the completion or cancellation of a mission.
+        """
+        self._append(mission_id, "complete")
+        self._completed += 1
+        if self._completed >= COMPACT_INTERVAL:
+            self._compact()
+
+    def replay(self) -> List[Tuple[int, FlowControlMission]]:
+        """
+        Return the missions without a `complete` event in queue order.
+
+        Returns
+        -------
+        List[Tuple[int, FlowControlMission]]
+            The missions still to be executed and their IDs.
+        """
+        rows = self.connection.execute(
+            """
+            SELECT * FROM missions WHERE id NOT IN (
+                SELECT mission_id FROM events WHERE event = 'complete'
+            ) ORDER BY id
+            """
+        )
+        to_mission = self._mission_factory()
+        missions = [(row[0], to_mission(row)) for row in rows]
+        logger.info(f"Replayed {len(missions)} missions from {self.path}")
+        return missions
+
+    def next_id(self) -> int:
+        """
+        Return the first mission ID not used in the journal.
+        """
+        (last_id,) = self.connection.execute("SELECT MAX(id) FROM missions").fetchone()
+        return 0 if last_id is None else last_id + 1
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        self.connection.close()
+
+    def _append(self, mission_id: int, event: str):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO events VALUES (?, ?, ?)",
+                (mission_id, event, time.time_ns()),
+            )
+
+    def _compact(self):
+        # Completed missions are never replayed, drop them.
+        # The highest ID is kept so that IDs are not reused.
+        self._completed = 0
+        with self.connection:
+            self.connection.execute(
+                """
+                DELETE FROM missions WHERE id < (SELECT MAX(id) FROM missions)
+                AND id IN (SELECT mission_id FROM events WHERE event = 'complete')
+                """
+            )
+            self.connection.execute(
+                "DELETE FROM events WHERE mission_id NOT IN (SELECT id FROM missions)"
+            )
+
+    @staticmethod
+    def _mission_factory():
+        # Enum members and start times repeat across missions, look them up once
+        end_uses: Dict[Any, Any] = {None: None}
+        end_uses.update(EndUseType._value2member_map_)
+        interpolations = InterpolationMode._value2member_map_
+        start_times: Dict[Any, Any] = {None: None}
+        construct = FlowControlMission.model_construct
+
+        def to_mission(row) -> FlowControlMission:
+            (
+                _,
+                valve_id,
+                times,
+                flow_rates,
+                end_use,
+                scaling_factor,
+                start_time,
+                interpolation,
+                sample_rate_hz,
+            ) = row
+            if start_time not in start_times:
+                start_times[start_time] = time_of_day.fromisoformat(start_time)
+            times_array, flow_rates_array = array("d"), array("d")
+            times_array.frombytes(times)
+            flow_rates_array.frombytes(flow_rates)
+
+            return construct(
+                valve_id=valve_id,
+                flow_trajectory=Trajectory(times_array, flow_rates_array),
+                actual_end_use=end_uses[end_use],
+                duration_scaling_factor=scaling_factor,
+                actual_start_time=start_times[start_time],
+                interpolation=interpolations[interpolation],
+                sample_rate_hz=sample_rate_hz,
+            )
+
+        return to_mission
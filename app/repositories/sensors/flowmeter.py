@@ -2,6 +2,7 @@ from typing import List
 from app.models.sensors import Flowmeter, SensorReading, SensorRepository
 from app.utils.logger import logger
 from app.utils.config import settings
+from app.utils.ring_buffer import ReadingRingBuffer
 
 
 class FlowmeterSensor(SensorRepository[Flowmeter]):
@@ -18,6 +19,8 @@ class FlowmeterSensor(SensorRepository[Flowmeter]):
         Type of sensor. Initialized to Flowmeter.
     flowmeters : List[Flowmeter]
         List containing flowmeter sensors, initialized with one `Flowmeter` object with `id=0`.
+    recent_readings : List[ReadingRingBuffer]
+        The last `SENSOR_HISTORY_CAPACITY` readings of every flowmeter.
 
     Methods
     -------
@@ -29,11 +32,18 @@ class FlowmeterSensor(SensorRepository[Flowmeter]):
 
     patch_reading(sensor_id: int, reading: SensorReading)
         Update the current reading of a specified flowmeter sensor by its ID.
+
+    get_recent_readings(sensor_id: int)
+        Retrieve the buffer of the most recent readings of a flowmeter sensor.
     """
 
     def __init__(self):
         self.flowmeters = [Flowmeter(id=i) for i in range(settings.FLOWMETER_COUNT)]
         self.count = len(self.flowmeters)
+        self.recent_readings = [
+            ReadingRingBuffer(settings.SENSOR_HISTORY_CAPACITY)
+            for _ in range(self.count)
+        ]
 
     def get_all(self) -> List[Flowmeter]:
         flowmeters = self.flowmeters
@@ -49,10 +59,14 @@ class FlowmeterSensor(SensorRepository[Flowmeter]):
 
     def post_reading(self, sensor_id: int, reading: SensorReading) -> Flowmeter:
         self.flowmeters[sensor_id].current_reading = reading
+        self.recent_readings[sensor_id].append(reading.timestamp_ns, reading.value)
         logger.debug("Flowmeter %d reading patched: %s", sensor_id, reading)
 
         return self.flowmeters[sensor_id]
 
+    def get_recent_readings(self, sensor_id: int) -> ReadingRingBuffer:
+        return self.recent_readings[sensor_id]
+
     def post_setpoint(self, sensor_id, setpoint):
         self.flowmeters[sensor_id].setpoint = setpoint
         logger.debug("Flowmeter %d setpoint patched: %s", sensor_id, setpoint)
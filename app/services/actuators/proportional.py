@@ -1,7 +1,10 @@
+from asyncio import AbstractEventLoop
 from fastapi import WebSocket
 from app.models.actuators import ProportionalValve
+from app.models.info import ProportionalCommandStats
 from app.services.actuators.service import ActuatorService
 from app.utils.config import settings
+from app.utils.websocket_manager import Frame
 
 
 match settings.PROPORTIONAL_MODE:
@@ -26,10 +29,41 @@ class ProportionalService(ActuatorService[ProportionalValve]):
     def __init__(self):
         actuator_repository = ProportionalActuator()
         super().__init__(actuator_repository, ProportionalValve)
+        if settings.PROPORTIONAL_MODE == "CAN":
+            # Received positions are part of the state returned by get_all
+            self.actuator_repo.current_position_websocket.add_listener(
+                self._on_current_position
+            )
 
     def disconnect(self) -> None:
         self.actuator_repo.disconnect()
 
+    def get_command_stats(self) -> ProportionalCommandStats:
+        """
+        Retrieve the number of position commands and their measured latency.
+
+        The latency is only measured for valves driven over CAN.
+        """
+        if settings.PROPORTIONAL_MODE == "CAN":
+            return self.actuator_repo.get_command_stats()
+        return ProportionalCommandStats(
+            mode=settings.PROPORTIONAL_MODE,
+            commands=0,
+            last_command_latency_ns=None,
+            max_command_latency_ns=None,
+            rpdo_period_s=None,
+        )
+
+    def _on_current_position(self, index: int, frame: Frame) -> None:
+        self.state_version += 1
+
+    def attach_event_loop(self, loop: AbstractEventLoop) -> None:
+        """
+        Attach the running event loop, on which position updates received on the
+        CAN notifier thread are processed.
+        """
+        self.actuator_repo.attach_event_loop(loop)
+
     async def connect_current_position_websocket(
         self, ws_id: int, websocket: WebSocket
     ) -> None:
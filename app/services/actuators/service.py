@@ -1,7 +1,6 @@
-import asyncio
 import json
 import time
-from typing import Generic, List, TypeVar
+from typing import Generic, List, Optional, TypeVar
 from fastapi import HTTPException, WebSocket
 
 from app.models.actuators import (
@@ -31,12 +30,22 @@ class ActuatorService(Generic[T]):
         self.actuator_repo = actuator_repo
         self.item_type = item_type
 
-        self.websocket_manager = WebSocketManager(self.actuator_repo.count)
+        self.websocket_manager = WebSocketManager(
+            self.actuator_repo.count,
+            snapshot=lambda index: json.dumps(self.get_by_id(index).state),
+        )
+        self.all_websocket_manager = WebSocketManager(
+            snapshot=lambda _: json.dumps(self.states)
+        )
         self.database = influx_connector
+        # Incremented whenever the state of an actuator changes
+        self.state_version = 0
 
         # Write initial states to Database
         initial_actuators = self.actuator_repo.get_all()
         self._write_actuators_to_db(initial_actuators)
+        # States of all actuators indexed by ID, updated in place by set_state
+        self.states = [actuator.state for actuator in initial_actuators]
 
     def get_all(self) -> List[T]:
         """
@@ -86,7 +95,11 @@ class ActuatorService(Generic[T]):
           all instances of the Actuator will be set to the corresponding state.
         - updates InfluxDB with the actuator's new state and broadcasts
         the new state to connected clients via WebSocket.
-        - The current timestamp (in nanoseconds) is used for InfluxDB updates.
+        - The current timestamp (in nanoseconds) is used for InfluxDB updates,
+        all actuators set at once are written in one batch with the same timestamp.
+        - The states of all actuators are broadcast as one frame to the clients
+        of the all actuators WebSocket. Setting a single actuator only updates
+        its entry of the cached `states`, without retrieving all actuators.
 
         See Also
         --------
@@ -94,7 +107,7 @@ class ActuatorService(Generic[T]):
         actuator_repo.set_state : Updates the actuator's state in the repository.
         influx.write_actuator : Writes actuator data to InfluxDB.
         websocket_manager.broadcast : Broadcasts a message to connected clients.
-        _broadcast_all_actuators : Broadcasts the state of all actuators.
+        _broadcast_actuators_states : Broadcasts the state of all actuators.
 
         Raises
         ------
@@ -103,18 +116,20 @@ class ActuatorService(Generic[T]):
         """
         self._validate_actuator_id(actuator)
         self.actuator_repo.set_state(actuator)
+        self.state_version += 1
         timestamp_ns = time.time_ns()
 
         if actuator.id == -1:
             all_actuators = self.actuator_repo.get_all()
-            broadcast_coroutine = self._broadcast_actuators_states(all_actuators)
             self._write_actuators_to_db(all_actuators, timestamp_ns)
-            await broadcast_coroutine
+            await self._broadcast_actuators_states(all_actuators)
         else:
             self.database.write_actuator(actuator, timestamp_ns)
             await self.websocket_manager.broadcast(
                 actuator.id, json.dumps(actuator.state)
             )
+            self.states[actuator.id] = actuator.state
+            await self.all_websocket_manager.broadcast(0, json.dumps(self.states))
 
         return actuator
 
@@ -141,19 +156,17 @@ class ActuatorService(Generic[T]):
         -----
         This method is responsible for initializing the WebSocket connection and
         immediately sending the current state of the actuator to the connected client.
-        The state is retrieved using the `get_by_id` method.
+        The state is the frame retained from the last broadcast; it is only
+        retrieved using the `get_by_id` method, by the snapshot of the manager,
+        if nothing was broadcast yet.
 
         See Also
         --------
         disconnect_websocket : Disconnect the WebSocket connection.
         get_by_id : Retrieve an actuator by its unique identifier.
         """
-
         await self.websocket_manager.connect(actuator_id, websocket)
 
-        current_state = self.get_by_id(actuator_id).state
-        await websocket.send_text(json.dumps(current_state))
-
     def disconnect_websocket(self, actuator_id: int, websocket: WebSocket):
         """
         Disconnect a WebSocket connection for an actuator.
@@ -184,6 +197,31 @@ class ActuatorService(Generic[T]):
         """
         self.websocket_manager.disconnect(actuator_id, websocket)
 
+    async def connect_all_websocket(self, websocket: WebSocket):
+        """
+        Establish a WebSocket connection for the states of all actuators.
+
+        Every message is a JSON list of the states of all actuators, indexed by
+        their ID. The current states are sent when the connection is established.
+
+        Parameters
+        ----------
+        websocket : WebSocket
+            The WebSocket object to establish the connection with.
+        """
+        await self.all_websocket_manager.connect(0, websocket)
+
+    def disconnect_all_websocket(self, websocket: WebSocket):
+        """
+        Disconnect a WebSocket connection for the states of all actuators.
+
+        Parameters
+        ----------
+        websocket : WebSocket
+            The WebSocket object to disconnect.
+        """
+        self.all_websocket_manager.disconnect(0, websocket)
+
     def disconnect(self) -> None:
         """Disconnect from the service.
 
@@ -207,12 +245,14 @@ class ActuatorService(Generic[T]):
 
         Summary
         -------
-        This method fetches all actuator states and broadcasts them asynchronously
-        to all connected WebSocket clients.
+        This method sends the state of every actuator to the clients of that
+        actuator, and all states as a single frame to the clients of the all
+        actuators WebSocket.
 
         Parameters
         ----------
-        None
+        actuators : List[Actuator]
+            All actuators of the service.
 
         Returns
         -------
@@ -227,30 +267,30 @@ class ActuatorService(Generic[T]):
         --------
         For internal use within the service.
         """
-        tasks = []
-
         for actuator in actuators:
-            broadcast_task = self.websocket_manager.broadcast(
+            await self.websocket_manager.broadcast(
                 index=actuator.id, message=json.dumps(actuator.state)
             )
-            tasks.append(broadcast_task)
-
-        await asyncio.gather(*tasks)
+        self.states = [actuator.state for actuator in actuators]
+        await self.all_websocket_manager.broadcast(0, json.dumps(self.states))
 
     def _write_actuators_to_db(
-        self, actuators: List[Actuator], timestamp_ns: int = time.time_ns()
+        self, actuators: List[Actuator], timestamp_ns: Optional[int] = None
     ):
         """
         Write the current state of all actuators to the InfluxDB.
 
         Summary
         -------
-        This method updates the InfluxDB with the current state of all actuators,
-        applying a uniform timestamp for synchronization.
+        This method updates the InfluxDB with the current state of all actuators
+        in a single batch, applying a uniform timestamp for synchronization.
 
         Parameters
         ----------
-        None
+        actuators : List[Actuator]
+            The actuators to write.
+        timestamp_ns : int, optional
+            The timestamp of all points, the current time if omitted.
 
         Returns
         -------
@@ -259,15 +299,13 @@ class ActuatorService(Generic[T]):
         See Also
         --------
         get_all : Retrieve a list of all actuators.
-        influx.write_actuator : Write actuator data to InfluxDB.
+        influx.write_actuators : Write actuator data to InfluxDB.
 
         Warnings
         --------
         For internal use within the service.
         """
-
-        for actuator in actuators:
-            self.database.write_actuator(actuator=actuator, timestamp_ns=timestamp_ns)
+        self.database.write_actuators(actuators, timestamp_ns)
 
     def _validate_actuator_id(self, actuator: T):
         """
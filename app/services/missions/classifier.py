@@ -0,0 +1,126 @@
+import asyncio
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional
+
+from app.models.missions import (
+    ClassifiedFlowControlMission,
+    CompletedFlowControlMission,
+    EndUseType,
+)
+from app.utils.logger import logger
+
+FEATURE_NAMES = ["Volume", "Mean", "Peak", "Duration", "Hour"]
+
+
+class MissionClassifier:
+    """
+    In-process classification of completed flow control missions.
+
+    Loads a serialized model once and predicts the end use of completed
+    missions from their measured features. Missions completed while a
+    prediction runs are collected and classified together in the next batch.
+    Inference runs in a worker thread so the event loop keeps serving requests.
+    `close` stops the task and the worker thread when the application shuts down.
+
+    Args:
+        model_path (str): Path of a pickled model with a scikit-learn style
+            `predict` method. It is called with a list of feature rows
+            ordered as `FEATURE_NAMES` and returns one `EndUseType` value per row.
+            Only load files from a trusted source, unpickling runs arbitrary code.
+        batch_size (int, optional): Maximum number of missions per prediction. Defaults to 32.
+    """
+
+    def __init__(self, model_path: str, batch_size: int = 32) -> None:
+        with open(model_path, "rb") as model_file:
+            self.model: Any = pickle.load(model_file)
+        logger.info(f"Loaded mission classifier from {model_path}")
+
+        self.batch_size = batch_size
+        self.pending: asyncio.Queue[CompletedFlowControlMission] = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="mission-classifier"
+        )
+        self.task: Optional[asyncio.Task] = None
+        self._on_classified: Optional[
+            Callable[[ClassifiedFlowControlMission], Awaitable[None]]
+        ] = None
+
+    def start(
+        self, on_classified: Callable[[ClassifiedFlowControlMission], Awaitable[None]]
+    ) -> None:
+        """
+        Start classifying submitted missions on the running event loop.
+
+        Args:
+            on_classified (Callable): Awaited with every classified mission.
+        """
+        self._on_classified = on_classified
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def submit(self, mission: CompletedFlowControlMission) -> None:
+        """
+        Queue a completed mission for classification.
+
+        Cancelled missions and missions without measured features are skipped,
+        their partial flow does not describe an end use.
+
+        Args:
+            mission (CompletedFlowControlMission): The completed mission.
+        """
+        # The end timing error is only unknown if the mission was cancelled
+        if mission.end_timing_error_s is None:
+            logger.debug("Skipping classification of a cancelled mission")
+            return
+        if mission.features is None:
+            logger.debug("Skipping classification of a mission without features")
+            return
+        self.pending.put_nowait(mission)
+
+    def close(self) -> None:
+        """
+        Stop classifying and shut down the worker thread.
+
+        Missions still waiting for classification are discarded.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Mission classifier closed")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.pending.get()]
+            while len(batch) < self.batch_size and not self.pending.empty():
+                batch.append(self.pending.get_nowait())
+
+            rows = [
+                [getattr(mission.features, name) for name in FEATURE_NAMES]
+                for mission in batch
+            ]
+            try:
+                predictions = await loop.run_in_executor(
+                    self.executor, self._predict, rows
+                )
+                classified = [
+                    ClassifiedFlowControlMission.model_construct(
+                        **dict(mission), predicted_end_use=EndUseType(prediction)
+                    )
+                    for mission, prediction in zip(batch, predictions)
+                ]
+            except Exception as e:
+                logger.error(f"Failed to classify {len(batch)} missions: {e}")
+                continue
+
+            logger.debug(f"Classified {len(classified)} missions")
+            for mission in classified:
+                try:
+                    await self._on_classified(mission)
+                except Exception as e:
+                    logger.error(f"Failed to post a classified mission: {e}")
+
+    def _predict(self, rows: List[List[float]]) -> List[Any]:
+        return list(self.model.predict(rows))
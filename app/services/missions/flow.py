@@ -13,6 +13,12 @@ class FlowMissionService:
         self.mission_repo = mission_repo
         self.database = influx_connector
 
+    def start(self) -> None:
+        self.mission_repo.start()
+
+    def close(self) -> None:
+        self.mission_repo.close()
+
     def add_to_queue(self, mission: List[FlowControlMission]) -> None:
         self.mission_repo.add_to_queue(mission)
 
@@ -1,13 +1,29 @@
+import asyncio
 import json
-from typing import Generic, List, Optional, TypeVar
-from fastapi import WebSocket
-
-from app.models.sensors import Sensor, SensorReading, SensorRepository
-from app.utils.websocket_manager import WebSocketManager
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+from fastapi import HTTPException, WebSocket
+
+from app.models.errors import ValidationError
+from app.models.sensors import (
+    Sensor,
+    SensorReading,
+    SensorReadingColumns,
+    SensorReadingSeries,
+    SensorRepository,
+)
+from app.utils.config import settings
+from app.utils.websocket_manager import Frame, WebSocketManager
 from app.utils.influx_client import influx_connector
+from app.utils.logger import logger
+from app.utils.lru_cache import LRUCache
 
 T = TypeVar("T", bound=Sensor)
 
+# Maximum number of windows returned by a single history query
+HISTORY_MAX_WINDOWS = 10000
+
 
 class SensorService(Generic[T]):
     """
@@ -24,9 +40,25 @@ class SensorService(Generic[T]):
     def __init__(self, sensor: SensorRepository[T]) -> None:
         self.sensor = sensor
         self.item_type = T
-        self.reading_ws = WebSocketManager(self.sensor.count)
-        self.setpoint_ws = WebSocketManager(self.sensor.count)
+        self.reading_ws = WebSocketManager(
+            self.sensor.count,
+            conflate=True,
+            max_rate_hz=settings.WEBSOCKET_MAX_RATE_HZ,
+            snapshot=self._render_current_reading,
+        )
+        self.setpoint_ws = WebSocketManager(
+            self.sensor.count,
+            snapshot=lambda index: json.dumps(self.get_by_id(index).setpoint),
+        )
         self.influx = influx_connector
+        # Incremented whenever the reading or setpoint of a sensor changes
+        self.state_version = 0
+        self.history_cache: LRUCache[SensorReadingSeries] = LRUCache(
+            settings.INFLUXDB_QUERY_CACHE_SIZE
+        )
+        self.reading_listeners: List[List[Callable[[int, float], None]]] = [
+            [] for _ in range(self.sensor.count)
+        ]
 
     def get_all(self) -> List[T]:
         """
@@ -61,20 +93,162 @@ class SensorService(Generic[T]):
             T: The updated sensor.
         """
         sensor = self.sensor.post_reading(sensor_id, reading)
+        self.state_version += 1
 
+        for listener in self.reading_listeners[sensor_id]:
+            listener(reading.timestamp_ns, reading.value)
         self.influx.write_sensor(sensor)
         await self.reading_ws.broadcast(sensor_id, reading.model_dump_json())
 
         return sensor
 
-    async def connect_reading_ws(self, sensor_id: int, websocket: WebSocket):
+    async def post_readings(self, readings: SensorReadingColumns) -> List[T]:
+        """
+        Post a batch of readings for one or more sensors.
+
+        Summary
+        -------
+        Updates every addressed sensor with its newest reading, writes all
+        readings to InfluxDB in a single batch and sends one WebSocket frame per
+        sensor to its subscribers.
+
+        Parameters
+        ----------
+        readings : SensorReadingColumns
+            Columnar batch of readings, each addressed by its sensor ID.
+
+        Returns
+        -------
+        List[T]
+            The updated sensors, in order of their first appearance in the batch.
+
+        Notes
+        -----
+        A sensor keeps its current reading if it is newer than every reading of
+        the batch. The readings of a sensor are handled in timestamp order, with
+        readings of equal timestamps kept in the order of the batch, so the
+        last of them becomes the current reading. The WebSocket frame of a
+        sensor contains a single reading object if the batch holds one reading
+        for it, and a list of reading objects in that order otherwise.
+
+        Raises
+        ------
+        HTTPException
+            If a sensor ID is out of range (handled within _validate_sensor_ids).
+        """
+        self._validate_sensor_ids(readings.sensor_id)
+
+        grouped: Dict[int, List[Tuple[int, float]]] = {}
+        for sensor_id, timestamp_ns, value in zip(
+            readings.sensor_id, readings.timestamp_ns, readings.value
+        ):
+            grouped.setdefault(sensor_id, []).append((timestamp_ns, value))
+
+        sensors = []
+        updated = set()
+        written = []
+        for sensor_id, ordered in grouped.items():
+            # Stable sort, so the last of several equal timestamps is the newest
+            ordered.sort(key=lambda reading: reading[0])
+            newest_ns, newest_value = ordered[-1]
+            # The newest reading is buffered by post_reading, and the buffer
+            # only keeps the last of several readings with equal timestamps
+            recent_readings = self.sensor.get_recent_readings(sensor_id)
+            for (timestamp_ns, value), (next_ns, _) in zip(ordered, ordered[1:]):
+                if timestamp_ns < next_ns:
+                    recent_readings.append(timestamp_ns, value)
+
+            current_reading = self.get_by_id(sensor_id).current_reading
+            if current_reading is None or current_reading.timestamp_ns <= newest_ns:
+                sensor = self.sensor.post_reading(
+                    sensor_id,
+                    SensorReading(value=newest_value, timestamp_ns=newest_ns),
+                )
+                updated.add(sensor_id)
+                self.state_version += 1
+            else:
+                sensor = self.get_by_id(sensor_id)
+            sensors.append(sensor)
+
+            for listener in self.reading_listeners[sensor_id]:
+                for timestamp_ns, value in ordered:
+                    listener(timestamp_ns, value)
+
+            timestamps, values = zip(*ordered)
+            written.append(
+                (
+                    sensor,
+                    SensorReadingSeries.model_construct(
+                        timestamp_ns=list(timestamps), value=list(values)
+                    ),
+                )
+            )
+
+        self.influx.write_sensor_readings(written)
+
+        for sensor_id, ordered in grouped.items():
+            if len(ordered) == 1:
+                await self.reading_ws.broadcast(
+                    sensor_id,
+                    self._encode_readings(ordered),
+                    retain=sensor_id in updated,
+                )
+                continue
+
+            await self.reading_ws.broadcast(
+                sensor_id, self._encode_readings(ordered), retain=False
+            )
+            if sensor_id in updated:
+                self.reading_ws.retain(
+                    sensor_id,
+                    self.get_by_id(sensor_id).current_reading.model_dump_json(),
+                )
+
+        return sensors
+
+    def add_reading_listener(
+        self, sensor_id: int, listener: Callable[[int, float], None]
+    ) -> None:
+        """
+        Register a callback for every reading posted for a sensor.
+
+        Args:
+            sensor_id (int): The ID of the sensor.
+            listener (Callable[[int, float], None]): Called with the timestamp in
+                nanoseconds and the value of each reading, in timestamp order
+                within a batch. It runs on the event loop and must not block.
+        """
+        self.reading_listeners[sensor_id].append(listener)
+
+    def remove_reading_listener(
+        self, sensor_id: int, listener: Callable[[int, float], None]
+    ) -> None:
+        """
+        Remove a callback registered with `add_reading_listener`, if present.
+
+        Args:
+            sensor_id (int): The ID of the sensor.
+            listener (Callable[[int, float], None]): The callback to remove.
+        """
+        if listener in self.reading_listeners[sensor_id]:
+            self.reading_listeners[sensor_id].remove(listener)
+
+    async def connect_reading_ws(
+        self,
+        sensor_id: int,
+        websocket: WebSocket,
+        since_ns: Optional[int] = None,
+        last_n: Optional[int] = None,
+    ):
         """
         Establish a WebSocket connection for a sensor and send its current reading.
 
         **Summary**
         ----------
         Initialize a WebSocket connection for a specified sensor, immediately
-        transmitting its current reading to the client as a JSON message.
+        transmitting its current reading to the client as a JSON message. If a
+        backfill is requested, the buffered recent readings are sent instead as
+        one binary frame in the packed format of `ReadingRingBuffer.pack`.
 
         **Parameters**
         ----------
@@ -82,12 +256,20 @@ class SensorService(Generic[T]):
             Unique identifier of the sensor to connect.
         websocket : WebSocket
             WebSocket object to establish the connection with.
+        since_ns : int, optional
+            Backfill the buffered readings at or after this timestamp.
+        last_n : int, optional
+            Backfill the newest `last_n` buffered readings.
 
         **Notes**
         -----
         * This method assumes the sensor ID is valid and the WebSocket is usable.
         * The initial message sent to the client contains the sensor's current
-        reading in JSON format (via `model_dump_json`).
+        reading in JSON format, as retained by the manager when it was posted.
+        It is only serialized, by the snapshot of the manager, if no reading
+        was broadcast yet.
+        * The backfill is taken when the connection is registered, so live
+        readings follow it without a gap.
 
         **See Also**
         --------
@@ -95,11 +277,18 @@ class SensorService(Generic[T]):
         * `broadcast_reading` : Transmit a reading to all connected WebSockets.
         * `reading_ws.connect` : Underlying WebSocket connection establishment.
         """
-        await self.reading_ws.connect(sensor_id, websocket)
+        if since_ns is not None or last_n is not None:
+            recent_readings = self.sensor.get_recent_readings(sensor_id)
+            await self.reading_ws.connect(
+                sensor_id,
+                websocket,
+                initial=lambda: Frame(
+                    recent_readings.pack(since_ns, last_n), binary=True
+                ),
+            )
+            return
 
-        current_reading = self.get_by_id(sensor_id).current_reading
-        if current_reading:
-            await websocket.send_text(current_reading.model_dump_json())
+        await self.reading_ws.connect(sensor_id, websocket)
 
     def disconnect_reading_ws(self, sensor_id: int, websocket: WebSocket):
         """
@@ -161,6 +350,7 @@ class SensorService(Generic[T]):
             setpoint = float(setpoint)
 
         sensor = self.sensor.post_setpoint(sensor_id, setpoint)
+        self.state_version += 1
 
         self.influx.write_sensor(sensor)
         await self.setpoint_ws.broadcast(sensor_id, json.dumps(setpoint))
@@ -194,10 +384,7 @@ class SensorService(Generic[T]):
         * `disconnect_setpoint_ws` : Disconnect the WebSocket connection.
         * `setpoint_ws.connect` : Underlying connection establishment method.
         """
-
         await self.setpoint_ws.connect(sensor_id, websocket)
-        setpoint = self.get_by_id(sensor_id).setpoint
-        await websocket.send_text(json.dumps(setpoint))
 
     def disconnect_setpoint_ws(self, sensor_id: int, websocket: WebSocket):
         """
@@ -216,3 +403,172 @@ class SensorService(Generic[T]):
         * `setpoint_ws.disconnect` : Underlying disconnection method.
         """
         self.setpoint_ws.disconnect(sensor_id, websocket)
+
+    def _render_current_reading(self, sensor_id: int) -> Optional[str]:
+        """
+        Render the current reading of a sensor as JSON, None if it has none.
+        """
+        current_reading = self.get_by_id(sensor_id).current_reading
+        return current_reading.model_dump_json() if current_reading else None
+
+    def _validate_sensor_ids(self, sensor_ids: List[int]):
+        """
+        Validate the sensor IDs of a batch of readings.
+
+        Args:
+            sensor_ids (List[int]): The sensor IDs to validate.
+
+        Raises:
+            HTTPException: If a sensor ID is out of range.
+        """
+        for index, sensor_id in enumerate(sensor_ids):
+            if sensor_id >= self.sensor.count:
+                raise HTTPException(
+                    status_code=422,
+                    detail=[
+                        ValidationError(
+                            loc=["body", "sensor_id", index],
+                            msg=f"Input must be lower than {self.sensor.count}",
+                            type="lower_than",
+                            input=sensor_id,
+                        ).model_dump()
+                    ],
+                )
+
+    def get_recent_readings(
+        self,
+        sensor_id: int,
+        since_ns: Optional[int] = None,
+        last_n: Optional[int] = None,
+    ) -> SensorReadingSeries:
+        """
+        Retrieve recent readings of a sensor from the in-memory buffer.
+
+        Only the last `SENSOR_HISTORY_CAPACITY` readings are kept, older ones
+        have to be queried with `get_history`.
+
+        Args:
+            sensor_id (int): The ID of the sensor.
+            since_ns (int, optional): Only return readings at or after this timestamp.
+            last_n (int, optional): Only return the newest `last_n` readings.
+
+        Returns:
+            SensorReadingSeries: The selected readings in time order.
+        """
+        return self.sensor.get_recent_readings(sensor_id).series(since_ns, last_n)
+
+    async def get_history(
+        self, sensor_id: int, start: datetime, stop: datetime, every: timedelta
+    ) -> SensorReadingSeries:
+        """
+        Retrieve the mean reading of a sensor per time window from InfluxDB.
+
+        Summary
+        -------
+        The range is extended to whole windows, aligned to Epoch like the
+        windows of InfluxDB, so repeated queries of a moving range map to the
+        same windows. Results are kept in an LRU cache keyed by the aligned
+        range. Results covering the most recent window expire after the
+        InfluxDB flush interval, since newer readings may still be written.
+
+        Parameters
+        ----------
+        sensor_id : int
+            The ID of the sensor.
+        start : datetime
+            Start of the range, UTC if no timezone is given.
+        stop : datetime
+            End of the range, UTC if no timezone is given.
+        every : timedelta
+            Length of the windows.
+
+        Returns
+        -------
+        SensorReadingSeries
+            The mean reading of every window that contains readings, timestamped
+            with the start of the window.
+
+        Raises
+        ------
+        HTTPException
+            422 if the range or window length is invalid, 502 if InfluxDB
+            could not be queried.
+        """
+        every_ns = every // timedelta(microseconds=1) * 1000
+        start_ns = self._to_ns(start)
+        stop_ns = self._to_ns(stop)
+        if every_ns <= 0:
+            self._raise_query_error("every", "Input must be positive", str(every))
+        if stop_ns <= start_ns:
+            self._raise_query_error("stop", "Input must be after start", str(stop))
+
+        start_ns -= start_ns % every_ns
+        stop_ns += -stop_ns % every_ns
+        if (stop_ns - start_ns) // every_ns > HISTORY_MAX_WINDOWS:
+            self._raise_query_error(
+                "every",
+                f"Range must not contain more than {HISTORY_MAX_WINDOWS} windows",
+                str(every),
+            )
+
+        key = (sensor_id, start_ns, stop_ns, every_ns)
+        series = self.history_cache.get(key)
+        if series is not None:
+            return series
+
+        try:
+            series = await asyncio.to_thread(
+                self.influx.query_sensor_readings,
+                self.get_by_id(sensor_id).type.value,
+                sensor_id,
+                start_ns,
+                stop_ns,
+                every_ns,
+            )
+        except Exception as e:
+            logger.error(f"Failed to query the history of sensor {sensor_id}: {e}")
+            raise HTTPException(
+                status_code=502, detail="Failed to query InfluxDB"
+            ) from e
+
+        recent = stop_ns > time.time_ns() - every_ns
+        self.history_cache.put(
+            key,
+            series,
+            ttl=settings.INFLUXDB_FLUSH_INTERVAL_MS / 1000 if recent else None,
+        )
+        return series
+
+    @staticmethod
+    def _to_ns(value: datetime) -> int:
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return (value - datetime(1970, 1, 1, tzinfo=timezone.utc)) // timedelta(
+            microseconds=1
+        ) * 1000
+
+    @staticmethod
+    def _raise_query_error(name: str, msg: str, value: str):
+        raise HTTPException(
+            status_code=422,
+            detail=[
+                ValidationError(
+                    loc=["query", name], msg=msg, type="value_error", input=value
+                ).model_dump()
+            ],
+        )
+
+    @staticmethod
+    def _encode_readings(readings: List[Tuple[int, float]]) -> str:
+        """
+        Encode `(timestamp_ns, value)` pairs as a WebSocket message.
+
+        A single reading is encoded like `SensorReading.model_dump_json`, several
+        readings as a list of such objects in the given order.
+        """
+        objects = [
+            {"value": value, "timestamp_ns": timestamp_ns}
+            for timestamp_ns, value in readings
+        ]
+        payload = objects[0] if len(objects) == 1 else objects
+        return json.dumps(payload, separators=(",", ":"))
@@ -3,7 +3,12 @@
 import pytest
 from fastapi.testclient import TestClient
 from fastapi.exceptions import RequestValidationError
-from app.api.v1.endpoints.actuators import router
+from app.api.v1.endpoints.actuators import (
+    proportional_service,
+    pump_service,
+    router,
+    solenoid_service,
+)
 from app.models.actuators import ProportionalValve, Pump, SolenoidValve
 from app.services.actuators.proportional import ProportionalService
 from app.services.actuators.pump import PumpService
@@ -12,6 +17,10 @@ from app.services.actuators.solenoid import SolenoidService
 
 @pytest.fixture(name="client")
 def setup_test_client():
+    # Services are patched per test without changing their state version,
+    # a new version makes the cached responses render the patched services
+    for service in (solenoid_service, proportional_service, pump_service):
+        service.state_version += 1
     with TestClient(router) as client:
         yield client
 
@@ -244,3 +253,22 @@ def test_pump_set_request_invalid(client):
         with pytest.raises(RequestValidationError) as exc_info:
             client.post("/pump/set", data=request.model_dump_json())
         assert exc_info.type == RequestValidationError
+
+
+def test_get_all_actuators_etag(client, mocker):
+    solenoid_get_all = mocker.spy(SolenoidService, "get_all")
+
+    first = client.get("/")
+    cached = client.get("/", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert solenoid_get_all.call_count == 1
+
+    client.post("/solenoid/set", json={"id": 0, "state": True})
+    changed = client.get("/", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+    assert changed.json()[0]["state"] is True
@@ -0,0 +1,49 @@
+# pylint: disable=C0116
+
+import time
+
+from app.models.info import CircuitState
+from app.utils.circuit_breaker import CircuitBreaker
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout_s=60.0)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_at is not None
+
+
+def test_success_resets_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout_s=60.0)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.consecutive_failures == 1
+
+
+def test_probe_after_reset_timeout():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout_s=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    assert breaker.allow_request()
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.retry_at - time.monotonic() > 0.01
+
+    time.sleep(0.03)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.retry_at is None
@@ -0,0 +1,40 @@
+# pylint: disable=C0116
+
+from datetime import datetime
+
+import pytest
+
+from app.utils.flow_features import FlowFeatureAccumulator
+
+SECOND_NS = 1_000_000_000
+
+
+def test_features_from_readings():
+    accumulator = FlowFeatureAccumulator(datetime(2024, 11, 6, 13, 30))
+    readings = [(0, 0.0), (1, 6.0), (2, 6.0), (3, 12.0), (4, 0.0)]
+
+    for second, value in readings:
+        accumulator.add(1730906908 * SECOND_NS + second * SECOND_NS, value)
+    # Out of order readings are ignored
+    accumulator.add(1730906908 * SECOND_NS, 100.0)
+
+    features = accumulator.features()
+    assert features.Volume == pytest.approx((3 + 6 + 9 + 6) / 60)
+    assert features.Peak == 12.0
+    assert features.Duration == 2.0
+    assert features.Mean == pytest.approx(features.Volume / (2 / 60))
+    assert features.Hour == 13.5
+
+
+def test_features_without_flow():
+    accumulator = FlowFeatureAccumulator(datetime(2024, 11, 6, 0, 0))
+    accumulator.add(SECOND_NS, 0.0)
+
+    features = accumulator.features()
+    assert (features.Volume, features.Mean, features.Duration) == (0, 0, 0)
+
+
+def test_features_without_readings():
+    accumulator = FlowFeatureAccumulator(datetime(2024, 11, 6, 0, 0))
+
+    assert accumulator.features() is None
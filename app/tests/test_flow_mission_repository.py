@@ -0,0 +1,121 @@
+# pylint: disable=C0116
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.models.missions import FlowControlMission, TrajectoryPoint
+from app.repositories.missions.flow import FlowMissionRepository
+
+
+@pytest.fixture(name="repo")
+def flow_mission_repo():
+    flowmeter_service = MagicMock()
+    flowmeter_service.post_setpoint = AsyncMock()
+    solenoid_service = MagicMock()
+    solenoid_service.set_state = AsyncMock()
+    with patch("app.repositories.missions.flow.influx_connector"):
+        yield FlowMissionRepository(solenoid_service, flowmeter_service, 0)
+
+
+@pytest.mark.asyncio
+async def test_execute_mission_does_not_drift(repo):
+    loop = asyncio.get_running_loop()
+    setpoint_times = []
+
+    async def slow_post_setpoint(_, flow_rate):
+        setpoint_times.append((loop.time(), flow_rate))
+        # Posting a setpoint takes a noticeable part of each interval
+        await asyncio.sleep(0.03)
+
+    repo.flowmeter_service.post_setpoint.side_effect = slow_post_setpoint
+    mission = FlowControlMission(
+        valve_id=0,
+        flow_trajectory=[
+            TrajectoryPoint(time=0.05, flow_rate=1.0),
+            TrajectoryPoint(time=0.1, flow_rate=2.0),
+            TrajectoryPoint(time=0.15, flow_rate=3.0),
+            TrajectoryPoint(time=0.2, flow_rate=4.0),
+        ],
+    )
+
+    await repo._execute_mission(mission)
+
+    origin = setpoint_times[0][0]
+    # The setpoints follow the schedule instead of adding up the delays
+    for (timestamp, _), expected in zip(setpoint_times, [0.0, 0.05, 0.1, 0.15, 0.2]):
+        assert timestamp - origin == pytest.approx(expected, abs=0.02)
+    assert setpoint_times[-1][1] is None
+
+    completed = repo.get_last_mission()
+    assert len(repo.point_lateness) == 4
+    assert completed.start_timing_error_s >= 0
+    assert 0 <= completed.end_timing_error_s < 0.02
+    assert completed.max_timing_error_s == max(repo.point_lateness)
+
+
+@pytest.mark.asyncio
+async def test_execute_mission_collects_features(repo):
+    def post_readings(*_):
+        # Readings of the flowmeter arrive while the mission runs
+        _, listener = repo.flowmeter_service.add_reading_listener.call_args.args
+        listener(0, 6.0)
+        listener(60_000_000_000, 6.0)
+
+    repo.solenoid_service.set_state.side_effect = post_readings
+
+    await repo._execute_mission(mission_for(0))
+
+    assert repo.get_last_mission().features.Volume == pytest.approx(6.0)
+    repo.flowmeter_service.remove_reading_listener.assert_called_once_with(
+        0, repo.flowmeter_service.add_reading_listener.call_args.args[1]
+    )
+
+
+def mission_for(valve_id: int) -> FlowControlMission:
+    return FlowControlMission(
+        valve_id=valve_id, flow_trajectory=[TrajectoryPoint(time=0.1, flow_rate=1.0)]
+    )
+
+
+@pytest.mark.asyncio
+async def test_missions_on_independent_valves_run_concurrently(repo):
+    repo.flow_sensor_ids = [0, 1]
+
+    with patch("app.repositories.missions.flow.settings.MISSION_WAIT_SECONDS", 0):
+        repo.add_to_queue([mission_for(0), mission_for(1)])
+        await asyncio.sleep(0.05)
+
+        assert len(repo.current_missions) == 2
+        assert repo.get_queue_length() == 0
+        await asyncio.gather(*repo.lane_tasks.values())
+
+    sensor_ids = {c.args[0] for c in repo.flowmeter_service.post_setpoint.call_args_list}
+    assert sensor_ids == {0, 1}
+
+
+@pytest.mark.asyncio
+async def test_missions_sharing_a_flowmeter_run_one_after_another(repo):
+    repo.solenoid_service.actuator_repo.count = 2
+
+    with patch("app.repositories.missions.flow.settings.MISSION_WAIT_SECONDS", 0):
+        repo.add_to_queue([mission_for(0), mission_for(1), mission_for(-1)])
+        await asyncio.sleep(0.05)
+
+        assert len(repo.current_missions) == 1
+        assert repo.get_next_mission().valve_id == 1
+        assert repo.get_queue_length() == 2
+        while repo.lane_tasks:
+            await asyncio.gather(*repo.lane_tasks.values())
+
+    assert repo.get_queue_length() == 0
+    assert repo.get_last_mission() is not None
+
+
+def test_close_closes_journal(repo):
+    repo.journal = MagicMock()
+
+    repo.close()
+
+    repo.journal.close.assert_called_once_with()
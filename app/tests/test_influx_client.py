@@ -0,0 +1,200 @@
+# pylint: disable=C0116
+
+import threading
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from influxdb_client import Point
+
+from app.models.actuators import Actuator, ActuatorEnum
+from app.models.info import CircuitState
+from app.utils.influx_client import InfluxConnector
+
+
+@pytest.fixture(name="connector")
+def influx_connector():
+    connector = InfluxConnector(
+        url="http://localhost:8086",
+        token="token",
+        org="org",
+        bucket="bucket",
+        batch_size=3,
+        flush_interval_ms=10000,
+        queue_size=10,
+    )
+    connector.write_api = MagicMock()
+    yield connector
+    connector.close(timeout=1)
+
+
+def test_write_is_batched(connector):
+    points = [Point("test").field("value", i) for i in range(4)]
+
+    for point in points:
+        connector._write(point)
+    assert connector.flush(timeout=1)
+
+    batches = [call.kwargs["record"] for call in connector.write_api.write.call_args_list]
+    assert batches == [points[:3], points[3:]]
+    assert connector.get_stats().written_points == 4
+    assert connector.get_stats().queue_depth == 0
+
+
+def test_write_drops_when_queue_full(connector):
+    release = threading.Event()
+    connector.write_api.write.side_effect = lambda **_: release.wait(1)
+
+    # Fill the first batch, which then blocks inside write_api.write
+    connector._write([Point("test").field("value", i) for i in range(3)])
+    connector._write([Point("test").field("value", i) for i in range(15)])
+    release.set()
+
+    stats = connector.get_stats()
+    # 18 points against a queue of 10, at most 3 of them already taken by the writer
+    assert stats.dropped_points >= 5
+
+
+def test_failed_write_is_counted(connector):
+    connector.write_api.write.side_effect = ConnectionError("unreachable")
+
+    connector._write(Point("test").field("value", 1))
+    assert connector.flush(timeout=1)
+    assert connector.get_stats().held_points == 1
+
+    # Held points still unwritten when the writer stops are lost
+    connector.close(timeout=1)
+    assert connector.get_stats().failed_points == 1
+
+
+def test_write_after_close_is_dropped(connector):
+    connector.close(timeout=1)
+    connector._write(Point("test").field("value", 1))
+
+    assert connector.get_stats().dropped_points == 1
+    connector.write_api.write.assert_not_called()
+
+
+def test_write_actuators_shares_timestamp(connector):
+    actuators = [
+        Actuator(type=ActuatorEnum.SOLENOID, id=i, state=True) for i in range(3)
+    ]
+
+    connector.write_actuators(actuators)
+    assert connector.flush(timeout=1)
+
+    (call,) = connector.write_api.write.call_args_list
+    records = [point.to_line_protocol() for point in call.kwargs["record"]]
+    assert len(records) == 3
+    assert len({record.rsplit(" ", 1)[1] for record in records}) == 1
+
+
+def test_query_sensor_readings(connector):
+    record = MagicMock()
+    record.get_time.return_value = datetime(1970, 1, 1, 0, 1, tzinfo=timezone.utc)
+    record.get_value.return_value = 2.5
+    connector.query_api = MagicMock()
+    connector.query_api.query.return_value = [MagicMock(records=[record])]
+
+    series = connector.query_sensor_readings("flowmeter", 1, 0, 120 * 10**9, 60 * 10**9)
+
+    assert series.timestamp_ns == [60 * 10**9]
+    assert series.value == [2.5]
+    params = connector.query_api.query.call_args.kwargs["params"]
+    assert params["sensor_id"] == "1"
+    assert params["every_ns"] == 60 * 10**9
+
+
+def test_failed_write_is_spooled_and_replayed(tmp_path):
+    connector = InfluxConnector(
+        url="http://localhost:8086",
+        token="token",
+        org="org",
+        bucket="bucket",
+        batch_size=10,
+        flush_interval_ms=10000,
+        spool_dir=str(tmp_path),
+    )
+    connector.write_api = MagicMock()
+    connector.write_api.write.side_effect = [ConnectionError("down"), None]
+
+    connector._write([Point("test").field("value", i).time(i) for i in range(3)])
+    assert connector.flush(timeout=1)
+    assert connector.get_stats().spooled_points == 3
+
+    deadline = time.monotonic() + 2
+    while connector.get_stats().replayed_points < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    stats = connector.get_stats()
+    assert stats.replayed_points == 3
+    assert stats.failed_points == 0
+    assert stats.spool_bytes == 0
+    replayed = connector.write_api.write.call_args.kwargs["record"]
+    assert replayed == ["test value=0i 0", "test value=1i 1", "test value=2i 2"]
+    connector.close(timeout=1)
+
+
+def test_open_breaker_skips_network(tmp_path):
+    connector = InfluxConnector(
+        url="http://localhost:8086",
+        token="token",
+        org="org",
+        bucket="bucket",
+        batch_size=10,
+        flush_interval_ms=10000,
+        spool_dir=str(tmp_path),
+        breaker_failures=1,
+        breaker_reset_s=60.0,
+    )
+    connector.write_api = MagicMock()
+    connector.write_api.write.side_effect = ConnectionError("down")
+
+    connector._write(Point("test").field("value", 1).time(1))
+    assert connector.flush(timeout=1)
+    connector._write(Point("test").field("value", 2).time(2))
+    assert connector.flush(timeout=1)
+
+    stats = connector.get_stats()
+    assert connector.write_api.write.call_count == 1
+    assert stats.breaker_state == CircuitState.OPEN
+    assert stats.consecutive_failures == 1
+    assert stats.spooled_points == 2
+    connector.close(timeout=1)
+
+
+def test_open_breaker_holds_points_without_spool():
+    connector = InfluxConnector(
+        url="http://localhost:8086",
+        token="token",
+        org="org",
+        bucket="bucket",
+        batch_size=10,
+        flush_interval_ms=10000,
+        breaker_failures=1,
+        breaker_reset_s=0.2,
+    )
+    connector.write_api = MagicMock()
+    connector.write_api.write.side_effect = [ConnectionError("down"), None]
+
+    connector._write(Point("test").field("value", 1).time(1))
+    assert connector.flush(timeout=1)
+    connector._write(Point("test").field("value", 2).time(2))
+    assert connector.flush(timeout=1)
+
+    stats = connector.get_stats()
+    assert connector.write_api.write.call_count == 1
+    assert stats.breaker_state == CircuitState.OPEN
+    assert stats.held_points == 2
+    assert stats.failed_points == 0
+
+    deadline = time.monotonic() + 2
+    while connector.get_stats().written_points < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    stats = connector.get_stats()
+    assert stats.written_points == 2
+    assert stats.held_points == 0
+    assert stats.breaker_state == CircuitState.CLOSED
+    connector.close(timeout=1)
@@ -0,0 +1,53 @@
+# pylint: disable=C0116
+
+from app.utils.influx_spool import InfluxSpool
+
+LINES = [f"flowmeter,id=0 reading={i} {i * 10**9}" for i in range(10)]
+
+
+def test_segments_replay_in_order(tmp_path):
+    spool = InfluxSpool(str(tmp_path), max_bytes=10_000, segment_bytes=100)
+
+    spool.append(LINES[:3])
+    spool.append(LINES[3:6])
+
+    assert len(spool.segments) == 2
+    assert spool.read_oldest() == LINES[:3]
+    assert spool.remove_oldest() == 3
+    assert spool.read_oldest() == LINES[3:6]
+    assert spool.remove_oldest() == 3
+    assert not spool
+    assert spool.size_bytes == 0
+
+
+def test_drops_oldest_segment_when_full(tmp_path):
+    spool = InfluxSpool(str(tmp_path), max_bytes=200, segment_bytes=100)
+
+    for line in LINES:
+        spool.append([line])
+
+    assert spool.size_bytes <= 200
+    assert spool.dropped_points > 0
+    assert spool.read_oldest()[0] != LINES[0]
+
+
+def test_picks_up_segments_after_restart(tmp_path):
+    spool = InfluxSpool(str(tmp_path), max_bytes=10_000, segment_bytes=100)
+    spool.append(LINES[:2])
+    with open(spool.segments[-1], "ab") as segment:
+        segment.write(b"flowmeter,id=0 read")
+
+    restarted = InfluxSpool(str(tmp_path), max_bytes=10_000, segment_bytes=100)
+    restarted.append(LINES[2:3])
+
+    # The partial line is discarded and appending continues in the last segment
+    assert restarted.read_oldest() == LINES[:3]
+
+
+def test_lag(tmp_path):
+    spool = InfluxSpool(str(tmp_path), max_bytes=10_000)
+    assert spool.lag_seconds() is None
+
+    spool.append(LINES[1:])
+
+    assert spool.lag_seconds() > 10**9
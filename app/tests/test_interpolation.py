@@ -0,0 +1,47 @@
+# pylint: disable=C0116
+
+import pytest
+
+from app.models.missions import InterpolationMode, Trajectory, TrajectoryPoint
+from app.utils.interpolation import interpolate
+
+TRAJECTORY = Trajectory.from_points([(1, 2.0), (2, 4.0), (3, 4.0), (4, 0.0)])
+
+
+def test_step_yields_the_trajectory():
+    assert list(interpolate(TRAJECTORY)) == list(TRAJECTORY)
+
+
+def test_linear_interpolation():
+    setpoints = list(interpolate(TRAJECTORY, InterpolationMode.LINEAR, 2))
+
+    assert [point.time for point in setpoints] == [0.5 * i for i in range(1, 9)]
+    # The first flow rate is held until its time, then sampled at each interval start
+    assert [point.flow_rate for point in setpoints] == pytest.approx(
+        [2.0, 2.0, 2.0, 3.0, 4.0, 4.0, 4.0, 2.0]
+    )
+
+
+def test_cubic_interpolation_does_not_overshoot():
+    setpoints = list(interpolate(TRAJECTORY, InterpolationMode.CUBIC, 100))
+
+    assert len(setpoints) == 400
+    assert setpoints[-1].time == 4
+    assert setpoints[100].flow_rate == pytest.approx(2.0)
+    assert setpoints[200].flow_rate == pytest.approx(4.0)
+    assert all(0 <= point.flow_rate <= 4.0 for point in setpoints)
+    # Flat between the equal knots instead of bulging above them
+    assert all(point.flow_rate == pytest.approx(4.0) for point in setpoints[200:300])
+
+
+def test_interpolation_is_lazy():
+    setpoints = interpolate(
+        Trajectory.from_points([(0, 1.0), (3600, 1.0)]), InterpolationMode.LINEAR, 1000
+    )
+
+    assert next(setpoints) == TrajectoryPoint(0.001, 1.0)
+
+
+def test_interpolation_requires_sample_rate():
+    with pytest.raises(ValueError, match="sample rate is required"):
+        list(interpolate(TRAJECTORY, InterpolationMode.CUBIC))
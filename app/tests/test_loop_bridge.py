@@ -0,0 +1,45 @@
+# pylint: disable=C0116
+
+import asyncio
+import threading
+
+import pytest
+
+from app.utils.loop_bridge import LoopBridge
+
+
+@pytest.mark.asyncio
+async def test_values_from_thread_reach_loop_in_order():
+    batches = []
+    loop_thread = threading.get_ident()
+    handler_threads = set()
+
+    def handler(batch):
+        handler_threads.add(threading.get_ident())
+        batches.append(batch)
+
+    bridge = LoopBridge(handler)
+    bridge.attach(asyncio.get_running_loop())
+
+    producer = threading.Thread(target=lambda: [bridge.push(i) for i in range(1000)])
+    producer.start()
+    producer.join()
+    await asyncio.sleep(0.01)
+
+    assert [value for batch in batches for value in batch] == list(range(1000))
+    # Bursts are coalesced into few handler calls, all on the loop thread
+    assert len(batches) < 1000
+    assert handler_threads == {loop_thread}
+
+
+@pytest.mark.asyncio
+async def test_values_before_attach_are_kept_up_to_maxlen():
+    batches = []
+    bridge = LoopBridge(batches.append, maxlen=3)
+
+    for i in range(5):
+        bridge.push(i)
+    bridge.attach(asyncio.get_running_loop())
+    await asyncio.sleep(0)
+
+    assert batches == [[2, 3, 4]]
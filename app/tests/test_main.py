@@ -27,3 +27,11 @@ def test_swagger_ui_html(client):
     assert "openapi.json" in response.text
     assert "/favicon.ico" in response.text
     assert settings.PROJECT_NAME in response.text
+
+
+def test_proportional_command_stats(client):
+    response = client.get("/v1/info/proportional")
+    assert response.status_code == 200
+    assert response.json()["mode"] == settings.PROPORTIONAL_MODE
+    assert response.json()["last_command_latency_ns"] is None
+    assert response.json()["rpdo_period_s"] is None
@@ -0,0 +1,109 @@
+# pylint: disable=C0116
+
+import asyncio
+import pickle
+from datetime import datetime
+
+import pytest
+
+from app.models.missions import (
+    CompletedFlowControlMission,
+    EndUseType,
+    FlowClassifierFeatures,
+    FlowControlMission,
+)
+from app.services.missions.classifier import MissionClassifier
+
+
+class VolumeModel:
+    """Classifies missions with more than 10 liters as showers."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, rows):
+        self.batches.append(rows)
+        return ["Shower" if volume > 10 else "Faucet" for volume, *_ in rows]
+
+
+def completed_mission(volume, cancelled=False):
+    return CompletedFlowControlMission(
+        flow_control_mission=FlowControlMission(
+            valve_id=0, flow_trajectory=[(1, 1.0)]
+        ),
+        start_ts=datetime(2024, 11, 6, 12),
+        end_ts=datetime(2024, 11, 6, 12, 1),
+        end_timing_error_s=None if cancelled else 0.0,
+        features=(
+            FlowClassifierFeatures(
+                Volume=volume, Mean=1.0, Peak=2.0, Duration=60, Hour=12
+            )
+            if volume is not None
+            else None
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_missions_are_classified_in_batches(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    model_path.write_bytes(pickle.dumps(VolumeModel()))
+    classifier = MissionClassifier(str(model_path))
+    classified = []
+
+    async def on_classified(mission):
+        classified.append(mission)
+
+    classifier.start(on_classified)
+    for volume in (42.0, None, 1.0):
+        classifier.submit(completed_mission(volume))
+    while len(classified) < 2:
+        await asyncio.sleep(0.01)
+    classifier.task.cancel()
+
+    assert [mission.predicted_end_use for mission in classified] == [
+        EndUseType.SHOWER,
+        EndUseType.FAUCET,
+    ]
+    assert classified[0].features.Volume == 42.0
+    assert classifier.model.batches == [
+        [[42.0, 1.0, 2.0, 60, 12], [1.0, 1.0, 2.0, 60, 12]]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_and_unmeasured_missions_are_skipped(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    model_path.write_bytes(pickle.dumps(VolumeModel()))
+    classifier = MissionClassifier(str(model_path))
+
+    classifier.submit(completed_mission(42.0, cancelled=True))
+    classifier.submit(completed_mission(None))
+
+    assert classifier.pending.empty()
+    classifier.close()
+
+
+@pytest.mark.asyncio
+async def test_failing_callback_does_not_stop_classification(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    model_path.write_bytes(pickle.dumps(VolumeModel()))
+    classifier = MissionClassifier(str(model_path), batch_size=1)
+    classified = asyncio.Queue()
+
+    async def on_classified(mission):
+        if mission.features.Volume == 42.0:
+            raise RuntimeError("broken subscriber")
+        classified.put_nowait(mission)
+
+    classifier.start(on_classified)
+    classifier.submit(completed_mission(42.0))
+    classifier.submit(completed_mission(1.0))
+    mission = await asyncio.wait_for(classified.get(), timeout=1)
+    task = classifier.task
+    classifier.close()
+
+    assert mission.predicted_end_use == EndUseType.FAUCET
+    assert classifier.task is None
+    with pytest.raises(asyncio.CancelledError):
+        await task
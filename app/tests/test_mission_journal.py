@@ -0,0 +1,73 @@
+# pylint: disable=C0116
+
+from datetime import time as time_of_day
+
+import pytest
+
+from app.models.missions import EndUseType, FlowControlMission, TrajectoryPoint
+from app.repositories.missions import journal as journal_module
+from app.repositories.missions.journal import MissionJournal
+
+
+@pytest.fixture(name="path")
+def journal_path(tmp_path):
+    return str(tmp_path / "missions.db")
+
+
+def make_mission(valve_id: int) -> FlowControlMission:
+    return FlowControlMission(
+        valve_id=valve_id,
+        flow_trajectory=[
+            TrajectoryPoint(time=10, flow_rate=22.2),
+            TrajectoryPoint(time=20.5, flow_rate=11.1),
+        ],
+        actual_end_use=EndUseType.SHOWER,
+        duration_scaling_factor=2,
+        actual_start_time=time_of_day(11, 11, 11),
+    )
+
+
+def test_replay_restores_unfinished_missions(path):
+    journal = MissionJournal(path)
+    missions = [(i, make_mission(i)) for i in range(3)]
+    journal.enqueue(missions)
+    journal.start(0)
+    journal.complete(0)
+    # Mission 1 was running when the backend stopped
+    journal.start(1)
+    journal.close()
+
+    journal = MissionJournal(path)
+    replayed = journal.replay()
+
+    assert [mission_id for mission_id, _ in replayed] == [1, 2]
+    assert [mission for _, mission in replayed] == [m for _, m in missions[1:]]
+    assert replayed[0][1].flow_trajectory[1] == TrajectoryPoint(20.5, 11.1)
+    assert journal.next_id() == 3
+
+
+def test_next_id_is_not_reused_after_compaction(path):
+    journal = MissionJournal(path)
+    journal.enqueue([(0, make_mission(0)), (1, make_mission(1))])
+    journal.complete(0)
+    journal.complete(1)
+    journal.close()
+
+    journal = MissionJournal(path)
+
+    assert journal.replay() == []
+    assert journal.next_id() == 2
+
+
+def test_completed_missions_are_compacted_while_running(path, monkeypatch):
+    monkeypatch.setattr(journal_module, "COMPACT_INTERVAL", 2)
+    journal = MissionJournal(path)
+    journal.enqueue([(i, make_mission(i)) for i in range(4)])
+
+    journal.complete(0)
+    journal.complete(1)
+
+    (missions,) = journal.connection.execute("SELECT COUNT(*) FROM missions").fetchone()
+    assert missions == 2
+    assert [mission_id for mission_id, _ in journal.replay()] == [2, 3]
+
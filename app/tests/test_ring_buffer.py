@@ -0,0 +1,66 @@
+# pylint: disable=C0116
+
+import struct
+
+import pytest
+
+from app.utils.ring_buffer import ReadingRingBuffer
+
+
+@pytest.fixture(name="buffer")
+def wrapped_buffer():
+    buffer = ReadingRingBuffer(4)
+    for timestamp_ns in range(1, 7):
+        buffer.append(timestamp_ns, timestamp_ns / 2)
+    return buffer
+
+
+def test_keeps_newest_readings(buffer):
+    series = buffer.series()
+
+    assert len(buffer) == 4
+    assert series.timestamp_ns == [3, 4, 5, 6]
+    assert series.value == [1.5, 2.0, 2.5, 3.0]
+
+
+def test_segments_are_views(buffer):
+    segments = buffer.segments()
+
+    assert len(segments) == 2
+    assert all(isinstance(view, memoryview) for pair in segments for view in pair)
+    assert [view.tolist() for view, _ in segments] == [[3, 4], [5, 6]]
+
+
+@pytest.mark.parametrize(
+    "since_ns, last_n, expected",
+    [
+        (5, None, [5, 6]),
+        (0, None, [3, 4, 5, 6]),
+        (7, None, []),
+        (None, 3, [4, 5, 6]),
+        (None, 0, []),
+        (4, 1, [6]),
+    ],
+)
+def test_select(buffer, since_ns, last_n, expected):
+    assert buffer.series(since_ns, last_n).timestamp_ns == expected
+
+
+def test_ignores_readings_out_of_order(buffer):
+    assert not buffer.append(6, 0.0)
+    assert not buffer.append(2, 0.0)
+    assert buffer.series().timestamp_ns == [3, 4, 5, 6]
+
+
+def test_disabled_buffer():
+    buffer = ReadingRingBuffer(0)
+
+    assert not buffer.append(1, 1.0)
+    assert buffer.segments() == []
+
+
+def test_pack(buffer):
+    data = buffer.pack(last_n=3)
+
+    assert struct.unpack("<I3q3d", data) == (3, 4, 5, 6, 2.0, 2.5, 3.0)
+    assert buffer.pack(since_ns=7) == struct.pack("<I", 0)
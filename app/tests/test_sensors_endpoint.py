@@ -1,16 +1,26 @@
 # pylint: disable=C0116
 
+import struct
 from contextlib import ExitStack
 from fastapi.exceptions import RequestValidationError
 import pytest
 from fastapi.testclient import TestClient
-from app.api.v1.endpoints.sensors import router
-from app.models.sensors import Flowmeter, SensorReading
+from app.api.v1.endpoints.sensors import flowmeter_service, router
+from app.models.sensors import (
+    Flowmeter,
+    SensorBatchReading,
+    SensorReading,
+    SensorReadingAck,
+    SensorReadingColumns,
+)
 from app.services.sensors.flowmeter import FlowmeterService
 
 
 @pytest.fixture(name="client")
 def setup_test_client():
+    # Services are patched per test without changing their state version,
+    # a new version makes the cached responses render the patched service
+    flowmeter_service.state_version += 1
     with TestClient(router) as client:
         yield client
 
@@ -99,3 +109,99 @@ def test_websocket_initial_reading(client, mocker):
     with client.websocket_connect(f"/flowmeters/ws/{sensor_id}") as websocket:
         data = websocket.receive_text()
         assert data == expected.model_dump_json()
+
+
+def test_flowmeter_post_readings(client, mocker):
+    expected = SensorReadingColumns(
+        sensor_id=[0, 1, 0],
+        timestamp_ns=[1730906908814683100, 1730906908814683200, 1730906908814683300],
+        value=[1.0, 2.0, 3.0],
+    )
+    post_readings = mocker.patch.object(
+        FlowmeterService, "post_readings", return_value=[Flowmeter(id=0)]
+    )
+
+    readings = [
+        SensorBatchReading(sensor_id=sensor_id, timestamp_ns=timestamp_ns, value=value)
+        for sensor_id, timestamp_ns, value in zip(
+            expected.sensor_id, expected.timestamp_ns, expected.value
+        )
+    ]
+    bodies = [
+        ("application/json", "[" + ",".join(r.model_dump_json() for r in readings) + "]"),
+        ("application/json", expected.model_dump_json()),
+        ("application/x-ndjson", "\n".join(r.model_dump_json() for r in readings)),
+    ]
+
+    for content_type, body in bodies:
+        response = client.post(
+            "/flowmeters/readings",
+            content=body,
+            headers={"content-type": content_type},
+        )
+        assert response.status_code == 200
+        assert post_readings.call_args[0][0].model_dump() == expected.model_dump()
+
+
+def test_flowmeter_post_readings_request_invalid(client):
+    bodies = [
+        ("application/json", '{"sensor_id": [0], "timestamp_ns": [], "value": [1.0]}'),
+        ("application/json", '[{"sensor_id": 0, "value": "invalid"}]'),
+        ("application/x-ndjson", '{"sensor_id": 0, "timestamp_ns": 1, "value": 1.0}\n{}'),
+    ]
+
+    for content_type, body in bodies:
+        with pytest.raises(RequestValidationError):
+            client.post(
+                "/flowmeters/readings",
+                content=body,
+                headers={"content-type": content_type},
+            )
+
+
+def test_websocket_ingest(client, mocker):
+    post_readings = mocker.patch.object(FlowmeterService, "post_readings")
+    batch = SensorReadingColumns(sensor_id=[0, 1], timestamp_ns=[1, 2], value=[4.2, 2.4])
+
+    with client.websocket_connect("/flowmeters/ws/ingest") as websocket:
+        websocket.send_text(batch.model_dump_json())
+        ack = SensorReadingAck.model_validate_json(websocket.receive_text())
+        assert ack == SensorReadingAck(seq=1, count=2)
+        assert post_readings.call_args[0][0].model_dump() == batch.model_dump()
+
+        websocket.send_text('[{"sensor_id": 0, "value": "invalid"}]')
+        ack = SensorReadingAck.model_validate_json(websocket.receive_text())
+        assert ack.seq == 2
+        assert ack.count == 0
+        assert ack.errors
+
+    assert post_readings.call_count == 1
+
+
+def test_flowmeter_get_all_etag(client):
+    first = client.get("/flowmeters/")
+    cached = client.get("/flowmeters/", headers={"If-None-Match": first.headers["ETag"]})
+
+    client.post("/flowmeters/0/reading", json={"value": 1.5, "timestamp_ns": 1})
+    changed = client.get(
+        "/flowmeters/", headers={"If-None-Match": first.headers["ETag"]}
+    )
+
+    assert cached.status_code == 304
+    assert changed.status_code == 200
+    assert changed.json()[0]["current_reading"]["value"] == 1.5
+
+
+def test_websocket_backfill(client):
+    for timestamp_ns, value in [(100, 1.0), (200, 2.0), (300, 3.0)]:
+        client.post(
+            "/flowmeters/1/reading", json={"value": value, "timestamp_ns": timestamp_ns}
+        )
+
+    with client.websocket_connect("/flowmeters/ws/1?since_ns=200") as websocket:
+        backfill = websocket.receive_bytes()
+        client.post("/flowmeters/1/reading", json={"value": 4.0, "timestamp_ns": 400})
+        live = websocket.receive_text()
+
+    assert struct.unpack("<I2q2d", backfill) == (2, 200, 300, 2.0, 3.0)
+    assert SensorReading.model_validate_json(live).value == 4.0
@@ -1,11 +1,14 @@
 # pylint: disable=C0116
 # pylint: disable=C0115
 
+from datetime import datetime, timedelta, timezone
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 from fastapi import HTTPException
 from app.services.actuators.service import ActuatorService
 from app.models.actuators import ActuatorEnum, ActuatorRepository, Actuator
+from app.models.sensors import SensorReading, SensorReadingColumns, SensorReadingSeries
+from app.services.sensors.flowmeter import FlowmeterService
 from app.utils.influx_client import InfluxConnector
 from app.utils.websocket_manager import WebSocketManager
 
@@ -20,6 +23,7 @@ class MockActuator(Actuator):
 def mock_actuator_repository():
     repository = MagicMock(spec=ActuatorRepository)
     repository.count = 5  # Assume there are 5 actuators in the repository
+    repository.get_all.return_value = [MockActuator(i) for i in range(5)]
     return repository
 
 
@@ -38,6 +42,7 @@ def actuator_service(repository, influx, websocket):
     service = ActuatorService(repository, MockActuator)
     service.database = influx
     service.websocket_manager = websocket
+    service.all_websocket_manager = AsyncMock(spec=WebSocketManager)
     return service
 
 
@@ -80,8 +85,8 @@ async def test_set_state_actuator_valid_id(service, repository):
     # Assert
     assert result == actuator
     repository.set_state.assert_called_once_with(actuator)
-    service.influx.write_actuator.assert_called_once_with(
-        actuator, service.influx.write_actuator.call_args[0][1]
+    service.database.write_actuator.assert_called_once_with(
+        actuator, service.database.write_actuator.call_args[0][1]
     )
 
 
@@ -110,7 +115,8 @@ async def test_set_state_actuator_id_minus_one(service, repository):
     # Assert
     assert result == actuator
     repository.set_state.assert_called_once_with(actuator)
-    service.influx.write_actuator.assert_not_called()
+    service.database.write_actuator.assert_not_called()
+    service.database.write_actuators.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -118,6 +124,7 @@ async def test_set_state_actuator_state_change(service, repository):
     # Arrange
     actuator = MockActuator(3, state=False)
     repository.set_state.return_value = actuator
+    repository.get_all.reset_mock()
 
     # Act
     result = await service.set_state(actuator)
@@ -125,8 +132,12 @@ async def test_set_state_actuator_state_change(service, repository):
     # Assert
     assert result == actuator
     repository.set_state.assert_called_once_with(actuator)
-    service.influx.write_actuator.assert_called_once_with(
-        actuator, service.influx.write_actuator.call_args[0][1]
+    service.database.write_actuator.assert_called_once_with(
+        actuator, service.database.write_actuator.call_args[0][1]
+    )
+    repository.get_all.assert_not_called()
+    service.all_websocket_manager.broadcast.assert_called_once_with(
+        0, "[true, true, true, false, true]"
     )
 
 
@@ -155,7 +166,19 @@ async def test_connect_websocket(service, repository):
 
     # Assert
     service.websocket_manager.connect.assert_called_once_with(actuator_id, websocket)
-    websocket.send_text.assert_called_once_with("True")
+
+
+def test_websocket_snapshot(repository):
+    # Arrange
+    repository.get_by_id.return_value = MockActuator(1)
+    repository.get_all.return_value = [MockActuator(i) for i in range(2)]
+    service = ActuatorService(repository, MockActuator)
+
+    # Act & Assert
+    assert service.websocket_manager.get_retained(1).message["text"] == "true"
+    assert service.all_websocket_manager.get_retained(0).message["text"] == (
+        "[true, true]"
+    )
 
 
 @pytest.mark.asyncio
@@ -165,8 +188,162 @@ async def test_broadcast_all_actuators(service, repository):
     repository.get_all.return_value = actuators
 
     # Act
-    await service._broadcast_all_actuators()
+    await service._broadcast_actuators_states(actuators)
 
     # Assert
-    service.influx.write_actuator.assert_called()
-    service.websocket_manager.broadcast.assert_called()
+    assert service.websocket_manager.broadcast.call_count == 5
+    service.all_websocket_manager.broadcast.assert_called_once_with(
+        0, "[true, true, true, true, true]"
+    )
+
+
+@pytest.mark.asyncio
+async def test_set_state_all_actuators_writes_one_batch(service, repository):
+    # Arrange
+    actuators = [MockActuator(i) for i in range(5)]
+    repository.set_state.return_value = MockActuator(-1)
+    repository.get_all.return_value = actuators
+
+    # Act
+    await service.set_state(MockActuator(-1))
+
+    # Assert
+    service.database.write_actuators.assert_called_once_with(
+        actuators, service.database.write_actuators.call_args[0][1]
+    )
+
+
+@pytest.fixture(name="sensor_service")
+def sensor_service_fixture(influx):
+    service = FlowmeterService()
+    service.influx = influx
+    service.reading_ws = AsyncMock(spec=WebSocketManager)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_post_readings(sensor_service):
+    readings = SensorReadingColumns(
+        sensor_id=[1, 0, 1],
+        timestamp_ns=[30, 10, 20],
+        value=[3.0, 1.0, 2.0],
+    )
+
+    sensors = await sensor_service.post_readings(readings)
+
+    assert [sensor.id for sensor in sensors] == [1, 0]
+    assert sensors[0].current_reading == SensorReading(value=3.0, timestamp_ns=30)
+    assert sensors[1].current_reading == SensorReading(value=1.0, timestamp_ns=10)
+    sensor_service.influx.write_sensor_readings.assert_called_once()
+    written = sensor_service.influx.write_sensor_readings.call_args[0][0]
+    assert [len(series.value) for _, series in written] == [2, 1]
+    assert sensor_service.reading_ws.broadcast.call_count == 2
+    sensor_service.reading_ws.broadcast.assert_any_call(
+        1,
+        '[{"value":2.0,"timestamp_ns":20},{"value":3.0,"timestamp_ns":30}]',
+        retain=False,
+    )
+    sensor_service.reading_ws.broadcast.assert_any_call(
+        0, SensorReading(value=1.0, timestamp_ns=10).model_dump_json(), retain=True
+    )
+    sensor_service.reading_ws.retain.assert_called_once_with(
+        1, SensorReading(value=3.0, timestamp_ns=30).model_dump_json()
+    )
+
+
+@pytest.mark.asyncio
+async def test_post_readings_invalid_sensor_id(sensor_service):
+    readings = SensorReadingColumns(sensor_id=[0, 42], timestamp_ns=[1, 2], value=[1, 2])
+
+    with pytest.raises(HTTPException) as e:
+        await sensor_service.post_readings(readings)
+
+    assert e.value.status_code == 422
+    assert e.value.detail[0]["loc"] == ["body", "sensor_id", 1]
+
+
+@pytest.mark.asyncio
+async def test_post_readings_notifies_listeners(sensor_service):
+    received = []
+    sensor_service.add_reading_listener(1, lambda *reading: received.append(reading))
+    readings = SensorReadingColumns(
+        sensor_id=[1, 0, 1], timestamp_ns=[30, 10, 20], value=[3.0, 1.0, 2.0]
+    )
+
+    await sensor_service.post_readings(readings)
+
+    assert received == [(20, 2.0), (30, 3.0)]
+
+
+@pytest.mark.asyncio
+async def test_get_history_aligns_and_caches(sensor_service):
+    series = SensorReadingSeries(timestamp_ns=[60_000_000_000], value=[1.5])
+    sensor_service.influx.query_sensor_readings.return_value = series
+    start = datetime(2024, 1, 1, 0, 1, 30, tzinfo=timezone.utc)
+    stop = datetime(2024, 1, 1, 0, 3, 10, tzinfo=timezone.utc)
+
+    first = await sensor_service.get_history(0, start, stop, timedelta(minutes=1))
+    second = await sensor_service.get_history(
+        0, start + timedelta(seconds=10), stop, timedelta(minutes=1)
+    )
+
+    assert first is second is series
+    sensor_service.influx.query_sensor_readings.assert_called_once_with(
+        "flowmeter",
+        0,
+        int(datetime(2024, 1, 1, 0, 1, tzinfo=timezone.utc).timestamp()) * 10**9,
+        int(datetime(2024, 1, 1, 0, 4, tzinfo=timezone.utc).timestamp()) * 10**9,
+        60 * 10**9,
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "stop, every, loc",
+    [
+        (datetime(2024, 1, 1), timedelta(minutes=1), "stop"),
+        (datetime(2024, 1, 2), timedelta(0), "every"),
+        (datetime(2024, 1, 2), timedelta(seconds=1), "every"),
+    ],
+)
+async def test_get_history_invalid_query(sensor_service, stop, every, loc):
+    with pytest.raises(HTTPException) as e:
+        await sensor_service.get_history(0, datetime(2024, 1, 1), stop, every)
+
+    assert e.value.status_code == 422
+    assert e.value.detail[0]["loc"] == ["query", loc]
+    sensor_service.influx.query_sensor_readings.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_post_readings_fills_recent_readings(sensor_service):
+    readings = SensorReadingColumns(
+        sensor_id=[1, 0, 1], timestamp_ns=[30, 10, 20], value=[3.0, 1.0, 2.0]
+    )
+
+    await sensor_service.post_readings(readings)
+    await sensor_service.post_reading(1, SensorReading(value=4.0, timestamp_ns=40))
+
+    recent = sensor_service.get_recent_readings(1, since_ns=25)
+    assert recent.timestamp_ns == [30, 40]
+    assert recent.value == [3.0, 4.0]
+    assert sensor_service.get_recent_readings(0).timestamp_ns == [10]
+
+
+@pytest.mark.asyncio
+async def test_post_readings_equal_timestamps(sensor_service):
+    readings = SensorReadingColumns(
+        sensor_id=[1, 1], timestamp_ns=[5, 5], value=[3.0, 1.0]
+    )
+
+    sensors = await sensor_service.post_readings(readings)
+
+    assert sensors[0].current_reading == SensorReading(value=1.0, timestamp_ns=5)
+    recent = sensor_service.get_recent_readings(1)
+    assert recent.timestamp_ns == [5]
+    assert recent.value == [1.0]
+    sensor_service.reading_ws.broadcast.assert_called_once_with(
+        1,
+        '[{"value":3.0,"timestamp_ns":5},{"value":1.0,"timestamp_ns":5}]',
+        retain=False,
+    )
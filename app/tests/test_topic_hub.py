@@ -0,0 +1,140 @@
+# pylint: disable=C0116
+
+import json
+
+import pytest
+
+from app.tests.test_websocket_manager import (  # pylint: disable=W0611
+    drain_tasks_fixture,
+    mock_websocket,
+    wait_sent,
+)
+from app.utils.topic_hub import TopicHub
+from app.utils.websocket_manager import WebSocketManager
+
+
+@pytest.fixture(name="managers")
+def managers_fixture():
+    return (
+        WebSocketManager(2),
+        WebSocketManager(),
+        WebSocketManager(1, conflate=True, snapshot=lambda index: '{"value": 1}'),
+    )
+
+
+@pytest.fixture(name="hub")
+def hub_fixture(managers):
+    hub = TopicHub(send_timeout=5)
+    hub.register("actuators/state", managers[0])
+    hub.register("missions/completed", managers[1], indexed=False)
+    hub.register("sensors/reading", managers[2])
+    return hub
+
+
+def received(websocket):
+    return [json.loads(message) for message in websocket.sent]
+
+
+@pytest.mark.asyncio
+async def test_subscribe_sends_snapshot_then_updates(hub, managers):
+    websocket = mock_websocket()
+    await managers[0].broadcast(1, "true")
+    await hub.connect(websocket)
+
+    hub.handle(
+        websocket,
+        '{"action": "subscribe", "topics": ["actuators/state/1", "missions/completed"]}',
+    )
+    await managers[0].broadcast(0, "false")
+    await managers[0].broadcast(1, "false")
+    await managers[1].broadcast(0, '{"valve_id": 1}')
+    await wait_sent(websocket, 3)
+
+    assert received(websocket) == [
+        {"topic": "actuators/state/1", "data": True},
+        {"topic": "actuators/state/1", "data": False},
+        {"topic": "missions/completed", "data": {"valve_id": 1}},
+    ]
+    hub.disconnect(websocket)
+
+
+@pytest.mark.asyncio
+async def test_conflating_topic_shares_the_connection_writer(hub, managers):
+    websocket = mock_websocket(blocked=True)
+    await hub.connect(websocket)
+
+    hub.subscribe(websocket, ["sensors/reading/0", "actuators/state/0"])
+    connection = hub.connections[websocket]
+    assert hub.subscribers["sensors/reading/0"][websocket] is connection
+    await websocket.sending.wait()
+    for value in range(3):
+        await managers[2].broadcast(0, f'{{"value": {value}}}')
+    await managers[0].broadcast(0, "true")
+    websocket.unblocked.set()
+    await wait_sent(websocket, 3)
+
+    # Queued frames go first, the reading topic only sends its newest value
+    assert received(websocket) == [
+        {"topic": "sensors/reading/0", "data": {"value": 1}},
+        {"topic": "actuators/state/0", "data": True},
+        {"topic": "sensors/reading/0", "data": {"value": 2}},
+    ]
+    assert connection.dropped_messages == 2
+    hub.unsubscribe(websocket, ["sensors/reading/0"])
+    await managers[2].broadcast(0, '{"value": 3}')
+    assert not connection._latest
+    hub.disconnect(websocket)
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe(hub, managers):
+    websocket = mock_websocket()
+    await hub.connect(websocket)
+
+    hub.subscribe(websocket, ["actuators/state/0"])
+    hub.handle(websocket, '{"action": "unsubscribe", "topics": ["actuators/state/0"]}')
+    await managers[0].broadcast(0, "true")
+    hub.handle(websocket, "not json")
+    await wait_sent(websocket, 1)
+
+    # Only the error, nothing of the unsubscribed topic
+    assert "error" in received(websocket)[0]
+    assert hub.subscribers["actuators/state/0"] == {}
+    hub.disconnect(websocket)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "message, error",
+    [
+        ('{"action": "subscribe", "topics": ["unknown"]}', "Unknown topics: unknown"),
+        ('{"action": "publish", "topics": []}', "Input should be"),
+        ("not json", "Invalid JSON"),
+    ],
+)
+async def test_invalid_control_message(hub, message, error):
+    websocket = mock_websocket()
+    await hub.connect(websocket)
+
+    hub.handle(websocket, message)
+    await wait_sent(websocket, 1)
+
+    assert received(websocket)[0]["error"].startswith(error)
+    hub.disconnect(websocket)
+
+
+@pytest.mark.asyncio
+async def test_disconnect_removes_subscriptions(hub):
+    websocket = mock_websocket()
+    await hub.connect(websocket)
+    hub.subscribe(websocket, ["actuators/state/0", "missions/completed"])
+
+    hub.disconnect(websocket)
+
+    assert hub.connections == {}
+    assert all(not subscribers for subscribers in hub.subscribers.values())
+
+
+def test_register_duplicate_topic(hub):
+    with pytest.raises(ValueError, match="already registered"):
+        hub.register("missions/completed", WebSocketManager(), indexed=False)
@@ -0,0 +1,60 @@
+# pylint: disable=C0116
+
+import pytest
+from pydantic import ValidationError
+
+from app.models.missions import FlowControlMission, Trajectory, TrajectoryPoint
+
+
+def test_trajectory_round_trip():
+    body = '{"valve_id":1,"flow_trajectory":[[10,22.2],[20,11.1]]}'
+
+    mission = FlowControlMission.model_validate_json(body)
+
+    assert isinstance(mission.flow_trajectory, Trajectory)
+    assert list(mission.flow_trajectory) == [
+        TrajectoryPoint(10, 22.2),
+        TrajectoryPoint(20, 11.1),
+    ]
+    assert mission.flow_trajectory[-1].time == 20
+    assert FlowControlMission.model_validate_json(mission.model_dump_json()) == mission
+
+
+@pytest.mark.parametrize(
+    "trajectory, message",
+    [
+        ([], "must not be empty"),
+        ([[1, 1], [-2, 1]], "Time must be non-negative at index 1"),
+        ([[1, 1], [2, -1]], "Flow rate must be non-negative at index 1"),
+        ([[2, 1], [2, 1]], "strictly ascending order"),
+        ([[1, 1, 1]], "Unexpected positional argument"),
+        ([["a", 1]], "valid number"),
+        (5, "valid list"),
+    ],
+)
+def test_invalid_trajectory(trajectory, message):
+    with pytest.raises(ValidationError, match=message):
+        FlowControlMission(valve_id=1, flow_trajectory=trajectory)
+
+
+@pytest.mark.parametrize(
+    "trajectory",
+    [
+        [{"time": 1, "flow_rate": 2}, {"time": 3, "flow_rate": 4}],
+        [["1", "2"], ["3", "4"]],
+    ],
+)
+def test_lax_trajectory_points(trajectory):
+    mission = FlowControlMission(valve_id=1, flow_trajectory=trajectory)
+
+    assert list(mission.flow_trajectory) == [
+        TrajectoryPoint(1, 2),
+        TrajectoryPoint(3, 4),
+    ]
+
+
+def test_invalid_point_error_location():
+    with pytest.raises(ValidationError) as error:
+        FlowControlMission(valve_id=1, flow_trajectory=[[1, 2], {"time": "a"}])
+
+    assert error.value.errors()[0]["loc"] == ("flow_trajectory", 1, "time")
@@ -0,0 +1,72 @@
+# pylint: disable=C0116
+
+from datetime import time
+
+import pytest
+from fastapi.exceptions import RequestValidationError
+
+from app.api.v1.endpoints.missions import parse_mission_queue
+from app.models.missions import EndUseType, FlowControlMission, InterpolationMode
+from app.utils.trajectory_codec import FILE_HEADER, decode_missions, encode_missions
+
+MISSIONS = [
+    FlowControlMission(
+        valve_id=1,
+        flow_trajectory=[(10, 22.25), (20.5, 11.5)],
+        actual_end_use=EndUseType.SHOWER,
+        duration_scaling_factor=2,
+        actual_start_time=time(11, 11, 11),
+    ),
+    FlowControlMission(valve_id=-1, flow_trajectory=[(1, 0)]),
+    FlowControlMission(
+        valve_id=2,
+        flow_trajectory=[(1, 0.5)],
+        interpolation=InterpolationMode.CUBIC,
+        sample_rate_hz=12.5,
+    ),
+]
+
+
+@pytest.mark.parametrize("value_size", [4, 8])
+def test_round_trip(value_size):
+    data = encode_missions(MISSIONS, value_size=value_size)
+
+    assert decode_missions(data) == MISSIONS
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        (b"FTRJ", "too short"),
+        (b"JSON" + encode_missions(MISSIONS)[4:], "not in the binary trajectory format"),
+        (
+            FILE_HEADER.pack(b"FTRJ", 2, 8, 0, 0),
+            "Unsupported binary trajectory format version: 2",
+        ),
+        (encode_missions(MISSIONS)[:-1], "truncated"),
+        (encode_missions(MISSIONS) + b"\0", "continues after the last mission"),
+    ],
+)
+def test_decode_invalid_data(data, message):
+    with pytest.raises(ValueError, match=message):
+        decode_missions(data)
+
+
+def test_parse_mission_queue_dispatches_on_content_type():
+    json_body = b'[{"valve_id": 1, "flow_trajectory": [[10, 22.25], [20.5, 11.5]]}]'
+    binary_body = encode_missions(MISSIONS[:1])
+
+    from_json = parse_mission_queue(json_body, "application/json")
+    from_binary = parse_mission_queue(binary_body, "application/octet-stream")
+
+    assert from_json[0].flow_trajectory == from_binary[0].flow_trajectory
+
+
+def test_parse_mission_queue_invalid_binary():
+    invalid = FlowControlMission.model_construct(
+        valve_id=0, flow_trajectory=MISSIONS[0].flow_trajectory[::-1]
+    )
+
+    with pytest.raises(RequestValidationError) as e:
+        parse_mission_queue(encode_missions([invalid]), "application/octet-stream")
+    assert "ascending" in e.value.errors()[0]["msg"]
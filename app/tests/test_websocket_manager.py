@@ -0,0 +1,212 @@
+# pylint: disable=C0116
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+
+from app.utils.websocket_manager import Frame, OverflowPolicy, WebSocketManager
+
+
+def mock_websocket(blocked: bool = False):
+    """
+    WebSocket mock recording sent messages. A blocked mock holds every send
+    until its `unblocked` event is set, `sending` is set once a send started.
+    """
+    websocket = AsyncMock()
+    websocket.sent = []
+    websocket.send_times = []
+    websocket.sending = asyncio.Event()
+    websocket.unblocked = asyncio.Event()
+    websocket.changed = asyncio.Event()
+    if not blocked:
+        websocket.unblocked.set()
+
+    async def send(message):
+        websocket.sending.set()
+        await websocket.unblocked.wait()
+        websocket.sent.append(message.get("text", message.get("bytes")))
+        websocket.send_times.append(asyncio.get_running_loop().time())
+        websocket.changed.set()
+
+    websocket.send.side_effect = send
+    return websocket
+
+
+async def wait_sent(websocket, count: int, timeout: float = 1):
+    """Wait until `count` messages were sent to a mock WebSocket."""
+
+    async def wait():
+        while len(websocket.sent) < count:
+            websocket.changed.clear()
+            await websocket.changed.wait()
+
+    await asyncio.wait_for(wait(), timeout)
+
+
+@pytest_asyncio.fixture(name="drain_tasks", autouse=True)
+async def drain_tasks_fixture():
+    """Cancel and await the writer tasks left by a test before its loop closes."""
+    yield
+    current = asyncio.current_task()
+    tasks = [task for task in asyncio.all_tasks() if task is not current]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_does_not_wait_for_slow_client():
+    manager = WebSocketManager(queue_size=10, send_timeout=5)
+    fast, slow = mock_websocket(), mock_websocket(blocked=True)
+    await manager.connect(0, fast)
+    await manager.connect(0, slow)
+
+    await asyncio.wait_for(manager.broadcast(0, "message"), 0.1)
+    await wait_sent(fast, 1)
+    await slow.sending.wait()
+
+    assert fast.sent == ["message"]
+    assert slow.sent == []
+    manager.disconnect(0, slow)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy, expected",
+    [
+        (OverflowPolicy.DROP_OLDEST, ["0", "3", "4"]),
+        (OverflowPolicy.DROP_NEWEST, ["0", "1", "2"]),
+    ],
+)
+async def test_overflow_policy_drop(policy, expected):
+    manager = WebSocketManager(queue_size=2, overflow_policy=policy, send_timeout=5)
+    websocket = mock_websocket(blocked=True)
+    await manager.connect(0, websocket)
+
+    await manager.broadcast(0, "0")
+    await websocket.sending.wait()  # writer took the first message
+    for message in ["1", "2", "3", "4"]:
+        await manager.broadcast(0, message)
+    websocket.unblocked.set()
+    await wait_sent(websocket, 3)
+
+    assert websocket.sent == expected
+    assert manager.active_connections[0][websocket].dropped_messages == 2
+    manager.disconnect(0, websocket)
+
+
+@pytest.mark.asyncio
+async def test_overflow_policy_disconnect():
+    manager = WebSocketManager(
+        queue_size=1, overflow_policy=OverflowPolicy.DISCONNECT, send_timeout=5
+    )
+    websocket = mock_websocket(blocked=True)
+    await manager.connect(0, websocket)
+    connection = manager.active_connections[0][websocket]
+
+    for message in ["0", "1", "2"]:
+        await manager.broadcast(0, message)
+    await connection._task  # closes the WebSocket
+
+    assert not manager.active_connections[0]
+    websocket.close.assert_awaited()
+    # Disconnecting from the endpoint afterwards is a no-op
+    manager.disconnect(0, websocket)
+
+
+@pytest.mark.asyncio
+async def test_send_timeout_disconnects():
+    manager = WebSocketManager(queue_size=10, send_timeout=0.01)
+    websocket = mock_websocket(blocked=True)
+    await manager.connect(0, websocket)
+    connection = manager.active_connections[0][websocket]
+
+    await manager.broadcast(0, "message")
+    await asyncio.wait_for(connection._task, 1)
+
+    assert not manager.active_connections[0]
+    websocket.close.assert_awaited()
+
+
+@pytest.mark.asyncio
+async def test_conflate_sends_newest_message():
+    manager = WebSocketManager(conflate=True, send_timeout=5)
+    websocket = mock_websocket(blocked=True)
+    await manager.connect(0, websocket)
+
+    await manager.broadcast(0, "0")
+    await websocket.sending.wait()  # writer is sending the first message
+    for message in ["1", "2", "3"]:
+        await manager.broadcast(0, message)
+    websocket.unblocked.set()
+    await wait_sent(websocket, 2)
+
+    assert websocket.sent == ["0", "3"]
+    manager.disconnect(0, websocket)
+
+
+@pytest.mark.asyncio
+async def test_conflate_max_rate():
+    manager = WebSocketManager(conflate=True, max_rate_hz=5, send_timeout=5)
+    websocket = mock_websocket()
+    await manager.connect(0, websocket)
+
+    await manager.broadcast(0, "0")
+    await wait_sent(websocket, 1)
+    for message in ["1", "2", "3"]:
+        await manager.broadcast(0, message)
+    await wait_sent(websocket, 2)
+
+    # The next message is held back until 200 ms after the first one
+    assert websocket.sent == ["0", "3"]
+    assert websocket.send_times[1] - websocket.send_times[0] >= 0.19
+    manager.disconnect(0, websocket)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_frame_is_shared_and_retained():
+    manager = WebSocketManager(send_timeout=5)
+    first, second = mock_websocket(), mock_websocket()
+    await manager.connect(0, first)
+
+    await manager.broadcast(0, b'{"value":1}')
+    await manager.broadcast(0, "event", retain=False)
+    await manager.connect(0, second)
+    await wait_sent(first, 2)
+    await wait_sent(second, 1)
+
+    assert first.sent == ['{"value":1}', "event"]
+    # New subscribers receive the retained frame, not the unretained event
+    assert second.sent == ['{"value":1}']
+    assert first.send.call_args_list[0].args[0] is second.send.call_args.args[0]
+    manager.disconnect(0, first)
+    manager.disconnect(0, second)
+
+
+@pytest.mark.asyncio
+async def test_binary_frames():
+    manager = WebSocketManager(send_timeout=5, binary=True)
+    websocket = mock_websocket()
+    await manager.connect(0, websocket)
+
+    await manager.broadcast(0, "text")
+    await wait_sent(websocket, 1)
+
+    assert websocket.sent == [b"text"]
+    manager.disconnect(0, websocket)
+
+
+@pytest.mark.asyncio
+async def test_initial_frame_replaces_retained_and_is_not_conflated():
+    manager = WebSocketManager(send_timeout=5, conflate=True)
+    await manager.broadcast(0, "retained")
+    websocket = mock_websocket()
+
+    await manager.connect(0, websocket, initial=lambda: Frame(b"backfill", binary=True))
+    manager.publish(0, "live")
+    await wait_sent(websocket, 2)
+
+    assert websocket.sent == [b"backfill", "live"]
+    manager.disconnect(0, websocket)
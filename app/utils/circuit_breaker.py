@@ -0,0 +1,120 @@
+"""
+Circuit Breaker Module.
+
+This module defines the CircuitBreaker class which stops calls to a failing
+dependency after consecutive failures, so callers fail fast instead of
+waiting for a timeout on every call, and probes the dependency on a schedule
+until it recovers.
+"""
+
+import time
+from typing import Optional
+
+from app.models.info import CircuitState
+from app.utils.logger import logger
+
+
+class CircuitBreaker:
+    """
+    Consecutive failure circuit breaker with exponential probe backoff.
+
+    The breaker starts closed and every call is allowed. After
+    `failure_threshold` consecutive failures it opens and calls are refused
+    until `reset_timeout_s` elapsed. The next call is then allowed as a probe
+    (half-open): a success closes the breaker, a failure opens it again with
+    the reset timeout doubled, up to `max_reset_timeout_s`.
+
+    Parameters
+    ----------
+    name : str
+        Name of the protected dependency, used in log messages.
+    failure_threshold : int
+        Number of consecutive failures that open the breaker.
+    reset_timeout_s : float
+        Time in seconds the breaker stays open before the first probe.
+    max_reset_timeout_s : float, optional
+        Upper bound of the doubled reset timeout. Defaults to 60 seconds.
+
+    Attributes
+    ----------
+    state : CircuitState
+        The current state.
+    consecutive_failures : int
+        Number of failures since the last success.
+
+    Notes
+    -----
+    The breaker is not thread-safe. It is meant to be used by a single worker,
+    other threads may only read its attributes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout_s: float,
+        max_reset_timeout_s: float = 60.0,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_s = reset_timeout_s
+        self.max_reset_timeout_s = max(reset_timeout_s, max_reset_timeout_s)
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self._timeout = reset_timeout_s
+        self._retry_at: Optional[float] = None
+
+    @property
+    def retry_at(self) -> Optional[float]:
+        """
+        The `time.monotonic` time of the next probe, None unless open.
+        """
+        return self._retry_at if self.state == CircuitState.OPEN else None
+
+    def allow_request(self) -> bool:
+        """
+        Return whether a call may be attempted now.
+
+        An open breaker whose reset timeout elapsed becomes half-open and allows
+        the call as a probe. Its outcome must be recorded.
+        """
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() < self._retry_at:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            logger.info(f"Probing {self.name} after {self._timeout:.1f} s")
+        return True
+
+    def record_success(self):
+        """
+        Record a successful call, closing the breaker.
+        """
+        if self.state != CircuitState.CLOSED:
+            logger.info(f"{self.name} recovered, circuit breaker closed")
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self._timeout = self.reset_timeout_s
+        self._retry_at = None
+
+    def record_failure(self):
+        """
+        Record a failed call, opening the breaker if the threshold is reached or
+        a probe failed.
+        """
+        self.consecutive_failures += 1
+        if self.state == CircuitState.HALF_OPEN:
+            self._timeout = min(2 * self._timeout, self.max_reset_timeout_s)
+            self._open()
+        elif (
+            self.state == CircuitState.CLOSED
+            and self.consecutive_failures >= self.failure_threshold
+        ):
+            self._open()
+
+    def _open(self):
+        self.state = CircuitState.OPEN
+        self._retry_at = time.monotonic() + self._timeout
+        logger.warning(
+            f"{self.name} unavailable after {self.consecutive_failures} failure(s), "
+            f"circuit breaker open for {self._timeout:.1f} s"
+        )
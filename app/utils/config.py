@@ -19,19 +19,41 @@ class Config(BaseSettings):
     DEVICE: Union[Device, None] = None
     FLOWMETER_COUNT: int = 1
     GPIO_MODE: str = ""
+    INFLUXDB_BATCH_SIZE: int = 500
+    INFLUXDB_BREAKER_FAILURES: int = 3
+    INFLUXDB_BREAKER_RESET_S: float = 1.0
     INFLUXDB_BUCKET: str
+    INFLUXDB_FLUSH_INTERVAL_MS: int = 1000
     INFLUXDB_ORG: str
+    INFLUXDB_QUERY_CACHE_SIZE: int = 128
+    INFLUXDB_QUEUE_SIZE: int = 10000
+    INFLUXDB_SPOOL_DIR: Union[str, None] = None
+    INFLUXDB_SPOOL_MAX_BYTES: int = 104857600
     INFLUXDB_TOKEN: str
     INFLUXDB_URL: HttpUrl
     GPIOZERO_PIN_FACTORY: Union[str, None] = None
+    MISSION_CLASSIFIER_PATH: Union[str, None] = None
+    MISSION_FLOW_SENSOR_IDS: Union[str, None] = None
+    MISSION_JOURNAL_PATH: Union[str, None] = None
     MISSION_WAIT_SECONDS: int = 10
     PROJECT_NAME: str = "swncrew backend"
     PROPORTIONAL_CAN_INTERFACE: str = "can0"
+    PROPORTIONAL_CAN_NODE_IDS: str = "5"
     PROPORTIONAL_GPIO: Union[str, None] = None
     PROPORTIONAL_MODE: Literal["GPIO", "CAN"]
+    PROPORTIONAL_RPDO_HEARTBEAT_S: float = 1.0
+    PROPORTIONAL_RPDO_MODE: Literal["event", "periodic"] = "event"
+    PROPORTIONAL_RPDO_PERIOD_S: float = 0.1
     PUMP_GPIO: str
+    SENSOR_HISTORY_CAPACITY: int = 10000
     SOLENOID_GPIO: str
     VERSION: str = read_version()
+    WEBSOCKET_MAX_RATE_HZ: Union[float, None] = None
+    WEBSOCKET_OVERFLOW_POLICY: Literal["drop-oldest", "drop-newest", "disconnect"] = (
+        "drop-oldest"
+    )
+    WEBSOCKET_QUEUE_SIZE: int = 100
+    WEBSOCKET_SEND_TIMEOUT_S: float = 5.0
 
     model_config = SettingsConfigDict(env_file=".env.local")
 
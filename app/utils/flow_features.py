@@ -0,0 +1,110 @@
+"""
+Flow Features Module.
+
+This module defines the FlowFeatureAccumulator class which computes the
+classifier features of a flow control mission incrementally from the
+flowmeter readings received while the mission runs.
+"""
+
+from datetime import datetime, time
+from typing import Optional, Union
+
+from app.models.missions import FlowClassifierFeatures
+
+
+class FlowFeatureAccumulator:
+    """
+    Running statistics of the flow readings of a single mission.
+
+    Each reading updates a handful of running values, so the memory used does
+    not depend on the length of the mission. The volume is integrated with
+    the trapezoidal rule between consecutive readings.
+
+    Parameters
+    ----------
+    start : datetime | time
+        The start of the mission, used for the `Hour` feature.
+
+    Methods
+    -------
+    add(timestamp_ns, value)
+        Adds a flow reading in liters per minute.
+    features() -> Optional[FlowClassifierFeatures]
+        Returns the features of the readings added so far, if any.
+
+    Notes
+    -----
+    Readings that are not newer than the previous one are ignored. The
+    duration is the time from the first to the last reading with a positive
+    flow rate, and the mean is the volume divided by that duration.
+    """
+
+    __slots__ = (
+        "start",
+        "volume",
+        "peak",
+        "first_flow_ns",
+        "last_flow_ns",
+        "last_ns",
+        "last_value",
+    )
+
+    def __init__(self, start: Union[datetime, time]):
+        self.start = start
+        self.volume = 0.0
+        self.peak = 0.0
+        self.first_flow_ns: Optional[int] = None
+        self.last_flow_ns: Optional[int] = None
+        self.last_ns: Optional[int] = None
+        self.last_value = 0.0
+
+    def add(self, timestamp_ns: int, value: float) -> None:
+        """
+        Add a flow reading.
+
+        Parameters
+        ----------
+        timestamp_ns : int
+            Timestamp of the reading in nanoseconds since Epoch.
+        value : float
+            The flow rate in liters per minute.
+        """
+        if self.last_ns is not None:
+            if timestamp_ns <= self.last_ns:
+                return
+            minutes = (timestamp_ns - self.last_ns) / 60e9
+            self.volume += (self.last_value + value) / 2 * minutes
+
+        if value > 0:
+            if self.first_flow_ns is None:
+                self.first_flow_ns = timestamp_ns
+            self.last_flow_ns = timestamp_ns
+            self.peak = max(self.peak, value)
+
+        self.last_ns = timestamp_ns
+        self.last_value = value
+
+    def features(self) -> Optional[FlowClassifierFeatures]:
+        """
+        Return the features of the readings added so far.
+
+        Returns
+        -------
+        Optional[FlowClassifierFeatures]
+            Volume, mean and peak flow rate, duration and start hour of the flow,
+            or None if no reading was added.
+        """
+        if self.last_ns is None:
+            return None
+        duration = (
+            (self.last_flow_ns - self.first_flow_ns) / 1e9
+            if self.first_flow_ns is not None
+            else 0.0
+        )
+        return FlowClassifierFeatures(
+            Volume=self.volume,
+            Mean=self.volume / (duration / 60) if duration > 0 else 0.0,
+            Peak=self.peak,
+            Duration=duration,
+            Hour=self.start.hour + self.start.minute / 60 + self.start.second / 3600,
+        )
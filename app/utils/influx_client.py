@@ -1,20 +1,49 @@
+import queue
+import threading
 import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Deque, List, Optional, Tuple
 from influxdb_client import InfluxDBClient, Point, WritePrecision
 from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client.rest import ApiException
 
 from app.models.actuators import Actuator, ActuatorEnum
+from app.models.info import InfluxWriterStats
 from app.models.missions import CompletedFlowControlMission
-from app.models.sensors import Sensor
+from app.models.sensors import Sensor, SensorReadingSeries
+from app.utils.circuit_breaker import CircuitBreaker
 from app.utils.config import settings
+from app.utils.influx_spool import InfluxSpool
 from app.utils.logger import logger
 
+_STOP = object()
+
+# Upper bound of the time the circuit breaker stays open between probes
+BREAKER_RESET_MAX_S = 60.0
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+SENSOR_HISTORY_QUERY = """
+from(bucket: bucket_name)
+  |> range(start: time(v: start_ns), stop: time(v: stop_ns))
+  |> filter(fn: (r) => r._measurement == measurement and r._field == "reading")
+  |> filter(fn: (r) => r.id == sensor_id)
+  |> aggregateWindow(
+    every: duration(v: every_ns), fn: mean, createEmpty: false, timeSrc: "_start"
+  )
+"""
+
 
 class InfluxConnector:
     """
     Summary
     ----------
-    Provides a synchronous interface for writing data to an InfluxDB instance.
+    Provides a non-blocking interface for writing data to an InfluxDB instance.
     Handles sensor and actuator data writes with automatic point generation.
+    Points are put on a bounded in-memory queue and written in batches by a
+    background thread, so callers never wait for the HTTP round trip.
 
     Parameters
     ----------
@@ -26,6 +55,20 @@ class InfluxConnector:
         InfluxDB organization ( defaults to `settings.INFLUXDB_ORG` )
     bucket : str, optional
         Target InfluxDB bucket for writes ( defaults to `settings.INFLUXDB_BUCKET` )
+    batch_size : int, optional
+        Maximum number of points per write request ( defaults to `settings.INFLUXDB_BATCH_SIZE` )
+    flush_interval_ms : int, optional
+        Maximum time a point waits before its batch is written ( defaults to `settings.INFLUXDB_FLUSH_INTERVAL_MS` )
+    queue_size : int, optional
+        Capacity of the write queue in points ( defaults to `settings.INFLUXDB_QUEUE_SIZE` )
+    spool_dir : str, optional
+        Directory of the disk spool for failed writes ( defaults to `settings.INFLUXDB_SPOOL_DIR` )
+    spool_max_bytes : int, optional
+        Maximum size of the disk spool ( defaults to `settings.INFLUXDB_SPOOL_MAX_BYTES` )
+    breaker_failures : int, optional
+        Consecutive failed writes that open the circuit breaker ( defaults to `settings.INFLUXDB_BREAKER_FAILURES` )
+    breaker_reset_s : float, optional
+        Time the circuit breaker stays open before the first probe ( defaults to `settings.INFLUXDB_BREAKER_RESET_S` )
 
     Attributes
     ----------
@@ -34,7 +77,25 @@ class InfluxConnector:
     client : InfluxDBClient
         Underlying InfluxDB client instance.
     write_api : WriteApi
-        Synchronous write API for the InfluxDB client.
+        Synchronous write API, only used by the background writer thread.
+    query_api : QueryApi
+        Blocking query API.
+    dropped_points : int
+        Number of points discarded because the queue was full or the connector closed.
+    written_points : int
+        Number of points successfully written to InfluxDB.
+    failed_points : int
+        Number of points lost to failed write requests.
+    spool : InfluxSpool, optional
+        Disk spool of points whose write failed, None if disabled.
+    spooled_points : int
+        Number of points written to the spool.
+    replayed_points : int
+        Number of spooled points written to InfluxDB.
+    held : Deque[Point]
+        Points of failed writes kept in memory for a retry if no spool is configured.
+    breaker : CircuitBreaker
+        Circuit breaker of the write requests.
 
     Methods
     ----------
@@ -42,8 +103,16 @@ class InfluxConnector:
         Writes a sensor reading to InfluxDB.
     write_actuator(actuator, timestamp_ns)
         Writes an actuator state to InfluxDB with a specified timestamp.
+    query_sensor_readings(measurement, sensor_id, start_ns, stop_ns, every_ns)
+        Queries the mean readings of a sensor per time window.
+    flush(timeout)
+        Blocks until every point queued so far has been handed to InfluxDB.
+    close(timeout)
+        Flushes the queue, stops the background writer and closes the client.
+    get_stats()
+        Returns queue depth and write counters.
     _write(point)
-        Internal method for writing a pre-constructed InfluxDB point.
+        Internal method for queueing pre-constructed InfluxDB points.
 
     Raises
     ----------
@@ -52,7 +121,18 @@ class InfluxConnector:
 
     Notes
     -----
-    This class is designed for synchronous use. For asynchronous operations, consider using the asynchronous InfluxDB client.
+    All public write methods return immediately. A batch is written once it reaches
+    `batch_size` points or `flush_interval_ms` elapsed, whichever comes first.
+    If a write fails and a spool is configured, the batch is appended to the spool
+    as line protocol and replayed by the writer thread, one segment at a time.
+    Batches rejected by InfluxDB as invalid are not spooled. Without a spool,
+    failed batches are held in memory instead, up to `queue_size` points, and
+    retried the same way.
+    After `breaker_failures` consecutive failed writes the circuit breaker opens:
+    batches go straight to the spool or the held points instead of waiting for
+    the request timeout. A single write, preferably a retry of spooled or held
+    points, probes InfluxDB once the breaker reset time elapsed, which doubles
+    on every failed probe up to `BREAKER_RESET_MAX_S`.
     Instance configuration is primarily driven by the application's settings module.
     """
 
@@ -62,6 +142,13 @@ class InfluxConnector:
         token=settings.INFLUXDB_TOKEN,
         org=settings.INFLUXDB_ORG,
         bucket=settings.INFLUXDB_BUCKET,
+        batch_size=settings.INFLUXDB_BATCH_SIZE,
+        flush_interval_ms=settings.INFLUXDB_FLUSH_INTERVAL_MS,
+        queue_size=settings.INFLUXDB_QUEUE_SIZE,
+        spool_dir=settings.INFLUXDB_SPOOL_DIR,
+        spool_max_bytes=settings.INFLUXDB_SPOOL_MAX_BYTES,
+        breaker_failures=settings.INFLUXDB_BREAKER_FAILURES,
+        breaker_reset_s=settings.INFLUXDB_BREAKER_RESET_S,
     ):
 
         self.bucket = bucket
@@ -74,6 +161,28 @@ class InfluxConnector:
         )
 
         self.write_api = self.client.write_api(write_options=SYNCHRONOUS)
+        self.query_api = self.client.query_api()
+
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.dropped_points = 0
+        self.written_points = 0
+        self.failed_points = 0
+        self._closed = False
+
+        self.spool = InfluxSpool(spool_dir, spool_max_bytes) if spool_dir else None
+        self.spooled_points = 0
+        self.replayed_points = 0
+        self.held: Deque[Point] = deque()
+        self.breaker = CircuitBreaker(
+            "InfluxDB", breaker_failures, breaker_reset_s, BREAKER_RESET_MAX_S
+        )
+
+        self._worker = threading.Thread(
+            target=self._run, name="influx-writer", daemon=True
+        )
+        self._worker.start()
 
     def write_sensor(self, sensor: Sensor):
         """
@@ -111,7 +220,36 @@ class InfluxConnector:
         )
         self._write(point)
 
-    def write_actuator(self, actuator: Actuator, timestamp_ns: int):
+    def write_sensor_readings(
+        self, readings: List[Tuple[Sensor, SensorReadingSeries]]
+    ):
+        """
+        Summary
+        ----------
+        Writes series of readings of one or more sensors to InfluxDB as a single batch.
+
+        **Parameters**
+        ----------
+        readings : List[Tuple[Sensor, SensorReadingSeries]]
+            Pairs of a sensor and the readings recorded for it. The current setpoint
+            of the sensor is written alongside every reading.
+
+        See Also
+        ----------
+        write_sensor : Writes the current reading of a single sensor.
+        """
+        points = [
+            Point(sensor.type.value)
+            .field(field="reading", value=value)
+            .field(field="setpoint", value=sensor.setpoint)
+            .tag(key="id", value=sensor.id)
+            .time(time=timestamp_ns, write_precision=WritePrecision.NS)
+            for sensor, series in readings
+            for timestamp_ns, value in zip(series.timestamp_ns, series.value)
+        ]
+        self._write(points)
+
+    def write_actuator(self, actuator: Actuator, timestamp_ns: Optional[int] = None):
         """
         Summary
         ----------
@@ -138,14 +276,33 @@ class InfluxConnector:
         _write : Internal method for writing InfluxDB points.
         time.time_ns : Function for retrieving the current time in nanoseconds.
         """
-        point = (
+        self.write_actuators([actuator], timestamp_ns)
+
+    def write_actuators(
+        self, actuators: List[Actuator], timestamp_ns: Optional[int] = None
+    ):
+        """
+        Writes the states of several actuators to InfluxDB in a single batch.
+
+        Parameters
+        ----------
+        actuators : List[Actuator]
+            Actuator objects containing the type, ID, and current state.
+        timestamp_ns : int, optional
+            Timestamp in nanoseconds shared by all points, taken once when
+            omitted.
+        """
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        points = [
             Point(actuator.type.value)
             .field(field="state", value=actuator.state)
             .tag(key="id", value=actuator.id)
             .tag(key="type", value="set")
             .time(time=timestamp_ns, write_precision=WritePrecision.NS)
-        )
-        self._write(point)
+            for actuator in actuators
+        ]
+        self._write(points)
 
     def write_current_proportional_position(
         self,
@@ -183,6 +340,32 @@ class InfluxConnector:
         )
         self._write(point)
 
+    def write_current_proportional_positions(
+        self, positions: List[Tuple[int, float, int]]
+    ):
+        """
+        Writes a batch of current proportional positions to the InfluxDB database.
+
+        Parameters
+        ----------
+        positions : List[Tuple[int, float, int]]
+            Tuples of the proportional actuator ID, its current position and the
+            timestamp of the measurement in nanoseconds.
+
+        See Also
+        --------
+        write_current_proportional_position : Writes a single position.
+        """
+        points = [
+            Point(ActuatorEnum.PROPORTIONAL.value)
+            .field(field="state", value=current_position)
+            .tag(key="id", value=proportional_id)
+            .tag(key="type", value="current")
+            .time(time=timestamp_ns, write_precision=WritePrecision.NS)
+            for proportional_id, current_position, timestamp_ns in positions
+        ]
+        self._write(points)
+
     def write_completed_flow_control_mission(
         self, mission: CompletedFlowControlMission
     ):
@@ -219,6 +402,8 @@ class InfluxConnector:
         - Mission-specific tags like 'actual end use', 'actual start time', 'actual duration',
         and 'valve id'.
         - An 'end timestamp [ns]' tag set to `mission.end_ns`.
+        - The start, end and maximum timing errors of the trajectory, if known.
+        - The measured flow features (Volume, Mean, Peak, Duration, Hour), if known.
         - The time set to `mission.start_ns` with nanosecond precision.
 
         The constructed point is then written to the InfluxDB database using the
@@ -227,6 +412,9 @@ class InfluxConnector:
         point = (
             Point("Flow Control Mission")
             .field("end timestamp [s]", mission.end_ts.timestamp())
+            .field("start timing error [s]", mission.start_timing_error_s)
+            .field("end timing error [s]", mission.end_timing_error_s)
+            .field("max timing error [s]", mission.max_timing_error_s)
             .tag("actual end use", mission.flow_control_mission.actual_end_use.value)
             .tag("actual start time", mission.flow_control_mission.actual_start_time)
             .tag(
@@ -236,14 +424,317 @@ class InfluxConnector:
             .tag("valve id", mission.flow_control_mission.valve_id)
             .time(time=mission.start_ts, write_precision=WritePrecision.NS)
         )
+        if mission.features is not None:
+            for name, value in mission.features.model_dump().items():
+                point.field(name, value)
         logger.debug(f"Writing mission to InfluxDB: {mission}")
         self._write(point)
 
+    def query_sensor_readings(
+        self,
+        measurement: str,
+        sensor_id: int,
+        start_ns: int,
+        stop_ns: int,
+        every_ns: int,
+    ) -> SensorReadingSeries:
+        """
+        Summary
+        ----------
+        Queries the readings of a sensor downsampled by InfluxDB to the mean per window.
+
+        **Parameters**
+        ----------
+        measurement : str
+            The measurement of the sensor type, e.g. `flowmeter`.
+        sensor_id : int
+            The ID of the sensor.
+        start_ns : int
+            Start of the queried range in nanoseconds since Epoch, inclusive.
+        stop_ns : int
+            End of the queried range in nanoseconds since Epoch, exclusive.
+        every_ns : int
+            Length of the windows in nanoseconds.
+
+        **Returns**
+        ----------
+        SensorReadingSeries
+            The mean reading of every window that contains readings, timestamped
+            with the start of the window.
+
+        Notes
+        -----
+        The query blocks until InfluxDB answered, call it from a worker thread.
+        Timestamps are returned with microsecond precision.
+        """
+        tables = self.query_api.query(
+            SENSOR_HISTORY_QUERY,
+            params={
+                "bucket_name": self.bucket,
+                "measurement": measurement,
+                "sensor_id": str(sensor_id),
+                "start_ns": start_ns,
+                "stop_ns": stop_ns,
+                "every_ns": every_ns,
+            },
+        )
+        series = SensorReadingSeries.model_construct(timestamp_ns=[], value=[])
+        for table in tables:
+            for record in table.records:
+                series.timestamp_ns.append(
+                    (record.get_time() - _EPOCH) // timedelta(microseconds=1) * 1000
+                )
+                series.value.append(record.get_value())
+        return series
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write every point queued so far without waiting for the flush interval.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum time in seconds to wait for the writer thread.
+
+        Returns
+        -------
+        bool
+            True if the queued points were handed to InfluxDB within `timeout`.
+        """
+        if self._closed or not self._worker.is_alive():
+            return False
+
+        flushed = threading.Event()
+        try:
+            self.queue.put(flushed, timeout=timeout)
+        except queue.Full:
+            return False
+        return flushed.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Flush pending points, stop the writer thread and close the client.
+
+        Points written after `close` are counted as dropped.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum time in seconds to wait for the pending points to be written.
+        """
+        if self._closed:
+            return
+
+        self.flush(timeout)
+        self._closed = True
+        self.queue.put(_STOP)
+        self._worker.join(timeout)
+        self.client.close()
+        logger.info(
+            f"InfluxDB writer closed (written: {self.written_points}, "
+            f"failed: {self.failed_points}, dropped: {self.dropped_points})"
+        )
+
+    def get_stats(self) -> InfluxWriterStats:
+        """
+        Return the current state of the write queue.
+
+        Returns
+        -------
+        InfluxWriterStats
+            Queue depth and capacity together with the write and drop counters.
+        """
+        return InfluxWriterStats(
+            queue_depth=self.queue.qsize(),
+            queue_size=self.queue.maxsize,
+            written_points=self.written_points,
+            failed_points=self.failed_points,
+            dropped_points=self.dropped_points,
+            spooled_points=self.spooled_points,
+            replayed_points=self.replayed_points,
+            spool_dropped_points=self.spool.dropped_points if self.spool else 0,
+            spool_bytes=self.spool.size_bytes if self.spool else 0,
+            spool_lag_s=self.spool.lag_seconds() if self.spool else None,
+            held_points=len(self.held),
+            breaker_state=self.breaker.state,
+            consecutive_failures=self.breaker.consecutive_failures,
+        )
+
     def _write(self, point):
+        points = point if isinstance(point, list) else [point]
+        if self._closed:
+            self._drop(len(points))
+            return
+
+        for index, item in enumerate(points):
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self._drop(len(points) - index)
+                return
+
+    def _drop(self, count: int):
+        self.dropped_points += count
+        logger.warning(
+            f"InfluxDB write queue unavailable, dropped {count} point(s) "
+            f"(total: {self.dropped_points})"
+        )
+
+    def _run(self):
+        batch: List[Point] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            wakeup = deadline
+            if self.spool or self.held:
+                retry_at = self.breaker.retry_at
+                wakeup = min(wakeup, retry_at if retry_at is not None else 0.0)
+            try:
+                item = self.queue.get(timeout=max(0.0, wakeup - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._write_batch(batch)
+                if self.held and self.breaker.allow_request():
+                    self._retry_held()
+                if self.held:
+                    self.failed_points += len(self.held)
+                    logger.error(
+                        f"InfluxDB writer closed with {len(self.held)} held point(s)"
+                    )
+                return
+            if isinstance(item, threading.Event):
+                self._write_batch(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                item.set()
+                continue
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write_batch(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+            if (self.spool or self.held) and self.breaker.allow_request():
+                if self.spool:
+                    self._replay()
+                else:
+                    self._retry_held()
+
+    def _write_batch(self, batch: List[Point]):
+        if not batch:
+            return
+        if not self.breaker.allow_request():
+            if self.spool is None:
+                self._hold(batch, None)
+                return
+            self._spool(batch, None)
+            return
+        try:
+            self.write_api.write(bucket=self.bucket, record=batch)
+            self.written_points += len(batch)
+            self.breaker.record_success()
+        except Exception as e:
+            if _is_rejected(e):
+                # InfluxDB answered, only the data is at fault
+                self.breaker.record_success()
+                self.failed_points += len(batch)
+                logger.error(f"Failed to write to InfluxDB: {e}")
+                return
+            self.breaker.record_failure()
+            if self.spool is None:
+                self._hold(batch, e)
+                return
+            self._spool(batch, e)
+
+    def _hold(self, batch: List[Point], error: Optional[Exception]):
+        self.held.extend(batch)
+        overflow = len(self.held) - self.queue.maxsize
+        if overflow > 0:
+            for _ in range(overflow):
+                self.held.popleft()
+            self.dropped_points += overflow
+            logger.warning(
+                f"InfluxDB retry buffer full, dropped {overflow} point(s) "
+                f"(total: {self.dropped_points})"
+            )
+        if error is not None:
+            logger.warning(
+                f"Failed to write to InfluxDB, holding {len(self.held)} point(s) "
+                f"for a retry: {error}"
+            )
+
+    def _retry_held(self):
+        while self.held:
+            chunk = list(islice(self.held, self.batch_size))
+            try:
+                self.write_api.write(bucket=self.bucket, record=chunk)
+            except Exception as e:
+                if not _is_rejected(e):
+                    self.breaker.record_failure()
+                    logger.warning(f"Retrying held points failed: {e}")
+                    return
+                self.failed_points += len(chunk)
+                logger.error(f"InfluxDB rejected held points, discarded them: {e}")
+            else:
+                self.written_points += len(chunk)
+            self.breaker.record_success()
+            for _ in chunk:
+                self.held.popleft()
+
+    def _spool(self, batch: List[Point], error: Optional[Exception]):
+        lines = [line for line in (point.to_line_protocol() for point in batch) if line]
+        try:
+            self.spool.append(lines)
+        except OSError as e:
+            self.failed_points += len(batch)
+            logger.error(f"Failed to write to InfluxDB: {error}, spooling failed: {e}")
+            return
+
+        self.spooled_points += len(lines)
+        if error is None:
+            logger.debug(
+                f"InfluxDB circuit breaker open, spooled {len(lines)} point(s)"
+            )
+            return
+        logger.warning(
+            f"Failed to write to InfluxDB, spooled {len(lines)} point(s): {error}"
+        )
+
+    def _replay(self):
+        lines = self.spool.read_oldest()
         try:
-            self.write_api.write(bucket=self.bucket, record=point)
+            for start in range(0, len(lines), self.batch_size):
+                self.write_api.write(
+                    bucket=self.bucket, record=lines[start : start + self.batch_size]
+                )
         except Exception as e:
-            logger.error(f"Failed to write to InfluxDB: {e}")
+            if _is_rejected(e):
+                self.breaker.record_success()
+                self.failed_points += self.spool.remove_oldest()
+                logger.error(f"InfluxDB rejected a spool segment, discarded it: {e}")
+                return
+            self.breaker.record_failure()
+            logger.warning(f"Spool replay failed: {e}")
+            return
+
+        self.breaker.record_success()
+        self.replayed_points += self.spool.remove_oldest()
+        if not self.spool:
+            logger.info(f"InfluxDB spool replayed (total: {self.replayed_points})")
+
+
+def _is_rejected(error: Exception) -> bool:
+    """Whether InfluxDB refused the data itself, so retrying cannot succeed."""
+    return (
+        isinstance(error, ApiException)
+        and error.status is not None
+        and 400 <= error.status < 500
+        and error.status not in (401, 403, 404, 429)
+    )
 
 
 influx_connector = InfluxConnector()
@@ -0,0 +1,178 @@
+"""
+InfluxDB Spool Module.
+
+This module defines the InfluxSpool class, a bounded on-disk log of points
+that could not be written to InfluxDB. Points are stored as line protocol in
+numbered segment files, appended at the newest segment and replayed and
+removed from the oldest one, so they survive network outages and restarts.
+"""
+
+import os
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+from app.utils.logger import logger
+
+SEGMENT_SUFFIX = ".lp"
+
+
+class InfluxSpool:
+    """
+    Segmented on-disk log of line protocol points.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the segment files, created if missing. Segments left by
+        a previous run are picked up for replay.
+    max_bytes : int
+        Maximum size of all segments. The oldest segments are deleted when
+        appending exceeds it.
+    segment_bytes : int, optional
+        Size after which a new segment is started. Defaults to 1 MiB.
+
+    Attributes
+    ----------
+    size_bytes : int
+        Total size of all segments.
+    dropped_points : int
+        Number of spooled points deleted to stay within `max_bytes`.
+
+    Notes
+    -----
+    The spool is not thread-safe, only the InfluxDB writer thread modifies it.
+    Other threads may read `size_bytes`, the number of segments and the lag.
+    A segment is only removed after it was replayed completely, so points of a
+    partially replayed segment may be written twice. InfluxDB overwrites
+    points with the same series and timestamp, so this is harmless.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, segment_bytes: int = 1 << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = max(1, min(segment_bytes, max_bytes))
+        self.dropped_points = 0
+        os.makedirs(directory, exist_ok=True)
+
+        names = sorted(
+            name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX)
+        )
+        self.segments: Deque[str] = deque(
+            os.path.join(directory, name) for name in names
+        )
+        if self.segments:
+            self._truncate_partial_line(self.segments[-1])
+        self.size_bytes = sum(os.path.getsize(path) for path in self.segments)
+        self._next_index = int(names[-1][: -len(SEGMENT_SUFFIX)]) + 1 if names else 0
+        self._oldest_ns = self._read_oldest_ns()
+        if self.segments:
+            logger.info(
+                f"Found {len(self.segments)} InfluxDB spool segment(s) "
+                f"({self.size_bytes} bytes) to replay"
+            )
+
+    def __bool__(self) -> bool:
+        return bool(self.segments)
+
+    def append(self, lines: List[str]):
+        """
+        Append points to the newest segment.
+
+        Parameters
+        ----------
+        lines : List[str]
+            The points in line protocol, without line breaks.
+        """
+        data = "".join(line + "\n" for line in lines).encode()
+        if not data:
+            return
+
+        if (
+            not self.segments
+            or os.path.getsize(self.segments[-1]) + len(data) > self.segment_bytes
+        ):
+            self.segments.append(
+                os.path.join(
+                    self.directory, f"{self._next_index:016d}{SEGMENT_SUFFIX}"
+                )
+            )
+            self._next_index += 1
+
+        with open(self.segments[-1], "ab") as segment:
+            segment.write(data)
+        self.size_bytes += len(data)
+        if self._oldest_ns is None:
+            self._oldest_ns = self._read_oldest_ns()
+
+        while self.size_bytes > self.max_bytes and len(self.segments) > 1:
+            dropped = self.remove_oldest()
+            self.dropped_points += dropped
+            logger.warning(
+                f"InfluxDB spool full, dropped {dropped} spooled point(s) "
+                f"(total: {self.dropped_points})"
+            )
+
+    def read_oldest(self) -> List[str]:
+        """
+        Return the points of the oldest segment.
+
+        Returns
+        -------
+        List[str]
+            The points in line protocol, empty if the spool is empty.
+        """
+        if not self.segments:
+            return []
+        with open(self.segments[0], "rb") as segment:
+            return segment.read().decode().splitlines()
+
+    def remove_oldest(self) -> int:
+        """
+        Delete the oldest segment, e.g. after it was replayed.
+
+        Returns
+        -------
+        int
+            The number of points in the deleted segment.
+        """
+        path = self.segments.popleft()
+        with open(path, "rb") as segment:
+            data = segment.read()
+        os.remove(path)
+        self.size_bytes -= len(data)
+        self._oldest_ns = self._read_oldest_ns()
+        return data.count(b"\n")
+
+    def lag_seconds(self) -> Optional[float]:
+        """
+        Return the age of the oldest spooled point.
+
+        Returns
+        -------
+        float, optional
+            Seconds since the timestamp of the oldest point, None if the spool
+            is empty.
+        """
+        oldest_ns = self._oldest_ns
+        if oldest_ns is None:
+            return None
+        return max(0.0, (time.time_ns() - oldest_ns) / 1e9)
+
+    def _read_oldest_ns(self) -> Optional[int]:
+        if not self.segments:
+            return None
+        with open(self.segments[0], "rb") as segment:
+            first_line = segment.readline()
+        try:
+            return int(first_line.rsplit(b" ", 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    @staticmethod
+    def _truncate_partial_line(path: str):
+        # A crash while appending can leave an incomplete last line
+        with open(path, "rb+") as segment:
+            data = segment.read()
+            if data and not data.endswith(b"\n"):
+                segment.truncate(data.rfind(b"\n") + 1)
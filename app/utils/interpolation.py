@@ -0,0 +1,131 @@
+"""
+Trajectory Interpolation Module.
+
+This module generates the setpoints of a flow control mission from a sparse
+trajectory. Setpoints are produced lazily while the mission runs, so a
+resampled trajectory is never held in memory.
+
+Every generated setpoint is a `TrajectoryPoint` with the same meaning as in
+the trajectory itself: its flow rate applies until its time is reached.
+"""
+
+from array import array
+from typing import Callable, Iterator, Optional
+
+from app.models.missions import InterpolationMode, Trajectory, TrajectoryPoint
+
+
+def interpolate(
+    trajectory: Trajectory,
+    mode: InterpolationMode = InterpolationMode.STEP,
+    sample_rate_hz: Optional[float] = None,
+) -> Iterator[TrajectoryPoint]:
+    """
+    Generate the setpoints of a trajectory.
+
+    With `step` interpolation the trajectory points are the setpoints. With
+    `linear` and `cubic` interpolation the points are knots: the first flow
+    rate is held until the first time, and in between the trajectory is
+    sampled at `sample_rate_hz` until the last time.
+
+    Parameters
+    ----------
+    trajectory : Trajectory
+        The sparse trajectory.
+    mode : InterpolationMode, optional
+        How setpoints are generated between the points. Defaults to `step`.
+    sample_rate_hz : float, optional
+        The rate of the generated setpoints, required unless `mode` is `step`.
+
+    Yields
+    ------
+    TrajectoryPoint
+        The next setpoint and the time until which it applies.
+
+    Raises
+    ------
+    ValueError
+        If `mode` requires a sample rate and none is given.
+    """
+    if mode == InterpolationMode.STEP:
+        yield from trajectory
+        return
+    if not sample_rate_hz:
+        raise ValueError(f"A sample rate is required for {mode.value} interpolation")
+
+    times, values = _knots(trajectory)
+    if mode == InterpolationMode.LINEAR:
+        evaluate = _linear(times, values)
+    else:
+        evaluate = _monotone_cubic(times, values)
+
+    period = 1 / sample_rate_hz
+    end = times[-1]
+    segment = 0
+    sample = 0
+    # Sample times are computed from the index so rounding does not add up
+    start = 0.0
+    while start < end:
+        while segment < len(times) - 2 and times[segment + 1] <= start:
+            segment += 1
+        sample += 1
+        stop = min(sample * period, end)
+        yield TrajectoryPoint(stop, evaluate(segment, start))
+        start = stop
+
+
+def _knots(trajectory: Trajectory):
+    times, values = array("d", trajectory.times), array("d", trajectory.flow_rates)
+    # The first flow rate applies from the start of the mission
+    if times[0] > 0:
+        times.insert(0, 0.0)
+        values.insert(0, values[0])
+    return times, values
+
+
+def _linear(times: array, values: array) -> Callable[[int, float], float]:
+    def evaluate(segment: int, x: float) -> float:
+        if len(times) == 1:
+            return values[0]
+        x0, x1 = times[segment], times[segment + 1]
+        y0, y1 = values[segment], values[segment + 1]
+        return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+    return evaluate
+
+
+def _monotone_cubic(times: array, values: array) -> Callable[[int, float], float]:
+    """
+    Piecewise cubic Hermite interpolation with Fritsch-Butland tangents.
+
+    The interpolant is monotone between the knots, so it never overshoots
+    them and never produces a negative flow rate from non-negative knots.
+    """
+    n = len(times)
+    if n == 1:
+        return lambda segment, x: values[0]
+
+    widths = [times[k + 1] - times[k] for k in range(n - 1)]
+    secants = [(values[k + 1] - values[k]) / widths[k] for k in range(n - 1)]
+
+    tangents = array("d", [0.0] * n)
+    tangents[0], tangents[-1] = secants[0], secants[-1]
+    for k in range(1, n - 1):
+        left, right = secants[k - 1], secants[k]
+        if left * right > 0:
+            w1 = 2 * widths[k] + widths[k - 1]
+            w2 = widths[k] + 2 * widths[k - 1]
+            tangents[k] = (w1 + w2) / (w1 / left + w2 / right)
+
+    def evaluate(segment: int, x: float) -> float:
+        h = widths[segment]
+        t = (x - times[segment]) / h
+        t2, t3 = t * t, t * t * t
+        return (
+            (2 * t3 - 3 * t2 + 1) * values[segment]
+            + (t3 - 2 * t2 + t) * h * tangents[segment]
+            + (-2 * t3 + 3 * t2) * values[segment + 1]
+            + (t3 - t2) * h * tangents[segment + 1]
+        )
+
+    return evaluate
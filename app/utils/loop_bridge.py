@@ -0,0 +1,93 @@
+"""
+Event Loop Bridge Module.
+
+This module defines the LoopBridge class which hands values produced on
+foreign threads, such as the python-can notifier thread, to a handler running
+on the asyncio event loop.
+"""
+
+import asyncio
+from collections import deque
+from typing import Callable, Deque, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LoopBridge(Generic[T]):
+    """
+    Thread-safe hand-over of values from any thread to the asyncio event loop.
+
+    Producers append to a deque, which is safe without a lock. Only the first
+    value after a drain schedules the handler with `call_soon_threadsafe`, so a
+    burst of values costs a single wake-up of the loop and reaches the handler
+    as one batch.
+
+    Parameters
+    ----------
+    handler : Callable[[List[T]], None]
+        Called on the event loop with all values pushed since the last call.
+    maxlen : int, optional
+        Maximum number of values kept while the loop is busy or not attached;
+        the oldest values are discarded first. Defaults to 1000.
+
+    Methods
+    -------
+    attach(loop)
+        Sets the event loop the handler runs on.
+    push(value)
+        Hands a value to the event loop, callable from any thread.
+    """
+
+    def __init__(self, handler: Callable[[List[T]], None], maxlen: int = 1000):
+        self._handler = handler
+        self._values: Deque[T] = deque(maxlen=maxlen)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._scheduled = False
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Set the event loop the handler runs on.
+
+        Values pushed before the loop was attached are delivered right away.
+
+        Parameters
+        ----------
+        loop : asyncio.AbstractEventLoop
+            The running event loop of the application.
+        """
+        self._loop = loop
+        if self._values:
+            self._schedule()
+
+    def push(self, value: T) -> None:
+        """
+        Hand a value to the event loop without blocking.
+
+        Parameters
+        ----------
+        value : T
+            The value passed to the handler with the next batch.
+        """
+        self._values.append(value)
+        if not self._scheduled:
+            self._schedule()
+
+    def _schedule(self):
+        if self._loop is None:
+            return
+        self._scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._drain)
+        except RuntimeError:
+            # The loop was closed, e.g. during shutdown
+            self._scheduled = False
+
+    def _drain(self):
+        # Clear the flag before taking the values, so a value pushed meanwhile
+        # is either part of this batch or schedules the next one
+        self._scheduled = False
+        batch = []
+        while self._values:
+            batch.append(self._values.popleft())
+        if batch:
+            self._handler(batch)
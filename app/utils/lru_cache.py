@@ -0,0 +1,94 @@
+"""
+LRU Cache Module.
+
+This module defines the LRUCache class, a size bounded mapping that evicts
+the least recently used entry first. Entries can additionally expire after a
+time to live, e.g. query results covering data that may still change.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """
+    Least recently used cache with optional per entry expiry.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of entries. A size of 0 disables the cache.
+
+    Attributes
+    ----------
+    hits : int
+        Number of lookups answered from the cache.
+    misses : int
+        Number of lookups of missing or expired entries.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[V, Optional[float]]]" = (
+            OrderedDict()
+        )
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """
+        Returns the value of a key and marks it as recently used.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key of the entry.
+
+        Returns
+        -------
+        V, optional
+            The value, or None if the key is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires = entry
+            if expires is None or time.monotonic() < expires:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: V, ttl: Optional[float] = None):
+        """
+        Stores a value, evicting the least recently used entry if full.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key of the entry.
+        value : V
+            The value to store.
+        ttl : float, optional
+            Time in seconds after which the entry expires. Never expires if None.
+        """
+        if self.max_size <= 0:
+            return
+        expires = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,105 @@
+"""
+Response Cache Module.
+
+This module defines the JSONResponseCache class which keeps the serialized
+JSON body of a frequently polled response until the state it is rendered from
+changes.
+
+The state is identified by a version, e.g. a tuple of the `state_version`
+counters of the services involved. The body is only rendered and serialized
+again when the version differs from the cached one, and it is served with an
+ETag derived from the version, so clients polling with `If-None-Match` receive
+an empty `304 Not Modified` while nothing changed.
+"""
+
+import uuid
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# Versions restart with the process, the ETag must not match across restarts
+PROCESS_ID = uuid.uuid4().hex[:8]
+
+
+class JSONResponseCache:
+    """
+    Cached JSON response of a versioned state.
+
+    Parameters
+    ----------
+    adapter : TypeAdapter
+        Serializes the rendered value to JSON.
+    version : Callable[[], Hashable]
+        Returns the current version of the state. It must change whenever the
+        rendered value would change.
+    render : Callable[[], Any]
+        Returns the current value of the state.
+    """
+
+    def __init__(
+        self,
+        adapter: TypeAdapter,
+        version: Callable[[], Hashable],
+        render: Callable[[], Any],
+    ):
+        self.adapter = adapter
+        self.version = version
+        self.render = render
+        self._version: Optional[Hashable] = None
+        self._body = b""
+        self._etag = ""
+
+    def clear(self):
+        """
+        Discards the cached body, it is rendered again on the next request.
+        """
+        self._version = None
+        self._etag = ""
+
+    def get(self) -> Tuple[bytes, str]:
+        """
+        Returns the serialized body and ETag of the current state.
+        """
+        version = self.version()
+        if version != self._version or not self._etag:
+            self._body = self.adapter.dump_json(self.render())
+            self._etag = f'"{PROCESS_ID}-{_format_version(version)}"'
+            self._version = version
+        return self._body, self._etag
+
+    def response(self, if_none_match: Optional[str] = None) -> Response:
+        """
+        Returns the response to a request for the current state.
+
+        Parameters
+        ----------
+        if_none_match : str, optional
+            The `If-None-Match` header of the request.
+
+        Returns
+        -------
+        Response
+            `304 Not Modified` if the header matches the current ETag, otherwise
+            the serialized state.
+        """
+        body, etag = self.get()
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _format_version(version: Hashable) -> str:
+    if isinstance(version, tuple):
+        return "-".join(map(str, version))
+    return str(version)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
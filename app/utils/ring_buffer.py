@@ -0,0 +1,216 @@
+"""
+Ring Buffer Module.
+
+This module defines the ReadingRingBuffer class which keeps the most recent
+readings of a sensor in two preallocated arrays, timestamps as int64 and
+values as float64. Reads return memoryviews into the arrays, so short
+lookbacks are served without copying or creating a Python object per reading.
+
+Selected readings can also be packed into a little-endian binary message,
+built straight from the array memory:
+
+==============  ==========  =====================================
+Field           Type        Description
+==============  ==========  =====================================
+count           uint32      Number of readings
+timestamps      int64[n]    Timestamps in nanoseconds since Epoch
+values          float64[n]  Values of the readings
+==============  ==========  =====================================
+"""
+
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+from app.models.sensors import SensorReadingSeries
+
+PACKED_HEADER = struct.Struct("<I")
+
+
+class ReadingRingBuffer:
+    """
+    Fixed capacity buffer of the newest readings of a sensor.
+
+    Once full, every appended reading overwrites the oldest one. Readings must
+    be appended in time order, a reading that is not newer than the last one is
+    ignored, so the buffer is always sorted by timestamp.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of readings kept. A capacity of 0 disables the buffer.
+
+    Methods
+    -------
+    append(timestamp_ns, value) -> bool
+        Adds a reading.
+    segments(since_ns, last_n) -> List[Tuple[memoryview, memoryview]]
+        Returns views of the timestamps and values of the selected readings.
+    series(since_ns, last_n) -> SensorReadingSeries
+        Returns a copy of the selected readings.
+    pack(since_ns, last_n) -> bytes
+        Returns the selected readings in the packed binary format.
+
+    Notes
+    -----
+    The arrays are never resized, but appended readings overwrite the memory
+    behind previously returned views. Views must be consumed before the next
+    reading is appended, i.e. without awaiting in between.
+    """
+
+    __slots__ = ("capacity", "timestamps", "values", "start", "size")
+
+    def __init__(self, capacity: int):
+        self.capacity = max(0, capacity)
+        self.timestamps = array("q", bytes(8 * self.capacity))
+        self.values = array("d", bytes(8 * self.capacity))
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def last_timestamp_ns(self) -> Optional[int]:
+        """
+        The timestamp of the newest reading, None if the buffer is empty.
+        """
+        if self.size == 0:
+            return None
+        return self.timestamps[(self.start + self.size - 1) % self.capacity]
+
+    def append(self, timestamp_ns: int, value: float) -> bool:
+        """
+        Add a reading, overwriting the oldest one if the buffer is full.
+
+        Parameters
+        ----------
+        timestamp_ns : int
+            Timestamp of the reading in nanoseconds since Epoch.
+        value : float
+            The value of the reading.
+
+        Returns
+        -------
+        bool
+            False if the reading was ignored because it is not newer than the
+            last one or the buffer is disabled.
+        """
+        if self.capacity == 0:
+            return False
+        last = self.last_timestamp_ns
+        if last is not None and timestamp_ns <= last:
+            return False
+
+        if self.size < self.capacity:
+            index = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.timestamps[index] = timestamp_ns
+        self.values[index] = value
+        return True
+
+    def segments(
+        self, since_ns: Optional[int] = None, last_n: Optional[int] = None
+    ) -> List[Tuple[memoryview, memoryview]]:
+        """
+        Return views of the selected readings without copying them.
+
+        Parameters
+        ----------
+        since_ns : int, optional
+            Only select readings at or after this timestamp.
+        last_n : int, optional
+            Only select the newest `last_n` readings.
+
+        Returns
+        -------
+        List[Tuple[memoryview, memoryview]]
+            Up to two pairs of timestamp and value views, in time order. The
+            selection is split where it wraps around the end of the arrays.
+        """
+        first = 0
+        if last_n is not None:
+            first = max(first, self.size - max(0, last_n))
+        if since_ns is not None:
+            first = max(
+                first,
+                bisect_left(
+                    range(self.size),
+                    since_ns,
+                    key=lambda i: self.timestamps[(self.start + i) % self.capacity],
+                ),
+            )
+        if first >= self.size:
+            return []
+
+        begin = (self.start + first) % self.capacity
+        end = begin + self.size - first
+        timestamps, values = memoryview(self.timestamps), memoryview(self.values)
+        if end <= self.capacity:
+            return [(timestamps[begin:end], values[begin:end])]
+        end -= self.capacity
+        return [
+            (timestamps[begin:], values[begin:]),
+            (timestamps[:end], values[:end]),
+        ]
+
+    def series(
+        self, since_ns: Optional[int] = None, last_n: Optional[int] = None
+    ) -> SensorReadingSeries:
+        """
+        Return a copy of the selected readings.
+
+        Parameters
+        ----------
+        since_ns : int, optional
+            Only select readings at or after this timestamp.
+        last_n : int, optional
+            Only select the newest `last_n` readings.
+
+        Returns
+        -------
+        SensorReadingSeries
+            The selected readings in time order.
+        """
+        series = SensorReadingSeries.model_construct(timestamp_ns=[], value=[])
+        for timestamps, values in self.segments(since_ns, last_n):
+            series.timestamp_ns.extend(timestamps.tolist())
+            series.value.extend(values.tolist())
+        return series
+
+    def pack(
+        self, since_ns: Optional[int] = None, last_n: Optional[int] = None
+    ) -> bytes:
+        """
+        Return the selected readings in the packed binary format.
+
+        Parameters
+        ----------
+        since_ns : int, optional
+            Only select readings at or after this timestamp.
+        last_n : int, optional
+            Only select the newest `last_n` readings.
+
+        Returns
+        -------
+        bytes
+            The count, all timestamps and then all values, little-endian.
+        """
+        segments = self.segments(since_ns, last_n)
+        count = sum(len(timestamps) for timestamps, _ in segments)
+        parts = [timestamps for timestamps, _ in segments]
+        parts += [values for _, values in segments]
+        if sys.byteorder == "big":
+            parts = [_swapped(part) for part in parts]
+        return PACKED_HEADER.pack(count) + b"".join(parts)
+
+
+def _swapped(view: memoryview) -> array:
+    values = array(view.format, view)
+    values.byteswap()
+    return values
@@ -0,0 +1,271 @@
+"""
+Topic Hub Module.
+
+This module defines the TopicHub class which multiplexes the messages of
+several WebSocketManager instances over a single WebSocket connection per
+client.
+
+Every index of a registered manager is a topic, e.g.
+``actuators/solenoid/state/3``. Clients subscribe and unsubscribe with JSON
+control messages:
+
+    {"action": "subscribe", "topics": ["actuators/solenoid/state/3"]}
+    {"action": "unsubscribe", "topics": ["actuators/solenoid/state/3"]}
+
+Every message published on a subscribed topic is sent as
+``{"topic": ..., "data": ...}``, where ``data`` is the published JSON message
+unchanged. The current value of a topic is sent on subscription, so the
+client starts from a snapshot and then only receives updates. Topics of
+conflating managers, e.g. sensor readings, are conflated and rate limited per
+topic like on their dedicated endpoints. Invalid control messages are
+answered with ``{"error": ...}``.
+"""
+
+import base64
+import json
+from functools import partial
+from typing import Dict, Iterable, List, Set, Tuple
+
+from fastapi import WebSocket
+from pydantic import ValidationError as PydanticValidationError
+
+from app.models.topics import TopicAction, TopicControlMessage
+from app.utils.config import settings
+from app.utils.logger import logger
+from app.utils.websocket_manager import (
+    Frame,
+    OverflowPolicy,
+    WebSocketConnection,
+    WebSocketManager,
+)
+
+
+class TopicHub:
+    """
+    Multiplexes the topics of several WebSocket managers over one connection.
+
+    Each client owns a single send queue and writer task shared by all its
+    topics, so the overflow policy applies to the connection as a whole.
+    Topics of conflating managers use a latest-value slot per topic on that
+    connection instead of the queue, so a client only receives their newest
+    message at most at the manager's rate. A published message is wrapped once
+    per publish and only if the topic has subscribers.
+
+    Parameters
+    ----------
+    queue_size : int, optional
+        The send queue capacity of each connection.
+    overflow_policy : OverflowPolicy, optional
+        The action taken when a send queue is full.
+    send_timeout : float, optional
+        The time in seconds after which a stalled client is disconnected.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = settings.WEBSOCKET_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy(
+            settings.WEBSOCKET_OVERFLOW_POLICY
+        ),
+        send_timeout: float = settings.WEBSOCKET_SEND_TIMEOUT_S,
+    ):
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self.topics: Dict[str, Tuple[WebSocketManager, int]] = {}
+        self.subscribers: Dict[str, Dict[WebSocket, WebSocketConnection]] = {}
+        self.connections: Dict[WebSocket, WebSocketConnection] = {}
+        self.subscriptions: Dict[WebSocket, Set[str]] = {}
+
+    def register(self, prefix: str, manager: WebSocketManager, indexed: bool = True):
+        """
+        Registers the topics of a WebSocket manager.
+
+        Parameters
+        ----------
+        prefix : str
+            The name of the topics. Each index is appended as ``/<index>``.
+        manager : WebSocketManager
+            The manager whose published messages are forwarded.
+        indexed : bool, optional
+            If False, the manager has a single index whose topic is `prefix`.
+            Defaults to True.
+
+        Raises
+        ------
+        ValueError
+            If a topic is already registered.
+        """
+        names = (
+            [f"{prefix}/{index}" for index in range(manager.count)]
+            if indexed
+            else [prefix]
+        )
+        for index, name in enumerate(names):
+            if name in self.topics:
+                raise ValueError(f"Topic already registered: {name}")
+            self.topics[name] = (manager, index)
+            self.subscribers[name] = {}
+        manager.add_listener(partial(self._on_publish, names))
+
+    def get_topics(self) -> List[str]:
+        """
+        Returns the names of all registered topics.
+        """
+        return list(self.topics)
+
+    async def connect(self, websocket: WebSocket):
+        """
+        Accepts a WebSocket connection without any subscriptions.
+
+        Parameters
+        ----------
+        websocket : WebSocket
+            The WebSocket connection to accept and manage.
+        """
+        await websocket.accept()
+        self.connections[websocket] = WebSocketConnection(
+            websocket,
+            queue_size=self.queue_size,
+            overflow_policy=self.overflow_policy,
+            send_timeout=self.send_timeout,
+            on_close=self._remove,
+        )
+        self.subscriptions[websocket] = set()
+        logger.debug(f"Topic WebSocket connection accepted: {websocket.client}")
+
+    def disconnect(self, websocket: WebSocket):
+        """
+        Removes a WebSocket connection and all its subscriptions.
+
+        Parameters
+        ----------
+        websocket : WebSocket
+            The WebSocket connection to be removed.
+        """
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.close()
+
+    def handle(self, websocket: WebSocket, message: str):
+        """
+        Applies a control message received from a client.
+
+        Parameters
+        ----------
+        websocket : WebSocket
+            The connection the message was received on.
+        message : str
+            The JSON encoded `TopicControlMessage`.
+        """
+        connection = self.connections.get(websocket)
+        if connection is None:
+            return
+
+        try:
+            control = TopicControlMessage.model_validate_json(message)
+        except PydanticValidationError as e:
+            self._send_error(connection, e.errors()[0]["msg"])
+            return
+
+        if control.action == TopicAction.SUBSCRIBE:
+            self.subscribe(websocket, control.topics)
+        else:
+            self.unsubscribe(websocket, control.topics)
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        """
+        Subscribes a connection to topics and sends their current values.
+
+        Unknown topics are reported to the client and otherwise ignored.
+
+        Parameters
+        ----------
+        websocket : WebSocket
+            The connected WebSocket.
+        topics : Iterable[str]
+            The names of the topics.
+        """
+        connection = self.connections[websocket]
+        unknown = []
+        for topic in topics:
+            if topic not in self.topics:
+                unknown.append(topic)
+                continue
+            if websocket in self.subscribers[topic]:
+                continue
+
+            manager, index = self.topics[topic]
+            self.subscribers[topic][websocket] = connection
+            self.subscriptions[websocket].add(topic)
+            retained = manager.get_retained(index)
+            if retained is not None:
+                self._offer(connection, topic, manager, self._wrap(topic, retained))
+
+        if unknown:
+            self._send_error(connection, f"Unknown topics: {', '.join(unknown)}")
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        """
+        Unsubscribes a connection from topics.
+
+        Parameters
+        ----------
+        websocket : WebSocket
+            The connected WebSocket.
+        topics : Iterable[str]
+            The names of the topics, unknown or unsubscribed topics are ignored.
+        """
+        subscriptions = self.subscriptions[websocket]
+        for topic in topics:
+            if topic in subscriptions:
+                subscriptions.discard(topic)
+                self._close_subscription(topic, websocket)
+
+    def _on_publish(self, names: List[str], index: int, frame: Frame):
+        topic = names[index]
+        subscribers = self.subscribers[topic]
+        if not subscribers:
+            return
+
+        manager = self.topics[topic][0]
+        wrapped = self._wrap(topic, frame)
+        for connection in list(subscribers.values()):
+            self._offer(connection, topic, manager, wrapped)
+
+    @staticmethod
+    def _offer(
+        connection: WebSocketConnection,
+        topic: str,
+        manager: WebSocketManager,
+        frame: Frame,
+    ):
+        if manager.conflate:
+            connection.offer_latest(topic, frame, manager.max_rate_hz)
+        else:
+            connection.offer(frame)
+
+    @staticmethod
+    def _wrap(topic: str, frame: Frame) -> Frame:
+        data = frame.message.get("text")
+        if data is None:
+            data = json.dumps(base64.b64encode(frame.message["bytes"]).decode())
+        return Frame(f'{{"topic":{json.dumps(topic)},"data":{data}}}')
+
+    def _close_subscription(self, topic: str, websocket: WebSocket):
+        connection = self.subscribers[topic].pop(websocket)
+        connection.discard_latest(topic)
+
+    @staticmethod
+    def _send_error(connection: WebSocketConnection, message: str):
+        connection.offer(Frame(json.dumps({"error": message})))
+
+    def _remove(self, connection: WebSocketConnection):
+        websocket = connection.websocket
+        if self.connections.get(websocket) is not connection:
+            return
+
+        for topic in self.subscriptions.pop(websocket):
+            self._close_subscription(topic, websocket)
+        del self.connections[websocket]
+        logger.debug(f"Topic WebSocket connection removed: {websocket.client}")
@@ -0,0 +1,209 @@
+"""
+Trajectory Codec Module.
+
+This module encodes and decodes flow control missions in a compact binary
+format, so large campaigns can be queued without parsing a JSON pair per
+trajectory point. All values are little-endian.
+
+The body starts with a file header followed by one record per mission:
+
+====================  ======  ===================================================
+Field                 Type    Description
+====================  ======  ===================================================
+magic                 4s      ``b"FTRJ"``
+version               uint8   Format version, currently 1
+value size            uint8   4 for float32 or 8 for float64 trajectory values
+reserved              uint16  0
+mission count         uint32  Number of mission records
+====================  ======  ===================================================
+
+Each mission record consists of a header and the trajectory, first all times
+and then all flow rates of the mission:
+
+=======================  =========  ============================================
+Field                    Type       Description
+=======================  =========  ============================================
+valve id                 int32      ID of the valve to steer
+point count              uint32     Number of trajectory points
+duration scaling factor  int32      0 if not set
+actual start time        int32      Seconds since midnight, -1 if not set
+actual end use           uint8      1-based index into EndUseType, 0 if not set
+interpolation            uint8      0 step, 1 linear, 2 cubic
+reserved                 2 bytes    0
+sample rate              float64    Setpoints per second, 0 if not set
+times                    value[n]   Times in seconds since the mission start
+flow rates               value[n]   Flow rate until each time is reached
+=======================  =========  ============================================
+"""
+
+import struct
+import sys
+from array import array
+from datetime import time
+from typing import List, Optional
+
+from app.models.missions import (
+    EndUseType,
+    FlowControlMission,
+    InterpolationMode,
+    Trajectory,
+)
+
+MAGIC = b"FTRJ"
+VERSION = 1
+
+FILE_HEADER = struct.Struct("<4sBBHI")
+MISSION_HEADER = struct.Struct("<iIiiBB2xd")
+
+END_USE_TYPES = list(EndUseType)
+INTERPOLATION_MODES = list(InterpolationMode)
+VALUE_TYPECODES = {4: "f", 8: "d"}
+
+
+def encode_missions(missions: List[FlowControlMission], value_size: int = 8) -> bytes:
+    """
+    Encode flow control missions in the binary trajectory format.
+
+    Parameters
+    ----------
+    missions : List[FlowControlMission]
+        The missions to encode.
+    value_size : int, optional
+        4 to store the trajectory as float32, 8 for float64. Defaults to 8.
+
+    Returns
+    -------
+    bytes
+        The encoded missions.
+    """
+    typecode = VALUE_TYPECODES[value_size]
+    parts = [FILE_HEADER.pack(MAGIC, VERSION, value_size, 0, len(missions))]
+    for mission in missions:
+        trajectory = mission.flow_trajectory
+        parts.append(
+            MISSION_HEADER.pack(
+                mission.valve_id,
+                len(trajectory),
+                mission.duration_scaling_factor or 0,
+                (
+                    _seconds_since_midnight(mission.actual_start_time)
+                    if mission.actual_start_time is not None
+                    else -1
+                ),
+                (
+                    END_USE_TYPES.index(mission.actual_end_use) + 1
+                    if mission.actual_end_use is not None
+                    else 0
+                ),
+                INTERPOLATION_MODES.index(mission.interpolation),
+                mission.sample_rate_hz or 0.0,
+            )
+        )
+        for values in (trajectory.times, trajectory.flow_rates):
+            values = array(typecode, values)
+            if sys.byteorder == "big":
+                values.byteswap()
+            parts.append(values.tobytes())
+    return b"".join(parts)
+
+
+def decode_missions(data: bytes) -> List[FlowControlMission]:
+    """
+    Decode and validate flow control missions from the binary trajectory format.
+
+    The trajectory values are copied straight into the arrays of a
+    `Trajectory`, without creating a Python object per point.
+
+    Parameters
+    ----------
+    data : bytes
+        The encoded missions.
+
+    Returns
+    -------
+    List[FlowControlMission]
+        The decoded missions.
+
+    Raises
+    ------
+    ValueError
+        If the data is not in the binary trajectory format or is truncated.
+    pydantic.ValidationError
+        If a decoded mission is invalid.
+    """
+    view = memoryview(data)
+    if len(view) < FILE_HEADER.size:
+        raise ValueError("Data is too short for the file header")
+    magic, version, value_size, _, count = FILE_HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Data is not in the binary trajectory format")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary trajectory format version: {version}")
+    typecode = VALUE_TYPECODES.get(value_size)
+    if typecode is None:
+        raise ValueError(f"Unsupported trajectory value size: {value_size}")
+
+    missions = []
+    offset = FILE_HEADER.size
+    for index in range(count):
+        if len(view) < offset + MISSION_HEADER.size:
+            raise ValueError(f"Data is truncated in the header of mission {index}")
+        (
+            valve_id,
+            length,
+            scaling_factor,
+            start_time,
+            end_use,
+            interpolation,
+            sample_rate_hz,
+        ) = MISSION_HEADER.unpack_from(view, offset)
+        offset += MISSION_HEADER.size
+
+        size = length * value_size
+        if len(view) < offset + 2 * size:
+            raise ValueError(f"Data is truncated in the trajectory of mission {index}")
+        times = _read_values(view[offset : offset + size], typecode)
+        flow_rates = _read_values(view[offset + size : offset + 2 * size], typecode)
+        offset += 2 * size
+
+        if end_use > len(END_USE_TYPES):
+            raise ValueError(f"Unknown actual end use of mission {index}: {end_use}")
+        if interpolation >= len(INTERPOLATION_MODES):
+            raise ValueError(
+                f"Unknown interpolation of mission {index}: {interpolation}"
+            )
+        missions.append(
+            FlowControlMission(
+                valve_id=valve_id,
+                flow_trajectory=Trajectory(times, flow_rates),
+                duration_scaling_factor=scaling_factor or None,
+                actual_start_time=_time_of_day(start_time),
+                actual_end_use=END_USE_TYPES[end_use - 1] if end_use else None,
+                interpolation=INTERPOLATION_MODES[interpolation],
+                sample_rate_hz=sample_rate_hz or None,
+            )
+        )
+
+    if offset != len(view):
+        raise ValueError("Data continues after the last mission")
+    return missions
+
+
+def _read_values(data: memoryview, typecode: str) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values if typecode == "d" else array("d", values)
+
+
+def _seconds_since_midnight(value: time) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _time_of_day(seconds: int) -> Optional[time]:
+    if seconds < 0:
+        return None
+    if seconds >= 24 * 3600:
+        raise ValueError(f"Actual start time out of range: {seconds}")
+    return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
@@ -4,45 +4,407 @@ WebSocket Manager Module.
 This module defines the WebSocketManager class which handles WebSocket
 connections, including connecting, disconnecting, and broadcasting messages
 to all active WebSocket connections.
+
+Every connection owns a bounded send queue drained by its own writer task,
+so a slow or half-dead client only ever delays itself. Managers of high-rate
+topics can conflate instead, so a client that falls behind only receives the
+newest message. Conflated messages are kept in per-key latest-value slots of
+the connection and sent by the same writer task.
+
+Messages are wrapped in a Frame once per broadcast, and the last frame of each
+index is retained so new subscribers receive the current value without it
+being serialized again. Until the first broadcast, the current value is
+rendered by an optional snapshot callback. Listeners receive every published frame, e.g. to
+forward it over a multiplexed connection.
 """
 
-from typing import List
+import asyncio
+import contextlib
+from enum import Enum
+from typing import Callable, Dict, Hashable, List, Optional, Union
 from fastapi import WebSocket
 
+from app.utils.config import settings
 from app.utils.logger import logger
 
 
+class OverflowPolicy(str, Enum):
+    """Enumeration of the actions taken when a connection's send queue is full."""
+
+    DROP_OLDEST = "drop-oldest"
+    DROP_NEWEST = "drop-newest"
+    DISCONNECT = "disconnect"
+
+
+class Frame:
+    """
+    WebSocket message encoded once and shared by every connection it is sent to.
+
+    Parameters
+    ----------
+    payload : str | bytes
+        The pre-encoded message.
+    binary : bool, optional
+        Send the payload as a binary frame instead of a text frame. Defaults to False.
+
+    Attributes
+    ----------
+    message : dict
+        The ASGI send message passed unchanged to every connection.
+    """
+
+    __slots__ = ("message",)
+
+    def __init__(self, payload: Union[str, bytes], binary: bool = False):
+        if binary:
+            data = payload.encode() if isinstance(payload, str) else payload
+            self.message = {"type": "websocket.send", "bytes": data}
+        else:
+            text = payload.decode() if isinstance(payload, bytes) else payload
+            self.message = {"type": "websocket.send", "text": text}
+
+
+class WebSocketConnection:
+    """
+    Send queue and writer task of a single WebSocket connection.
+
+    Parameters
+    ----------
+    websocket : WebSocket
+        The accepted WebSocket connection.
+    queue_size : int
+        Maximum number of messages waiting to be sent.
+    overflow_policy : OverflowPolicy
+        Action taken when a message is offered to a full queue.
+    send_timeout : float
+        Maximum time in seconds a single send may take before the client is
+        disconnected.
+    on_close : Callable[[WebSocketConnection], None]
+        Called once when the writer gives up on the connection.
+    initial : Frame, optional
+        Sent before any offered frame, it is never dropped.
+
+    Attributes
+    ----------
+    dropped_messages : int
+        Number of messages discarded because the queue was full or replaced
+        by a newer message in their latest-value slot.
+
+    Notes
+    -----
+    Besides the queue, the connection keeps one latest-value slot per key,
+    filled by `offer_latest`. A frame offered to a slot replaces the frame
+    still waiting there, and each slot can be rate limited. The writer task
+    sends queued frames first and then every slot that is due.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        queue_size: int,
+        overflow_policy: OverflowPolicy,
+        send_timeout: float,
+        on_close: Callable[["WebSocketConnection"], None],
+        initial: Optional[Frame] = None,
+    ):
+        self.websocket = websocket
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self.dropped_messages = 0
+        self._on_close = on_close
+        self._initial = initial
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self._latest: Dict[Hashable, Frame] = {}
+        self._latest_intervals: Dict[Hashable, float] = {}
+        self._latest_sent: Dict[Hashable, float] = {}
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    def offer(self, frame: Frame) -> None:
+        """
+        Queue a frame for sending without waiting for the client.
+
+        Parameters
+        ----------
+        frame : Frame
+            The frame to send.
+        """
+        if self._closed:
+            return
+
+        if self._queue.full():
+            match self.overflow_policy:
+                case OverflowPolicy.DROP_OLDEST:
+                    self._queue.get_nowait()
+                    self.dropped_messages += 1
+                case OverflowPolicy.DROP_NEWEST:
+                    self.dropped_messages += 1
+                    return
+                case OverflowPolicy.DISCONNECT:
+                    logger.warning(
+                        f"WebSocket send queue full, disconnecting: {self.websocket.client}"
+                    )
+                    self.close()
+                    self._task = asyncio.create_task(self._close_websocket())
+                    return
+
+        self._queue.put_nowait(frame)
+        self._wakeup.set()
+
+    def offer_latest(
+        self, key: Hashable, frame: Frame, max_rate_hz: Optional[float] = None
+    ) -> None:
+        """
+        Replace the frame waiting in the latest-value slot of a key.
+
+        Parameters
+        ----------
+        key : Hashable
+            The slot of the frame, e.g. a topic.
+        frame : Frame
+            The frame to send.
+        max_rate_hz : float, optional
+            Maximum number of frames sent per second from this slot, unlimited
+            if None.
+        """
+        if self._closed:
+            return
+
+        if key in self._latest:
+            self.dropped_messages += 1
+        self._latest[key] = frame
+        self._latest_intervals[key] = 1 / max_rate_hz if max_rate_hz else 0.0
+        self._wakeup.set()
+
+    def discard_latest(self, key: Hashable) -> None:
+        """
+        Remove the latest-value slot of a key, including a waiting frame.
+        """
+        self._latest.pop(key, None)
+        self._latest_intervals.pop(key, None)
+        self._latest_sent.pop(key, None)
+
+    def close(self) -> None:
+        """
+        Stop the writer task and discard all queued messages.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._on_close(self)
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    async def _next_frame(self) -> Frame:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._queue.empty():
+                return self._queue.get_nowait()
+
+            now = loop.time()
+            timeout: Optional[float] = None
+            for key, frame in self._latest.items():
+                due = self._latest_sent.get(key, float("-inf"))
+                due += self._latest_intervals[key]
+                if due <= now:
+                    del self._latest[key]
+                    self._latest_sent[key] = now
+                    return frame
+                timeout = due - now if timeout is None else min(timeout, due - now)
+
+            self._wakeup.clear()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+
+    async def _run(self):
+        while True:
+            if self._initial is not None:
+                frame, self._initial = self._initial, None
+            else:
+                frame = await self._next_frame()
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send(frame.message), self.send_timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"WebSocket send timed out, disconnecting: {self.websocket.client}"
+                )
+                break
+            except Exception as e:
+                logger.debug(f"WebSocket send failed for {self.websocket.client}: {e}")
+                break
+
+        self.close()
+        await self._close_websocket()
+
+    async def _close_websocket(self):
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(self.websocket.close(), self.send_timeout)
+
+
+class ConflatingWebSocketConnection(WebSocketConnection):
+    """
+    WebSocket connection that only keeps the newest message.
+
+    A message offered while the previous one is still waiting replaces it, so a
+    client that falls behind skips straight to the latest value.
+
+    Parameters
+    ----------
+    websocket : WebSocket
+        The accepted WebSocket connection.
+    max_rate_hz : float, optional
+        Maximum number of messages sent per second, unlimited if None.
+    send_timeout : float
+        Maximum time in seconds a single send may take before the client is
+        disconnected.
+    on_close : Callable[[WebSocketConnection], None]
+        Called once when the writer gives up on the connection.
+    initial : Frame, optional
+        Sent before any offered frame, it is never conflated.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_rate_hz: Optional[float],
+        send_timeout: float,
+        on_close: Callable[[WebSocketConnection], None],
+        initial: Optional[Frame] = None,
+    ):
+        self.max_rate_hz = max_rate_hz
+        super().__init__(
+            websocket,
+            queue_size=1,
+            overflow_policy=OverflowPolicy.DROP_OLDEST,
+            send_timeout=send_timeout,
+            on_close=on_close,
+            initial=initial,
+        )
+
+    def offer(self, frame: Frame) -> None:
+        """
+        Replace the pending frame without waiting for the client.
+
+        Parameters
+        ----------
+        frame : Frame
+            The frame to send.
+        """
+        self.offer_latest(None, frame, self.max_rate_hz)
+
+
 class WebSocketManager:
-    def __init__(self, count: int = 1):
+    def __init__(
+        self,
+        count: int = 1,
+        queue_size: int = settings.WEBSOCKET_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy(
+            settings.WEBSOCKET_OVERFLOW_POLICY
+        ),
+        send_timeout: float = settings.WEBSOCKET_SEND_TIMEOUT_S,
+        conflate: bool = False,
+        max_rate_hz: Optional[float] = None,
+        binary: bool = False,
+        snapshot: Optional[
+            Callable[[int], Optional[Union[str, bytes, Frame]]]
+        ] = None,
+    ):
         """
         Initializes a new instance of WebSocketManager.
 
         Args:
             count (int, optional): The number of WebSocket managers to initialize. Defaults to 1.
+            queue_size (int, optional): The send queue capacity of each connection.
+            overflow_policy (OverflowPolicy, optional): The action taken when a send queue is full.
+            send_timeout (float, optional): The time in seconds after which a stalled client is disconnected.
+            conflate (bool, optional): Only send the newest message to clients that fall behind. Defaults to False.
+            max_rate_hz (float, optional): The maximum message rate per client if conflating. Defaults to unlimited.
+            binary (bool, optional): Send messages as binary instead of text frames. Defaults to False.
+            snapshot (Callable[[int], str | bytes | Frame | None], optional): Renders the current value of an index that has no retained frame yet, None if it has no value.
         """
-        self.active_connections: List[List[WebSocket]] = [[] for _ in range(count)]
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self.conflate = conflate
+        self.max_rate_hz = max_rate_hz
+        self.binary = binary
+        self.snapshot = snapshot
+        self.active_connections: List[Dict[WebSocket, WebSocketConnection]] = [
+            {} for _ in range(count)
+        ]
+        self.retained_frames: List[Optional[Frame]] = [None] * count
+        self.listeners: List[Callable[[int, Frame], None]] = []
 
-    # ... (existing methods remain the same, with adjustments to handle the list of lists)
+    @property
+    def count(self) -> int:
+        """
+        Returns the number of indices of the manager.
+        """
+        return len(self.active_connections)
 
-    async def connect(self, index: int, websocket: WebSocket):
+    async def connect(
+        self,
+        index: int,
+        websocket: WebSocket,
+        initial: Optional[Callable[[], Frame]] = None,
+    ):
         """
         Accepts a WebSocket connection and adds it to the active connections.
 
+        The current value of the index, if any, is sent to the new connection.
+
         Parameters
         ----------
         index : int
             The index of the WebSocket manager.
         websocket : WebSocket
             The WebSocket connection to accept and manage.
+        initial : Callable[[], Frame], optional
+            Creates a frame sent instead of the retained frame, before any
+            published message. It is called once the connection is accepted,
+            without a message being published in between.
         """
         await websocket.accept()
-        self.active_connections[index].append(websocket)
+        initial_frame = initial() if initial is not None else None
+
+        def on_close(connection):
+            self._remove(index, connection)
+
+        if self.conflate:
+            connection = ConflatingWebSocketConnection(
+                websocket,
+                max_rate_hz=self.max_rate_hz,
+                send_timeout=self.send_timeout,
+                on_close=on_close,
+                initial=initial_frame,
+            )
+        else:
+            connection = WebSocketConnection(
+                websocket,
+                queue_size=self.queue_size,
+                overflow_policy=self.overflow_policy,
+                send_timeout=self.send_timeout,
+                on_close=on_close,
+                initial=initial_frame,
+            )
+        self.active_connections[index][websocket] = connection
+
+        if initial_frame is None:
+            retained = self.get_retained(index)
+            if retained is not None:
+                connection.offer(retained)
         logger.debug(f"WebSocket connection accepted: {websocket.client}")
 
     def disconnect(self, index: int, websocket: WebSocket):
         """
         Removes a WebSocket connection from the active connections.
 
+        Calling this method for a connection that was already removed, e.g.
+        because it was too slow, has no effect.
+
         Parameters
         ----------
         index : int
@@ -50,19 +412,107 @@ class WebSocketManager:
         websocket : WebSocket
             The WebSocket connection to be removed.
         """
-        self.active_connections[index].remove(websocket)
-        logger.debug(f"WebSocket connection removed: {websocket.client}")
+        connection = self.active_connections[index].get(websocket)
+        if connection is not None:
+            connection.close()
+
+    async def broadcast(
+        self, index: int, message: Union[str, bytes, Frame], retain: bool = True
+    ):
+        """
+        Queues a message for all active WebSocket connections.
+
+        The message is encoded into a single frame shared by every connection,
+        put on their send queues, and this method returns without waiting for
+        any client.
+
+        Parameters
+        ----------
+        index : int
+            The index of the WebSocket manager.
+        message : str | bytes | Frame
+            The pre-encoded message to be broadcasted to all active connections.
+        retain : bool, optional
+            Keep the frame as the current value sent to new connections. Defaults to True.
+        """
+        self.publish(index, message, retain)
 
-    async def broadcast(self, index: int, message: str):
+    def publish(
+        self, index: int, message: Union[str, bytes, Frame], retain: bool = True
+    ):
         """
-        Sends a text message to all active WebSocket connections.
+        Queues a message for all active WebSocket connections.
+
+        Synchronous variant of `broadcast` for callbacks running on the event
+        loop. It must not be called from other threads.
 
         Parameters
         ----------
         index : int
             The index of the WebSocket manager.
-        message : str
-            The message to be broadcasted to all active connections.
+        message : str | bytes | Frame
+            The pre-encoded message to be broadcasted to all active connections.
+        retain : bool, optional
+            Keep the frame as the current value sent to new connections. Defaults to True.
         """
-        for connection in self.active_connections[index]:
-            await connection.send_text(message)
+        frame = self._frame(message)
+        if retain:
+            self.retained_frames[index] = frame
+        for connection in list(self.active_connections[index].values()):
+            connection.offer(frame)
+        for listener in self.listeners:
+            listener(index, frame)
+
+    def add_listener(self, listener: Callable[[int, Frame], None]):
+        """
+        Registers a callback receiving the index and frame of every publish.
+
+        Parameters
+        ----------
+        listener : Callable[[int, Frame], None]
+            Called on the event loop, it must not block.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[int, Frame], None]):
+        """
+        Removes a callback registered with `add_listener`.
+        """
+        self.listeners.remove(listener)
+
+    def retain(self, index: int, message: Union[str, bytes, Frame]):
+        """
+        Sets the frame sent to new connections without broadcasting it.
+
+        Parameters
+        ----------
+        index : int
+            The index of the WebSocket manager.
+        message : str | bytes | Frame
+            The pre-encoded current value of the index.
+        """
+        self.retained_frames[index] = self._frame(message)
+
+    def get_retained(self, index: int) -> Optional[Frame]:
+        """
+        Returns the frame sent to new connections of an index, if any.
+
+        If nothing was retained yet, the frame is rendered by the snapshot
+        callback and retained.
+        """
+        frame = self.retained_frames[index]
+        if frame is None and self.snapshot is not None:
+            message = self.snapshot(index)
+            if message is not None:
+                frame = self.retained_frames[index] = self._frame(message)
+        return frame
+
+    def _frame(self, message: Union[str, bytes, Frame]) -> Frame:
+        if isinstance(message, Frame):
+            return message
+        return Frame(message, binary=self.binary)
+
+    def _remove(self, index: int, connection: WebSocketConnection):
+        if self.active_connections[index].get(connection.websocket) is connection:
+            del self.active_connections[index][connection.websocket]
+            logger.debug(f"WebSocket connection removed: {connection.websocket.client}")